@@ -6,13 +6,80 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     database_url: str = Field(..., alias="DATABASE_URL")
     api_secret_key: str = Field("change-me", alias="API_SECRET_KEY")
+    session_secret_key: str = Field("change-me", alias="SESSION_SECRET_KEY")
     default_timezone: str = Field("America/Sao_Paulo", alias="DEFAULT_TIMEZONE")
 
+    http_max_connections: int = Field(100, alias="HTTP_MAX_CONNECTIONS")
+    http_max_keepalive_connections: int = Field(20, alias="HTTP_MAX_KEEPALIVE_CONNECTIONS")
+
+    snapshot_dir: str | None = Field(None, alias="SNAPSHOT_DIR")
+    snapshot_max_mb: int = Field(1024, alias="SNAPSHOT_MAX_MB")
+    snapshot_compression: str = Field("zstd", alias="SNAPSHOT_COMPRESSION")
+
+    image_dir: str | None = Field(None, alias="IMAGE_DIR")
+    image_cache_max_mb: int = Field(2048, alias="IMAGE_CACHE_MAX_MB")
+    image_channels: str = Field("telegram,whatsapp,thumb", alias="IMAGE_CHANNELS")
+    image_workers: int = Field(2, alias="IMAGE_WORKERS")
+    image_fetch_timeout: float = Field(10.0, alias="IMAGE_FETCH_TIMEOUT")
+    image_max_download_mb: int = Field(10, alias="IMAGE_MAX_DOWNLOAD_MB")
+
+    cache_version_check_ms: int = Field(500, alias="CACHE_VERSION_CHECK_MS")
+    cache_version_push_fallback_ms: int = Field(30000, alias="CACHE_VERSION_PUSH_FALLBACK_MS")
+    cache_listen_notify: bool = Field(True, alias="CACHE_LISTEN_NOTIFY")
+
+    offer_job_workers: int = Field(4, alias="OFFER_JOB_WORKERS")
+    offer_job_poll_interval: float = Field(1.0, alias="OFFER_JOB_POLL_INTERVAL")
+    offer_job_stale_after: int = Field(120, alias="OFFER_JOB_STALE_AFTER")
+    offer_job_max_attempts: int = Field(3, alias="OFFER_JOB_MAX_ATTEMPTS")
+
+    offer_history_enabled: bool = Field(True, alias="OFFER_HISTORY_ENABLED")
+    dedupe_window_hours: float = Field(24.0, alias="DEDUPE_WINDOW_HOURS")
+    dedupe_max_events: int = Field(200_000, alias="DEDUPE_MAX_EVENTS")
+    feed_size: int = Field(50, alias="FEED_SIZE")
+    feed_site_url: str = Field("http://localhost:8000", alias="FEED_SITE_URL")
+
+    deadline_max_ms: int = Field(30000, alias="DEADLINE_MAX_MS")
+    deadline_fetch_share: float = Field(0.7, alias="DEADLINE_FETCH_SHARE")
+    deadline_render_reserve_ms: int = Field(50, alias="DEADLINE_RENDER_RESERVE_MS")
+    metadata_recent_size: int = Field(2048, alias="METADATA_RECENT_SIZE")
+    parse_memory_budget_mb: int = Field(256, alias="PARSE_MEMORY_BUDGET_MB")
+    parse_memory_factor: float = Field(12.0, alias="PARSE_MEMORY_FACTOR")
+
+    query_budget: int = Field(25, alias="QUERY_BUDGET")
+    query_repeat_threshold: int = Field(5, alias="QUERY_REPEAT_THRESHOLD")
+
+    gzip_min_size: int = Field(1024, alias="GZIP_MIN_SIZE")
+    gzip_level: int = Field(6, alias="GZIP_LEVEL")
+
+    bulk_import_concurrency: int = Field(8, alias="BULK_IMPORT_CONCURRENCY")
+    bulk_import_progress_interval: float = Field(1.0, alias="BULK_IMPORT_PROGRESS_INTERVAL")
+
+    publish_global_per_second: float = Field(25.0, alias="PUBLISH_GLOBAL_PER_SECOND")
+    publish_channel_per_minute: float = Field(20.0, alias="PUBLISH_CHANNEL_PER_MINUTE")
+    publish_max_attempts: int = Field(5, alias="PUBLISH_MAX_ATTEMPTS")
+    telegram_bot_token: str | None = Field(None, alias="TELEGRAM_BOT_TOKEN")
+    telegram_api_base_url: str = Field("https://api.telegram.org", alias="TELEGRAM_API_BASE_URL")
+    whatsapp_token: str | None = Field(None, alias="WHATSAPP_TOKEN")
+    whatsapp_phone_number_id: str | None = Field(None, alias="WHATSAPP_PHONE_NUMBER_ID")
+
+    schedule_prefetch_minutes: float = Field(5.0, alias="SCHEDULE_PREFETCH_MINUTES")
+    schedule_max_lateness_minutes: float = Field(60.0, alias="SCHEDULE_MAX_LATENESS_MINUTES")
+    schedule_sync_seconds: float = Field(60.0, alias="SCHEDULE_SYNC_SECONDS")
+    schedule_concurrency: int = Field(8, alias="SCHEDULE_CONCURRENCY")
+
     default_amazon_tag: str | None = Field(None, alias="DEFAULT_AMAZON_TAG")
     default_ml_app_id: str | None = Field(None, alias="DEFAULT_ML_APP_ID")
     default_ml_secret: str | None = Field(None, alias="DEFAULT_ML_SECRET")
+    ml_api_enabled: bool = Field(True, alias="ML_API_ENABLED")
+    ml_api_base_url: str = Field("https://api.mercadolibre.com", alias="ML_API_BASE_URL")
+    ml_api_batch_size: int = Field(20, alias="ML_API_BATCH_SIZE")
+    ml_api_batch_window_ms: int = Field(10, alias="ML_API_BATCH_WINDOW_MS")
     default_awin_source_id: str | None = Field(None, alias="DEFAULT_AWIN_SOURCE_ID")
 
+    default_admin_email: str | None = Field(None, alias="DEFAULT_ADMIN_EMAIL")
+    default_admin_password: str | None = Field(None, alias="DEFAULT_ADMIN_PASSWORD")
+    default_admin_role: str = Field("admin", alias="DEFAULT_ADMIN_ROLE")
+
     class Config:
         env_file = ".env"
         case_sensitive = False
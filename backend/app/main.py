@@ -1,28 +1,39 @@
 ﻿from __future__ import annotations
 
-from pathlib import Path
-
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.sessions import SessionMiddleware
-from fastapi.staticfiles import StaticFiles
+from starlette.middleware.sessions import SessionMiddleware
 
 from .config import settings
 from .database import Base, SessionLocal, engine
-from .routes import auth, integrations, offers, rules, templates, web
+from .middleware import CompressionMiddleware, QueryBudgetMiddleware
+from .responses import FastJSONResponse
+from .routes import affiliate, auth, feeds, images, integrations, offers, publish, rules, schedule, templates, web
+from .services.cache_versions import ensure_cache_versions, start_notify_listener
+from .services.dedupe import recent_offers
+from .services.http_client import close_http_client
 from .services.integrations import ensure_default_integrations
+from .services.jobs import job_queue
+from .services.metrics import metrics
 from .services.offer_builder import ensure_default_template
+from .services.offer_search import ensure_search_index
+from .services.publisher import stop_dispatcher
+from .services.query_budget import instrument_engine
+from .services.scheduler import campaign_scheduler
 from .services.users import ensure_default_admin
-
-BASE_DIR = Path(__file__).resolve().parent
-STATIC_DIR = BASE_DIR / "static"
+from .static_assets import static_assets
 
 app = FastAPI(
     title="Grupo Ofertas API",
     version="0.1.0",
     description="Plataforma configurável para geração de ofertas afiliadas",
+    default_response_class=FastJSONResponse,
 )
 
+instrument_engine(engine)
+app.add_middleware(QueryBudgetMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -38,25 +49,57 @@ app.add_middleware(
     https_only=False,
 )
 
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+app.add_middleware(CompressionMiddleware)
+
+app.mount("/static", static_assets, name="static")
 
 app.include_router(auth.router)
 app.include_router(integrations.router)
 app.include_router(templates.router)
 app.include_router(rules.router)
 app.include_router(offers.router)
+app.include_router(images.router)
+app.include_router(feeds.router)
+app.include_router(affiliate.router)
+app.include_router(publish.router)
+app.include_router(schedule.router)
 app.include_router(web.router)
 
 
 @app.on_event("startup")
 def on_startup() -> None:
     Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
     with SessionLocal() as session:
+        ensure_cache_versions(session)
         ensure_default_template(session)
         ensure_default_integrations(session)
         ensure_default_admin(session)
+        recent_offers.rebuild(session)
+
+
+@app.on_event("startup")
+async def start_background_workers() -> None:
+    app.state.cache_listener = start_notify_listener(engine)
+    job_queue.start(settings.offer_job_workers)
+    campaign_scheduler.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    await job_queue.stop()
+    await campaign_scheduler.stop()
+    await stop_dispatcher()
+    await close_http_client()
+    if app.state.cache_listener:
+        app.state.cache_listener.stop()
 
 
 @app.get("/healthz")
 async def healthcheck() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics_endpoint() -> str:
+    return metrics.render()
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import gzip
+import logging
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+from .services.metrics import metrics
+from .services.query_budget import QUERY_COUNT_HEADER, QUERY_TIME_HEADER, QueryStats, capture_queries
+from .static_assets import accepted_encodings
+
+logger = logging.getLogger(__name__)
+
+
+def _route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class QueryBudgetMiddleware:
+    """Conta consultas e tempo de banco por requisição e avisa quando passa do orçamento.
+
+    Os totais vão nos cabeçalhos ``X-DB-Queries``/``X-DB-Time-Ms`` (até o início da resposta)
+    e nas métricas (requisição inteira, incluindo corpos em streaming).
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with capture_queries() as stats:
+
+            async def send_with_headers(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers[QUERY_COUNT_HEADER] = str(stats.count)
+                    headers[QUERY_TIME_HEADER] = f"{stats.total_ms:.1f}"
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_headers)
+            finally:
+                self._report(scope, stats)
+
+    def _report(self, scope: Scope, stats: QueryStats) -> None:
+        route = _route_label(scope)
+        metrics.observe("http_db_queries", stats.count, {"route": route})
+        metrics.observe("http_db_time_ms", stats.total_ms, {"route": route})
+
+        reasons = []
+        if stats.count > settings.query_budget:
+            reasons.append("budget")
+        repeated = stats.repeated(settings.query_repeat_threshold)
+        if repeated:
+            reasons.append("repeated")
+        if not reasons:
+            return
+        for reason in reasons:
+            metrics.inc("http_query_budget_exceeded_total", {"route": route, "reason": reason})
+        top = repeated or stats.statements.most_common(5)
+        logger.warning(
+            "Orçamento de consultas excedido em %s %s: %d consultas (limite %d), %.1f ms; %s",
+            scope.get("method"),
+            route,
+            stats.count,
+            settings.query_budget,
+            stats.total_ms,
+            "; ".join(f"{count}x {statement[:200]}" for statement, count in top),
+        )
+
+
+COMPRESSIBLE_TYPES = ("text/html", "text/plain", "text/css", "text/csv", "application/json", "application/xml", "application/rss+xml", "application/feed+json", "application/javascript")
+
+
+class CompressionMiddleware:
+    """Gzip nas respostas dinâmicas completas (HTML, JSON, texto) a partir de ``GZIP_MIN_SIZE`` bytes.
+
+    Corpos em streaming (SSE, NDJSON de progresso) passam intactos para não segurar eventos no
+    buffer do compressor, assim como respostas que já vêm comprimidas (``/static``).
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int | None = None, level: int | None = None) -> None:
+        self.app = app
+        self.minimum_size = settings.gzip_min_size if minimum_size is None else minimum_size
+        self.level = settings.gzip_level if level is None else level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or accepted_encodings(Headers(scope=scope).get("accept-encoding", "")).get("gzip", 0) <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+                passthrough = "content-encoding" in headers or content_type not in COMPRESSIBLE_TYPES
+                if passthrough:
+                    await send(message)
+                else:
+                    start = message
+                return
+            if passthrough or start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+            initial, start = start, None
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                passthrough = True
+                await send(initial)
+                await send(message)
+                return
+            compressed = gzip.compress(body, compresslevel=self.level)
+            headers = MutableHeaders(raw=initial["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if len(compressed) < len(body):
+                headers["Content-Encoding"] = "gzip"
+                headers["Content-Length"] = str(len(compressed))
+                if "etag" in headers and not headers["etag"].startswith("W/"):
+                    headers["ETag"] = f"W/{headers['etag']}"  # a representação mudou; o validador fica fraco
+                message = {**message, "body": compressed}
+            await send(initial)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -2,12 +2,28 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Integer, String, Boolean, JSON, Text, UniqueConstraint
+from sqlalchemy import Column, DateTime, Index, Integer, String, Boolean, JSON, Text, UniqueConstraint
 
 from .database import Base
 
 
-class TimestampMixin:\n    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)\n    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)\n\n\nclass User(TimestampMixin, Base):\n    __tablename__ = "users"\n\n    id = Column(Integer, primary_key=True, index=True)\n    email = Column(String(255), nullable=False, unique=True, index=True)\n    full_name = Column(String(120))\n    password_hash = Column(String(255), nullable=False)\n    role = Column(String(32), nullable=False, default="editor")\n    is_active = Column(Boolean, nullable=False, default=True)\n\n\nclass IntegrationSetting(TimestampMixin, Base):
+class TimestampMixin:
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class User(TimestampMixin, Base):
+    __tablename__ = "users"
+
+    id = Column(Integer, primary_key=True, index=True)
+    email = Column(String(255), nullable=False, unique=True, index=True)
+    full_name = Column(String(120))
+    password_hash = Column(String(255), nullable=False)
+    role = Column(String(32), nullable=False, default="editor")
+    is_active = Column(Boolean, nullable=False, default=True)
+
+
+class IntegrationSetting(TimestampMixin, Base):
     __tablename__ = "integration_settings"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -35,4 +51,74 @@ class TransformationRule(TimestampMixin, Base):
     name = Column(String(120), nullable=False)
     description = Column(String(255))
     conditions = Column(JSON, default=dict)
-    actions = Column(JSON, default=dict)
+    actions = Column(JSON, default=dict)
+
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    entity = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class OfferJob(TimestampMixin, Base):
+    __tablename__ = "offer_jobs"
+    __table_args__ = (Index("ix_offer_jobs_status_created", "status", "created_at"),)
+
+    id = Column(String(32), primary_key=True)
+    status = Column(String(16), nullable=False, default="pending")
+    payload = Column(JSON, nullable=False)
+    result = Column(JSON)
+    error = Column(Text)
+    attempts = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+
+class BulkImport(TimestampMixin, Base):
+    __tablename__ = "bulk_imports"
+
+    id = Column(String(32), primary_key=True)
+    status = Column(String(16), nullable=False, default="running")
+    rows_read = Column(Integer, nullable=False, default=0)
+    rows_done = Column(Integer, nullable=False, default=0)
+    rows_failed = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    finished_at = Column(DateTime)
+
+
+class OfferRecord(TimestampMixin, Base):
+    """Histórico das ofertas geradas (prévias, jobs e importações)."""
+
+    __tablename__ = "offer_history"
+    __table_args__ = (Index("ix_offer_history_store_created", "store", "created_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(Text, nullable=False)
+    product_key = Column(String(255), index=True)
+    store = Column(String(32), nullable=False)
+    template_slug = Column(String(100))
+    coupon = Column(String(100))
+    title = Column(Text)
+    price = Column(String(32))
+    # Preço em centavos para filtros por faixa; ``price`` continua como exibido ("R$ 1.299,90").
+    price_cents = Column(Integer, index=True)
+    text = Column(Text, nullable=False)
+    context = Column(JSON, nullable=False)
+
+
+class ScheduledPost(TimestampMixin, Base):
+    """Oferta agendada para publicação (horários em UTC; a API converte de ``DEFAULT_TIMEZONE``)."""
+
+    __tablename__ = "scheduled_posts"
+    __table_args__ = (Index("ix_scheduled_posts_status_publish_at", "status", "publish_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String(16), nullable=False, default="pending")
+    publish_at = Column(DateTime, nullable=False)
+    payload = Column(JSON, nullable=False)
+    channels = Column(JSON, nullable=False, default=list)
+    result = Column(JSON)
+    error = Column(Text)
+    prefetched_at = Column(DateTime)
+    published_at = Column(DateTime)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any, Sequence
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 500
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, UnicodeDecodeError):
+        values = None
+    if (
+        not isinstance(values, list)
+        or len(values) != size
+        or not all(value is None or isinstance(value, (str, int, float)) for value in values)
+    ):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Cursor de paginação inválido")
+    return values
+
+
+def keyset_page(
+    query: Query,
+    columns: Sequence[Any],
+    after: str | None,
+    limit: int,
+    descending: bool = False,
+) -> tuple[list[Any], str | None]:
+    """Página ordenada por ``columns`` (a última deve ser única) a partir do cursor ``after``.
+
+    Usa comparação de tuplas no índice em vez de OFFSET, então o custo não cresce com a página.
+    """
+    if after:
+        values = decode_cursor(after, len(columns))
+        key = tuple_(*columns) if len(columns) > 1 else columns[0]
+        bound = tuple(values) if len(columns) > 1 else values[0]
+        query = query.filter(key < bound if descending else key > bound)
+    order = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(*order).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor([getattr(last, column.key) for column in columns])
+
+
+def set_next_page(request: Request, response: Response, next_cursor: str | None) -> None:
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.url.include_query_params(after=next_cursor)}>; rel="next"'
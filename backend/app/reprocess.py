@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from .services.snapshots import get_snapshot_store, reprocess_snapshots
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reexecuta os extratores sobre os snapshots de HTML gravados")
+    parser.add_argument("--store", help="processa apenas snapshots desta loja")
+    parser.add_argument("--workers", type=int, help="número de processos (padrão: núcleos disponíveis)")
+    parser.add_argument("--output", help="arquivo JSON Lines de saída (padrão: stdout)")
+    args = parser.parse_args()
+
+    snapshot_store = get_snapshot_store()
+    if snapshot_store is None:
+        parser.error("Defina SNAPSHOT_DIR para usar o reprocessamento")
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    count = errors = 0
+    try:
+        for result in reprocess_snapshots(snapshot_store, workers=args.workers, store_filter=args.store):
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            count += 1
+            errors += "error" in result
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"{count} snapshots reprocessados ({errors} com erro)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
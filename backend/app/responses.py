@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from .services.cache_versions import version_tracker
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+if orjson is not None:
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+else:  # pragma: no cover - dependência opcional
+    FastJSONResponse = JSONResponse
+
+
+def version_etag(session: Session, entity: str, *parts: Any) -> str:
+    """ETag fraco derivado da versão da entidade (``cache_versions``) e dos parâmetros da listagem."""
+    version = version_tracker.versions(session).get(entity, 0)
+    digest = hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:12]
+    return f'W/"{entity}-{version}-{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(item.strip().removeprefix("W/") == opaque for item in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+
+__all__ = ["FastJSONResponse", "etag_matches", "not_modified", "set_etag", "version_etag"]
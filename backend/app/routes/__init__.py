@@ -1,3 +1,3 @@
-﻿from . import integrations, offers, rules, templates, web
+﻿from . import affiliate, images, integrations, offers, publish, rules, schedule, templates, web
 
-__all__ = ["integrations", "offers", "rules", "templates", "web"]
+__all__ = ["affiliate", "images", "integrations", "offers", "publish", "rules", "schedule", "templates", "web"]
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import Literal
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from ..dependencies import SessionDep
+from ..services.affiliate_rewrite import rewrite_links
+from ..services.bulk_import import iter_lines
+from ..services.integrations import get_integrations_snapshot
+from ..uploads import read_chunks, spool_upload
+
+router = APIRouter(prefix="/api/affiliate", tags=["affiliate"])
+
+
+@router.post("/rewrite")
+async def rewrite_affiliate_links(
+    request: Request,
+    session: SessionDep,
+    format: Literal["text", "ndjson"] | None = None,
+):
+    """Reescreve links de afiliado em lote (uma URL por linha ou JSON lines), sem buscar as páginas."""
+    upload, hint = await spool_upload(request)
+    integrations = get_integrations_snapshot(session)
+    fmt = format or ("ndjson" if "json" in hint.lower() else "text")
+    return StreamingResponse(
+        rewrite_links(iter_lines(read_chunks(upload)), integrations, fmt),
+        media_type="application/x-ndjson",
+    )
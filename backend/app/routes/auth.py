@@ -1,16 +1,19 @@
 ﻿from __future__ import annotations
 
+from pathlib import Path
+
 from fastapi import APIRouter, Depends, Form, Request, status
 from fastapi.responses import RedirectResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
 
 from ..dependencies import SessionDep, get_optional_user
 from ..services import auth
+from ..static_assets import static_url
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-templates = Jinja2Templates(directory="app/templates")
+templates = Jinja2Templates(directory=Path(__file__).resolve().parent.parent / "templates")
+templates.env.globals["static_url"] = static_url
 
 
 @router.get("/login")
@@ -30,9 +33,9 @@ async def login_form(request: Request, current_user=Depends(get_optional_user)):
 @router.post("/login")
 async def login_submit(
     request: Request,
+    session: SessionDep,
     email: str = Form(...),
     password: str = Form(...),
-    session: Session = SessionDep,
 ):
     user = auth.authenticate_user(session, email, password)
     if not user:
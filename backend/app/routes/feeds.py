@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..responses import etag_matches
+from ..services.feeds import FEED_ALL, FEED_MEDIA_TYPES, FEED_STORE, FEED_TEMPLATE, OfferFeed, offer_feeds
+from ..services.metrics import metrics
+from ..services.offer_builder import list_templates
+from ..services.stores import GENERIC_STORE, SUPPORTED_STORES
+
+router = APIRouter(prefix="/feeds", tags=["feeds"])
+
+STORE_LABELS = {**SUPPORTED_STORES, GENERIC_STORE: "Genérica"}
+
+
+def _split_name(name: str) -> tuple[str, str]:
+    key, _, fmt = name.rpartition(".")
+    if not key or fmt not in FEED_MEDIA_TYPES:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Feed não encontrado")
+    return key, fmt
+
+
+def _not_modified_since(request: Request, feed: OfferFeed) -> bool:
+    header = request.headers.get("if-modified-since")
+    if not header or feed.last_modified is None or "if-none-match" in request.headers:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    return since.tzinfo is not None and feed.last_modified <= since
+
+
+def _feed_response(request: Request, feed: OfferFeed, fmt: str) -> Response:
+    """Corpo pronto do feed; sem oferta nova desde o último ETag (ou data) do cliente, 304 sem corpo."""
+    headers = {"ETag": feed.etag(fmt), "Cache-Control": "no-cache"}
+    if feed.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(feed.last_modified, usegmt=True)
+    if etag_matches(request, headers["ETag"]) or _not_modified_since(request, feed):
+        metrics.inc("feed_requests_total", {"kind": feed.kind, "status": "304"})
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    metrics.inc("feed_requests_total", {"kind": feed.kind, "status": "200"})
+    return Response(feed.body(fmt), media_type=FEED_MEDIA_TYPES[fmt], headers=headers)
+
+
+def _feed_title(session: Session, kind: str, key: str) -> str:
+    if kind == FEED_STORE:
+        if key not in STORE_LABELS:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Loja não encontrada")
+        return f"Ofertas — {STORE_LABELS[key]}"
+    if kind == FEED_TEMPLATE:
+        names = {template.slug: template.name for template in list_templates(session)}
+        if key not in names:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Template não encontrado")
+        return f"Ofertas — {names[key]}"
+    return "Ofertas"
+
+
+def _load_feed(kind: str, key: str) -> OfferFeed:
+    """Feed sincronizado com a versão atual de ``offers``; sem oferta nova, nenhuma linha é lida."""
+    with SessionLocal() as session:
+        feed = offer_feeds.cached(kind, key)
+        title = feed.title if feed is not None else _feed_title(session, kind, key)
+        return offer_feeds.get(session, kind, key, title)
+
+
+@router.get("/offers.{fmt}")
+def offers_feed(fmt: str, request: Request):
+    _, fmt = _split_name(f"offers.{fmt}")
+    return _feed_response(request, _load_feed(FEED_ALL, ""), fmt)
+
+
+@router.get("/stores/{name}")
+def store_feed(name: str, request: Request):
+    store, fmt = _split_name(name)
+    return _feed_response(request, _load_feed(FEED_STORE, store), fmt)
+
+
+@router.get("/templates/{name}")
+def template_feed(name: str, request: Request):
+    slug, fmt = _split_name(name)
+    return _feed_response(request, _load_feed(FEED_TEMPLATE, slug), fmt)
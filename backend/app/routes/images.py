@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import re
+
+from fastapi import APIRouter, HTTPException, Request, Response, status
+
+from .. import schemas
+from ..services.images import CHANNEL_SIZES, IMAGE_SUFFIX, configured_channels, get_image_cache
+
+router = APIRouter(tags=["images"])
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+
+def _cache_or_404():
+    cache = get_image_cache()
+    if cache is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cache de imagens desativado")
+    return cache
+
+
+@router.post("/api/images", response_model=schemas.ImageVariantsResponse)
+async def prepare_images(payload: schemas.ImageVariantsRequest):
+    cache = _cache_or_404()
+    channels = payload.channels or configured_channels()
+    unknown = [channel for channel in channels if channel not in CHANNEL_SIZES]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Canais desconhecidos: {', '.join(unknown)}",
+        )
+    try:
+        images = await cache.variants(payload.url, channels)
+    except Exception as exc:  # noqa: BLE001 - falha remota vira 502 para o publicador
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Falha ao obter imagem: {exc}") from exc
+    return schemas.ImageVariantsResponse(images=images)
+
+
+@router.get("/images/{name}")
+def serve_image(name: str, request: Request):
+    digest = name.removesuffix(IMAGE_SUFFIX)
+    if not name.endswith(IMAGE_SUFFIX) or not _DIGEST_RE.match(digest):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Imagem não encontrada")
+    etag = f'"{digest}"'
+    headers = {"Cache-Control": IMMUTABLE_CACHE, "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    data = _cache_or_404().load(digest)
+    if data is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Imagem não encontrada")
+    return Response(content=data, media_type="image/jpeg", headers=headers)
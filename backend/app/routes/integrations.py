@@ -1,24 +1,37 @@
 ﻿from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 
 from .. import schemas
 from ..dependencies import SessionDep
 from ..models import IntegrationSetting
-from ..services.integrations import get_integration, get_integration_data, upsert_integration
+from ..pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, keyset_page, set_next_page
+from ..responses import etag_matches, not_modified, set_etag, version_etag
+from ..services.cache_versions import INTEGRATIONS
+from ..services.integrations import get_integration, upsert_integration
 
 router = APIRouter(prefix="/api/integrations", tags=["integrations"])
 
 
 @router.get("/", response_model=list[schemas.IntegrationRead])
-def list_integrations(session: Session = SessionDep):
-    items = session.query(IntegrationSetting).all()
+def list_integrations(
+    request: Request,
+    response: Response,
+    session: SessionDep,
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: str | None = None,
+):
+    etag = version_etag(session, INTEGRATIONS, limit, after)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    items, next_cursor = keyset_page(session.query(IntegrationSetting), (IntegrationSetting.id,), after, limit)
+    set_etag(response, etag)
+    set_next_page(request, response, next_cursor)
     return [schemas.IntegrationRead.model_validate(item) for item in items]
 
 
 @router.get("/{provider}", response_model=schemas.IntegrationRead)
-def get_integration_endpoint(provider: str, session: Session = SessionDep):
+def get_integration_endpoint(provider: str, session: SessionDep):
     integration = get_integration(session, provider)
     if not integration:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Integração não encontrada")
@@ -26,7 +39,7 @@ def get_integration_endpoint(provider: str, session: Session = SessionDep):
 
 
 @router.put("/{provider}", response_model=schemas.IntegrationRead)
-def update_integration(provider: str, payload: schemas.IntegrationUpdate, session: Session = SessionDep):
+def update_integration(provider: str, payload: schemas.IntegrationUpdate, session: SessionDep):
     data = payload.data
     label = payload.label
     integration = upsert_integration(session, provider, label, data)
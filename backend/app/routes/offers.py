@@ -1,42 +1,178 @@
 ﻿from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+from datetime import datetime
+from decimal import Decimal
+from typing import Literal
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from .. import schemas
+from ..config import settings
+from ..database import SessionLocal
 from ..dependencies import SessionDep
-from ..services.integrations import apply_affiliate
-from ..services.metadata import fetch_metadata
-from ..services.offer_builder import build_offer_text
-from ..services.stores import detect_store
+from ..pagination import MAX_PAGE_LIMIT, set_next_page
+from ..responses import FastJSONResponse
+from ..services.bulk_import import create_bulk_import, get_bulk_import, iter_lines, iter_rows, run_bulk_import
+from ..services.deadline import Deadline
+from ..services.jobs import FINISHED_STATUSES, get_job, job_queue, submit_job
+from ..services.offer_search import search_offers
+from ..services.pipeline import generate_offer
+from ..services.scheduler import to_utc
+from ..sse import format_sse
+from ..uploads import read_chunks, spool_upload
 
 router = APIRouter(prefix="/api/offers", tags=["offers"])
 
 
+def _selected_fields(mode: str, fields: str | None) -> tuple[str, ...] | None:
+    if fields:
+        selected = tuple(dict.fromkeys(item.strip() for item in fields.split(",") if item.strip()))
+        unknown = [item for item in selected if item not in schemas.OfferPreviewResponse.model_fields]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Campos desconhecidos: {', '.join(unknown)}",
+            )
+        return selected
+    if mode == "lean":
+        return schemas.LEAN_PREVIEW_FIELDS
+    return None
+
+
+def _deadline(deadline_ms: int | None) -> Deadline | None:
+    if deadline_ms is None:
+        return None
+    if deadline_ms <= 0:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="X-Deadline-Ms deve ser positivo")
+    return Deadline.after_ms(min(deadline_ms, settings.deadline_max_ms))
+
+
 @router.post("/preview", response_model=schemas.OfferPreviewResponse)
-async def preview_offer(payload: schemas.OfferPreviewRequest, session: Session = SessionDep):
-    store = payload.store or detect_store(payload.url)
-    metadata = await fetch_metadata(payload.url, store)
-    affiliate_url = apply_affiliate(payload.url, metadata["store"], session)
-    coupon = payload.coupon
-    text, context = build_offer_text(
-        session=session,
-        metadata=metadata,
-        affiliate_url=affiliate_url,
-        coupon=coupon,
-        template_slug=payload.template_slug,
-        overrides=payload.overrides,
+async def preview_offer(
+    payload: schemas.OfferPreviewRequest,
+    session: SessionDep,
+    response: Response,
+    mode: Literal["full", "lean"] = "full",
+    fields: str | None = None,
+    x_deadline_ms: int | None = Header(None),
+):
+    selected = _selected_fields(mode, fields)
+    result = await generate_offer(session, **payload.model_dump(), fields=selected, deadline=_deadline(x_deadline_ms))
+    headers = {"X-Degraded": result["degraded"]} if result["degraded"] else {}
+    if result["duplicate"]:
+        headers["X-Duplicate-Offer"] = result["duplicate"]["status"]
+    if selected is not None:
+        return FastJSONResponse({key: result[key] for key in selected}, headers=headers)
+    response.headers.update(headers)
+    return schemas.OfferPreviewResponse(**result)
+
+
+def _cents(value: Decimal | None) -> int | None:
+    return None if value is None else int(value * 100)
+
+
+@router.get("/search", response_model=list[schemas.OfferSearchResult])
+def search_offer_history(
+    request: Request,
+    response: Response,
+    session: SessionDep,
+    q: str | None = None,
+    store: str | None = None,
+    min_price: Decimal | None = Query(None, ge=0, description="Preço mínimo em reais"),
+    max_price: Decimal | None = Query(None, ge=0, description="Preço máximo em reais"),
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_LIMIT),
+    after: str | None = None,
+):
+    """Busca no histórico por palavras do título/texto; datas sem fuso são de ``DEFAULT_TIMEZONE``."""
+    offers, next_cursor = search_offers(
+        session,
+        q,
+        store=store,
+        min_price_cents=_cents(min_price),
+        max_price_cents=_cents(max_price),
+        since=to_utc(since) if since else None,
+        until=to_utc(until) if until else None,
+        after=after,
+        limit=limit,
     )
+    set_next_page(request, response, next_cursor)
+    return [schemas.OfferSearchResult.model_validate(offer) for offer in offers]
+
+
+@router.post("/jobs", response_model=schemas.OfferJobRead, status_code=status.HTTP_202_ACCEPTED)
+def submit_offer_job(payload: schemas.OfferPreviewRequest, session: SessionDep):
+    job = submit_job(session, payload.model_dump())
+    return schemas.OfferJobRead.model_validate(job)
+
+
+def _get_job_or_404(session: Session, job_id: str):
+    job = get_job(session, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job não encontrado")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=schemas.OfferJobRead)
+def get_offer_job(job_id: str, session: SessionDep):
+    return schemas.OfferJobRead.model_validate(_get_job_or_404(session, job_id))
+
+
+@router.get("/jobs/{job_id}/events")
+async def offer_job_events(job_id: str, session: SessionDep):
+    _get_job_or_404(session, job_id)
+
+    async def stream():
+        last_status = None
+        while True:
+            with SessionLocal() as stream_session:
+                job = schemas.OfferJobRead.model_validate(_get_job_or_404(stream_session, job_id))
+            if job.status != last_status:
+                last_status = job.status
+                yield format_sse("status", job.model_dump_json())
+            if job.status in FINISHED_STATUSES:
+                return
+            await job_queue.wait_finished(job_id, timeout=settings.offer_job_poll_interval)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def _bulk_format(requested: str | None, hint: str) -> str:
+    if requested:
+        return requested
+    hint = hint.lower()
+    if "json" in hint:
+        return "ndjson"
+    return "csv"
+
+
+@router.post("/bulk")
+async def bulk_import_offers(
+    request: Request,
+    session: SessionDep,
+    format: Literal["csv", "ndjson"] | None = None,
+    concurrency: int | None = None,
+):
+    upload, hint = await spool_upload(request)
+    progress = create_bulk_import(session)
+    rows = iter_rows(iter_lines(read_chunks(upload)), _bulk_format(format, hint))
+    limit = min(concurrency or settings.bulk_import_concurrency, settings.bulk_import_concurrency)
+    return StreamingResponse(
+        run_bulk_import(rows, progress, limit),
+        media_type="text/csv; charset=utf-8",
+        headers={
+            "X-Bulk-Import-Id": progress.id,
+            "Content-Disposition": f'attachment; filename="ofertas-{progress.id}.csv"',
+        },
+    )
+
 
-    return schemas.OfferPreviewResponse(
-        title=context.get("title", metadata.get("title")),
-        store=metadata.get("store"),
-        affiliate_url=affiliate_url,
-        short_url=context.get("short_url", affiliate_url),
-        price=context.get("price") or metadata.get("price"),
-        price_original=context.get("price_original") or metadata.get("price_original"),
-        benefits=context.get("benefits", []),
-        image=metadata.get("image"),
-        text=text,
-        metadata=metadata,
-    )
+@router.get("/bulk/{import_id}", response_model=schemas.BulkImportRead)
+def bulk_import_status(import_id: str, session: SessionDep):
+    record = get_bulk_import(session, import_id)
+    if record is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Importação não encontrada")
+    return schemas.BulkImportRead.model_validate(record)
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException, status
+
+from .. import schemas
+from ..services.publisher import get_dispatcher, split_channel
+
+router = APIRouter(prefix="/api/publish", tags=["publish"])
+
+
+@router.post("", response_model=schemas.PublishResponse, status_code=status.HTTP_202_ACCEPTED)
+async def publish_offer(payload: schemas.PublishRequest):
+    dispatcher = get_dispatcher()
+    for channel in payload.channels:
+        try:
+            kind, _ = split_channel(channel)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+        if kind not in dispatcher.transports:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Transporte não configurado: {kind}",
+            )
+    queued = [dispatcher.enqueue(channel, payload.text, payload.image) for channel in payload.channels]
+    return schemas.PublishResponse(
+        queued=[schemas.PublishQueued(channel=message.channel, id=message.id) for message in queued],
+        pending=dispatcher.pending(),
+    )
+
+
+@router.get("/queues", response_model=dict[str, int])
+async def publish_queues():
+    return get_dispatcher().pending()
@@ -1,11 +1,17 @@
 ﻿from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 
 from .. import schemas
 from ..dependencies import SessionDep
 from ..models import TransformationRule
+from ..pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, keyset_page, set_next_page
+from ..responses import etag_matches, not_modified, set_etag, version_etag
+from ..services.cache_versions import RULES, bump_version
+from ..services.history import iter_history_contexts
+from ..services.rule_simulator import simulate_rules
+from ..services.rules import RuleSnapshot
 
 router = APIRouter(prefix="/api/rules", tags=["rules"])
 
@@ -18,34 +24,68 @@ def _get_rule(session: Session, rule_id: int) -> TransformationRule:
 
 
 @router.get("/", response_model=list[schemas.RuleRead])
-def list_rules(session: Session = SessionDep):
-    rules = session.query(TransformationRule).order_by(TransformationRule.created_at.desc()).all()
+def list_rules(
+    request: Request,
+    response: Response,
+    session: SessionDep,
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: str | None = None,
+):
+    etag = version_etag(session, RULES, limit, after)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    # Mais recentes primeiro; o id cresce com a criação e serve de chave única do cursor.
+    rules, next_cursor = keyset_page(
+        session.query(TransformationRule), (TransformationRule.id,), after, limit, descending=True
+    )
+    set_etag(response, etag)
+    set_next_page(request, response, next_cursor)
     return [schemas.RuleRead.model_validate(rule) for rule in rules]
 
 
+@router.post("/simulate", response_model=schemas.RuleSimulationResponse)
+def simulate_rule_set(payload: schemas.RuleSimulationRequest, session: SessionDep):
+    """Dry-run: quantas ofertas cada regra candidata tocaria, com exemplos de diff. Nada é gravado."""
+    rules = [
+        RuleSnapshot(id=index, name=rule.name, conditions=rule.conditions, actions=rule.actions)
+        for index, rule in enumerate(payload.rules)
+    ]
+    if payload.contexts is not None:
+        source = "upload"
+        contexts = enumerate(payload.contexts)
+    else:
+        source = "history"
+        contexts = iter_history_contexts(session, payload.history_limit, payload.store)
+    result = simulate_rules(rules, contexts, sample_size=payload.sample_size)
+    return schemas.RuleSimulationResponse(source=source, **result)
+
+
 @router.post("/", response_model=schemas.RuleRead, status_code=status.HTTP_201_CREATED)
-def create_rule(payload: schemas.RuleBase, session: Session = SessionDep):
+def create_rule(payload: schemas.RuleBase, session: SessionDep):
     rule = TransformationRule(**payload.model_dump())
     session.add(rule)
+    bump_version(session, RULES)
     session.commit()
     session.refresh(rule)
     return schemas.RuleRead.model_validate(rule)
 
 
 @router.put("/{rule_id}", response_model=schemas.RuleRead)
-def update_rule(rule_id: int, payload: schemas.RuleUpdate, session: Session = SessionDep):
+def update_rule(rule_id: int, payload: schemas.RuleUpdate, session: SessionDep):
     rule = _get_rule(session, rule_id)
     update_data = payload.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(rule, key, value)
+    bump_version(session, RULES)
     session.commit()
     session.refresh(rule)
     return schemas.RuleRead.model_validate(rule)
 
 
 @router.delete("/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_rule(rule_id: int, session: Session = SessionDep):
+def delete_rule(rule_id: int, session: SessionDep):
     rule = _get_rule(session, rule_id)
     session.delete(rule)
+    bump_version(session, RULES)
     session.commit()
     return None
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+
+from .. import schemas
+from ..dependencies import SessionDep
+from ..models import ScheduledPost
+from ..pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, keyset_page, set_next_page
+from ..services.publisher import split_channel
+from ..services.scheduler import cancel_post, get_scheduled_post, schedule_posts, to_local
+
+router = APIRouter(prefix="/api/schedule", tags=["schedule"])
+
+
+def _read(post: ScheduledPost) -> schemas.ScheduledPostRead:
+    read = schemas.ScheduledPostRead.model_validate(post)
+    read.publish_at = to_local(post.publish_at)
+    return read
+
+
+@router.post("", response_model=list[schemas.ScheduledPostRead], status_code=status.HTTP_201_CREATED)
+def schedule_offers(payload: schemas.ScheduleRequest, session: SessionDep):
+    """Agenda ofertas para ``publish_at`` (sem fuso = ``DEFAULT_TIMEZONE``) nos canais informados."""
+    for channel in payload.channels:
+        try:
+            split_channel(channel)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    posts = schedule_posts(session, [item.model_dump() for item in payload.items], payload.publish_at, payload.channels)
+    return [_read(post) for post in posts]
+
+
+@router.get("", response_model=list[schemas.ScheduledPostRead])
+def list_scheduled(
+    request: Request,
+    response: Response,
+    session: SessionDep,
+    status_filter: str | None = Query(None, alias="status"),
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: str | None = None,
+):
+    query = session.query(ScheduledPost)
+    if status_filter:
+        query = query.filter(ScheduledPost.status == status_filter)
+    posts, next_cursor = keyset_page(query, (ScheduledPost.id,), after, limit)
+    set_next_page(request, response, next_cursor)
+    return [_read(post) for post in posts]
+
+
+@router.get("/{post_id}", response_model=schemas.ScheduledPostRead)
+def get_scheduled(post_id: int, session: SessionDep):
+    post = get_scheduled_post(session, post_id)
+    if post is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agendamento não encontrado")
+    return _read(post)
+
+
+@router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_scheduled(post_id: int, session: SessionDep):
+    if get_scheduled_post(session, post_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agendamento não encontrado")
+    if not cancel_post(session, post_id):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Agendamento já publicado ou encerrado")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,25 +1,39 @@
 ﻿from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 
 from .. import schemas
 from ..dependencies import SessionDep
 from ..models import OfferTemplate
-from ..services.offer_builder import ensure_default_template
+from ..pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, keyset_page, set_next_page
+from ..responses import etag_matches, not_modified, set_etag, version_etag
+from ..services.cache_versions import TEMPLATES, bump_version
 
 router = APIRouter(prefix="/api/templates", tags=["templates"])
 
 
 @router.get("/", response_model=list[schemas.TemplateRead])
-def list_templates(session: Session = SessionDep):
-    ensure_default_template(session)
-    templates = session.query(OfferTemplate).order_by(OfferTemplate.name.asc()).all()
+def list_templates(
+    request: Request,
+    response: Response,
+    session: SessionDep,
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: str | None = None,
+):
+    etag = version_etag(session, TEMPLATES, limit, after)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    templates, next_cursor = keyset_page(
+        session.query(OfferTemplate), (OfferTemplate.name, OfferTemplate.id), after, limit
+    )
+    set_etag(response, etag)
+    set_next_page(request, response, next_cursor)
     return [schemas.TemplateRead.model_validate(item) for item in templates]
 
 
 @router.post("/", response_model=schemas.TemplateRead, status_code=status.HTTP_201_CREATED)
-def create_template(payload: schemas.TemplateCreate, session: Session = SessionDep):
+def create_template(payload: schemas.TemplateCreate, session: SessionDep):
     existing = session.query(OfferTemplate).filter_by(slug=payload.slug).first()
     if existing:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Slug já em uso")
@@ -27,6 +41,7 @@ def create_template(payload: schemas.TemplateCreate, session: Session = SessionD
     if template.is_default:
         session.query(OfferTemplate).update({OfferTemplate.is_default: False})
     session.add(template)
+    bump_version(session, TEMPLATES)
     session.commit()
     session.refresh(template)
     return schemas.TemplateRead.model_validate(template)
@@ -40,21 +55,23 @@ def _get_template(session: Session, template_id: int) -> OfferTemplate:
 
 
 @router.put("/{template_id}", response_model=schemas.TemplateRead)
-def update_template(template_id: int, payload: schemas.TemplateUpdate, session: Session = SessionDep):
+def update_template(template_id: int, payload: schemas.TemplateUpdate, session: SessionDep):
     template = _get_template(session, template_id)
     update_data = payload.model_dump(exclude_unset=True)
     if update_data.get("is_default"):
         session.query(OfferTemplate).filter(OfferTemplate.id != template.id).update({OfferTemplate.is_default: False})
     for key, value in update_data.items():
         setattr(template, key, value)
+    bump_version(session, TEMPLATES)
     session.commit()
     session.refresh(template)
     return schemas.TemplateRead.model_validate(template)
 
 
 @router.delete("/{template_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_template(template_id: int, session: Session = SessionDep):
+def delete_template(template_id: int, session: SessionDep):
     template = _get_template(session, template_id)
     session.delete(template)
+    bump_version(session, TEMPLATES)
     session.commit()
     return None
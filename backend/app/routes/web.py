@@ -1,43 +1,82 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
+from pathlib import Path
 from typing import Any, Annotated
 
 from fastapi import APIRouter, Depends, Form, Request, status
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
+from ..database import SessionLocal
 from ..dependencies import SessionDep, require_any_role
 from ..models import IntegrationSetting, OfferTemplate, TransformationRule, User
-from ..services.integrations import ensure_default_integrations, upsert_integration
-from ..services.offer_builder import build_offer_text, ensure_default_template
-from ..services.metadata import fetch_metadata
-from ..services.stores import SUPPORTED_STORES, detect_store
+from ..services.cache_versions import RULES, TEMPLATES, VersionedCache, bump_version
+from ..services.integrations import ensure_default_integrations, get_integrations_snapshot, upsert_integration
+from ..services.offer_builder import list_templates
+from ..services.pipeline import generate_offer, stream_offer
+from ..services.stores import SUPPORTED_STORES
+from ..sse import format_sse
+from ..static_assets import static_url
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["web"])
 
-templates = Jinja2Templates(directory="app/templates")
+templates = Jinja2Templates(directory=Path(__file__).resolve().parent.parent / "templates")
+templates.env.globals["static_url"] = static_url
 
 EditorUser = Annotated[User, Depends(require_any_role("editor"))]
 AdminUser = Annotated[User, Depends(require_any_role("admin"))]
 
 
 def _render(request: Request, template_name: str, context: dict[str, Any]) -> HTMLResponse:
+    context.setdefault("request", request)
     context.setdefault("user", getattr(request.state, "user", None))
     return templates.TemplateResponse(template_name, context)
 
 
+def _render_fragment(template_name: str, context: dict[str, Any]) -> str:
+    return templates.get_template(template_name).render(context)
+
+
+def _is_htmx(request: Request) -> bool:
+    return request.headers.get("HX-Request") == "true"
+
+
+def _fragment_response(
+    template_name: str,
+    context: dict[str, Any],
+    retarget: str | None = None,
+    reswap: str | None = None,
+) -> HTMLResponse:
+    """Fragmento para o htmx; ``retarget``/``reswap`` trocam o alvo definido no formulário."""
+    headers = {}
+    if retarget:
+        headers["HX-Retarget"] = retarget
+    if reswap:
+        headers["HX-Reswap"] = reswap
+    return HTMLResponse(_render_fragment(template_name, context), headers=headers)
+
+
+def _notice(target: str, message: str | None = None, error: str | None = None) -> HTMLResponse:
+    return _fragment_response("partials/notice.html", {"message": message, "error": error}, f"#{target}", "innerHTML")
+
+
 @router.get("/", response_class=HTMLResponse)
 async def dashboard(
     request: Request,
-    session: Session = SessionDep,
+    session: SessionDep,
     current_user: EditorUser,
 ):
     request.state.user = current_user
-    template_count = session.query(OfferTemplate).count()
-    rule_count = session.query(TransformationRule).count()
-    integrations = session.query(IntegrationSetting).count()
+    # Contagens a partir dos caches versionados: sem consulta enquanto nada mudar.
+    template_count = len(list_templates(session))
+    rule_count = len(_rule_views.get(session))
+    integrations = len(get_integrations_snapshot(session))
     return _render(
         request,
         "dashboard.html",
@@ -52,7 +91,7 @@ async def dashboard(
 @router.get("/integrations", response_class=HTMLResponse)
 async def integrations_page(
     request: Request,
-    session: Session = SessionDep,
+    session: SessionDep,
     current_user: AdminUser,
 ):
     request.state.user = current_user
@@ -73,7 +112,7 @@ async def integrations_page(
 async def update_integration_form(
     provider: str,
     request: Request,
-    session: Session = SessionDep,
+    session: SessionDep,
     current_user: AdminUser,
 ):
     request.state.user = current_user
@@ -81,18 +120,19 @@ async def update_integration_form(
     label = form.get("label") or provider.title()
     data: dict[str, Any] = {k: v for k, v in form.items() if k not in {"label", "csrf_token"}}
     upsert_integration(session, provider, label, data)
-    return RedirectResponse(url="/integrations?message=IntegraÃ§Ã£o atualizada", status_code=status.HTTP_303_SEE_OTHER)
+    if _is_htmx(request):
+        return _notice("integration-messages", message=f"Integração {label} atualizada")
+    return RedirectResponse(url="/integrations?message=Integração atualizada", status_code=status.HTTP_303_SEE_OTHER)
 
 
 @router.get("/templates", response_class=HTMLResponse)
 async def templates_page(
     request: Request,
-    session: Session = SessionDep,
+    session: SessionDep,
     current_user: AdminUser,
 ):
     request.state.user = current_user
-    ensure_default_template(session)
-    items = session.query(OfferTemplate).order_by(OfferTemplate.created_at.desc()).all()
+    items = sorted(list_templates(session), key=lambda template: template.id, reverse=True)
     return _render(
         request,
         "templates.html",
@@ -106,20 +146,27 @@ async def templates_page(
 @router.post("/templates")
 async def create_template_form(
     request: Request,
+    session: SessionDep,
+    current_user: AdminUser,
     name: str = Form(...),
     slug: str = Form(...),
     body: str = Form(...),
     description: str = Form(""),
     is_default: bool = Form(False),
-    session: Session = SessionDep,
-    current_user: AdminUser,
 ):
     request.state.user = current_user
     template = OfferTemplate(name=name, slug=slug, body=body, description=description, is_default=is_default)
     if template.is_default:
         session.query(OfferTemplate).update({OfferTemplate.is_default: False})
     session.add(template)
+    bump_version(session, TEMPLATES)
     session.commit()
+    if _is_htmx(request):
+        if template.is_default:
+            # O selo "Padrão" saiu de outro card: a lista inteira é redesenhada.
+            items = sorted(list_templates(session), key=lambda item: item.id, reverse=True)
+            return _fragment_response("partials/template_list.html", {"templates": items}, reswap="innerHTML")
+        return _fragment_response("partials/template_card.html", {"template": template})
     return RedirectResponse(url="/templates?message=Template criado", status_code=status.HTTP_303_SEE_OTHER)
 
 
@@ -127,31 +174,32 @@ async def create_template_form(
 async def delete_template_form(
     template_id: int,
     request: Request,
-    session: Session = SessionDep,
+    session: SessionDep,
     current_user: AdminUser,
 ):
     request.state.user = current_user
     template = session.query(OfferTemplate).filter_by(id=template_id).first()
     if template:
         session.delete(template)
+        bump_version(session, TEMPLATES)
         session.commit()
+    if _is_htmx(request):
+        return HTMLResponse("")
     return RedirectResponse(url="/templates?message=Template removido", status_code=status.HTTP_303_SEE_OTHER)
 
 
 @router.get("/offers", response_class=HTMLResponse)
 async def offers_page(
     request: Request,
-    session: Session = SessionDep,
+    session: SessionDep,
     current_user: EditorUser,
 ):
     request.state.user = current_user
-    ensure_default_template(session)
-    templates_list = session.query(OfferTemplate).order_by(OfferTemplate.name).all()
     return _render(
         request,
         "offers.html",
         {
-            "templates": templates_list,
+            "templates": list_templates(session),
             "preview": None,
             "message": request.query_params.get("message"),
         },
@@ -161,55 +209,93 @@ async def offers_page(
 @router.post("/offers", response_class=HTMLResponse)
 async def offers_preview(
     request: Request,
-    session: Session = SessionDep,
+    session: SessionDep,
     current_user: EditorUser,
 ):
     request.state.user = current_user
     form = await request.form()
     url = form.get("url")
     if not url:
+        if _is_htmx(request):
+            return HTMLResponse(_render_fragment("partials/preview_error.html", {"error": "Informe a URL"}))
         return RedirectResponse(url="/offers?message=Informe%20a%20URL", status_code=status.HTTP_303_SEE_OTHER)
-    coupon = form.get("coupon") or None
-    template_slug = form.get("template_slug") or None
+    preview = await generate_offer(
+        session,
+        url,
+        store=form.get("store") or None,
+        coupon=form.get("coupon") or None,
+        template_slug=form.get("template_slug") or None,
+        overrides=_form_overrides(form),
+    )
+    if _is_htmx(request):
+        return HTMLResponse(_render_fragment("partials/preview_card.html", {"preview": preview}))
+    return _render(request, "offers.html", {"templates": list_templates(session), "preview": preview})
+
 
-    store = form.get("store") or detect_store(url)
-    metadata = await fetch_metadata(url, store)
-    affiliate_url = upsert_affiliate_if_needed(url, metadata["store"], session)
+def _form_overrides(params: Any) -> dict[str, Any]:
     overrides: dict[str, Any] = {}
-    headline = form.get("headline_override")
+    headline = params.get("headline_override")
     if headline:
         overrides["headline"] = headline
-    emoji = form.get("emoji_override")
+    emoji = params.get("emoji_override")
     if emoji:
         overrides["emoji"] = emoji
+    return overrides
 
-    text, context = build_offer_text(
-        session=session,
-        metadata=metadata,
-        affiliate_url=affiliate_url,
-        coupon=coupon,
-        template_slug=template_slug,
-        overrides=overrides,
-    )
-    templates_list = session.query(OfferTemplate).order_by(OfferTemplate.name).all()
-    return _render(
-        request,
-        "offers.html",
-        {
-            "templates": templates_list,
-            "preview": {
-                "text": text,
-                "context": context,
-                "affiliate_url": affiliate_url,
-            },
-        },
-    )
+
+@router.get("/offers/preview-panel", response_class=HTMLResponse)
+async def offers_preview_panel(request: Request, current_user: EditorUser):
+    if not request.query_params.get("url"):
+        return HTMLResponse(_render_fragment("partials/preview_error.html", {"error": "Informe a URL"}))
+    stream_url = f"/offers/stream?{request.url.query}"
+    return HTMLResponse(_render_fragment("partials/preview_stream.html", {"stream_url": stream_url}))
+
+
+@router.get("/offers/stream")
+async def offers_preview_stream(request: Request, current_user: EditorUser):
+    params = request.query_params
+    url = params.get("url")
+    fragments = {
+        "head": "partials/preview_head.html",
+        "prices": "partials/preview_prices.html",
+        "text": "partials/preview_text.html",
+    }
+
+    async def stream():
+        if not url:
+            yield format_sse("error", _render_fragment("partials/preview_error.html", {"error": "Informe a URL"}))
+            yield format_sse("done", "")
+            return
+        disconnected = False
+        try:
+            with SessionLocal() as session:
+                async for stage, data in stream_offer(
+                    session,
+                    url,
+                    store=params.get("store") or None,
+                    coupon=params.get("coupon") or None,
+                    template_slug=params.get("template_slug") or None,
+                    overrides=_form_overrides(params),
+                ):
+                    yield format_sse(stage, _render_fragment(fragments[stage], data))
+        except (asyncio.CancelledError, GeneratorExit):
+            disconnected = True
+            raise
+        except Exception as exc:  # noqa: BLE001 - sem "done" o htmx reconectaria em loop
+            logger.exception("Falha ao gerar prévia em streaming de %s", url)
+            error = f"Não foi possível gerar a prévia: {exc}"
+            yield format_sse("error", _render_fragment("partials/preview_error.html", {"error": error}))
+        finally:
+            if not disconnected:
+                yield format_sse("done", "")
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 
 @router.get("/rules", response_class=HTMLResponse)
 async def rules_page(
     request: Request,
-    session: Session = SessionDep,
+    session: SessionDep,
     current_user: EditorUser,
 ):
     request.state.user = current_user
@@ -219,18 +305,20 @@ async def rules_page(
 @router.post("/rules")
 async def create_rule(
     request: Request,
+    session: SessionDep,
+    current_user: AdminUser,
     name: str = Form(...),
     description: str = Form(""),
     conditions_json: str = Form("{}"),
     actions_json: str = Form("{}"),
-    session: Session = SessionDep,
-    current_user: AdminUser,
 ):
     request.state.user = current_user
     conditions, error = _parse_json_field(conditions_json, default={})
     actions, error_actions = _parse_json_field(actions_json, default={})
     error = error or error_actions
     if error:
+        if _is_htmx(request):
+            return _notice("rule-messages", error=error)
         return _render_rules(
             request,
             session,
@@ -246,7 +334,10 @@ async def create_rule(
 
     rule = TransformationRule(name=name, description=description, conditions=conditions, actions=actions)
     session.add(rule)
+    bump_version(session, RULES)
     session.commit()
+    if _is_htmx(request):
+        return _rule_fragment(rule, current_user, created=True)
     return RedirectResponse(url="/rules?message=Regra criada", status_code=status.HTTP_303_SEE_OTHER)
 
 
@@ -254,22 +345,26 @@ async def create_rule(
 async def update_rule(
     rule_id: int,
     request: Request,
+    session: SessionDep,
+    current_user: AdminUser,
     name: str = Form(...),
     description: str = Form(""),
     conditions_json: str = Form("{}"),
     actions_json: str = Form("{}"),
-    session: Session = SessionDep,
-    current_user: AdminUser,
 ):
     request.state.user = current_user
     rule = session.query(TransformationRule).filter_by(id=rule_id).first()
     if not rule:
-        return RedirectResponse(url="/rules?error=Regra%20nÃ£o%20encontrada", status_code=status.HTTP_303_SEE_OTHER)
+        if _is_htmx(request):
+            return _notice("rule-messages", error="Regra não encontrada")
+        return RedirectResponse(url="/rules?error=Regra%20não%20encontrada", status_code=status.HTTP_303_SEE_OTHER)
 
     conditions, error = _parse_json_field(conditions_json, default=rule.conditions or {})
     actions, error_actions = _parse_json_field(actions_json, default=rule.actions or {})
     error = error or error_actions
     if error:
+        if _is_htmx(request):
+            return _notice("rule-messages", error=f"{rule.name}: {error}")
         return _render_rules(
             request,
             session,
@@ -288,8 +383,11 @@ async def update_rule(
     rule.description = description
     rule.conditions = conditions
     rule.actions = actions
+    bump_version(session, RULES)
     session.commit()
     session.refresh(rule)
+    if _is_htmx(request):
+        return _rule_fragment(rule, current_user)
     return RedirectResponse(url="/rules?message=Regra atualizada", status_code=status.HTTP_303_SEE_OTHER)
 
 
@@ -297,14 +395,17 @@ async def update_rule(
 async def delete_rule(
     rule_id: int,
     request: Request,
-    session: Session = SessionDep,
+    session: SessionDep,
     current_user: AdminUser,
 ):
     request.state.user = current_user
     rule = session.query(TransformationRule).filter_by(id=rule_id).first()
     if rule:
         session.delete(rule)
+        bump_version(session, RULES)
         session.commit()
+    if _is_htmx(request):
+        return HTMLResponse("")
     return RedirectResponse(url="/rules?message=Regra removida", status_code=status.HTTP_303_SEE_OTHER)
 
 
@@ -317,21 +418,33 @@ def _parse_json_field(raw: str, default: dict[str, Any]) -> tuple[dict[str, Any]
     except json.JSONDecodeError as exc:
         return default, f"Erro ao interpretar JSON: {exc.msg}"
     if not isinstance(value, dict):
-        return default, "O conteÃºdo deve ser um objeto JSON"
+        return default, "O conteúdo deve ser um objeto JSON"
     return value, None
 
 
-def _serialize_rules(rules: list[TransformationRule]) -> list[dict[str, Any]]:
-    serialized: list[dict[str, Any]] = []
-    for rule in rules:
-        serialized.append(
-            {
-                "entity": rule,
-                "conditions_json": json.dumps(rule.conditions or {}, indent=2, ensure_ascii=False),
-                "actions_json": json.dumps(rule.actions or {}, indent=2, ensure_ascii=False),
-            }
-        )
-    return serialized
+def _rule_view(rule: TransformationRule) -> dict[str, Any]:
+    return {
+        "entity": {"id": rule.id, "name": rule.name, "description": rule.description},
+        "conditions_json": json.dumps(rule.conditions or {}, indent=2, ensure_ascii=False),
+        "actions_json": json.dumps(rule.actions or {}, indent=2, ensure_ascii=False),
+    }
+
+
+def _load_rule_views(session: Session) -> tuple[dict[str, Any], ...]:
+    rules = session.query(TransformationRule).order_by(TransformationRule.created_at.desc()).all()
+    return tuple(_rule_view(rule) for rule in rules)
+
+
+# Cards da página de regras já serializados; recarregados só quando a versão de RULES muda.
+_rule_views: VersionedCache[tuple[dict[str, Any], ...]] = VersionedCache(RULES, _load_rule_views)
+
+
+def _rule_fragment(rule: TransformationRule, current_user: User, created: bool = False) -> HTMLResponse:
+    can_manage = (current_user.role or "").lower() == "admin"
+    html = _render_fragment("partials/rule_card.html", {"item": _rule_view(rule), "can_manage": can_manage})
+    if created:
+        html += '<p id="rule-empty" hx-swap-oob="delete"></p>'  # some o aviso de lista vazia
+    return HTMLResponse(html)
 
 
 def _render_rules(
@@ -344,12 +457,11 @@ def _render_rules(
     edit_rule: TransformationRule | None = None,
     form_data: dict[str, Any] | None = None,
 ) -> HTMLResponse:
-    rules = session.query(TransformationRule).order_by(TransformationRule.created_at.desc()).all()
     allow_manage = (current_user.role or "").lower() == "admin"
     context = {
         "request": request,
         "user": current_user,
-        "rules": _serialize_rules(rules),
+        "rules": _rule_views.get(session),
         "message": message,
         "error": error,
         "can_manage": allow_manage,
@@ -357,9 +469,3 @@ def _render_rules(
         "edit_rule_id": edit_rule.id if edit_rule else None,
     }
     return templates.TemplateResponse("rules.html", context)
-
-
-def upsert_affiliate_if_needed(url: str, store: str, session: Session) -> str:
-    from ..services.integrations import apply_affiliate
-
-    return apply_affiliate(url, store, session)
@@ -1,5 +1,6 @@
 ﻿from __future__ import annotations
 
+from datetime import datetime
 from typing import Any, Optional
 
 from pydantic import BaseModel, Field
@@ -72,6 +73,29 @@ class RuleRead(RuleBase):
         from_attributes = True
 
 
+class RuleSimulationRequest(BaseModel):
+    rules: list[RuleBase]
+    contexts: Optional[list[dict[str, Any]]] = None
+    history_limit: int = Field(100_000, ge=1, le=1_000_000)
+    store: Optional[str] = None
+    sample_size: int = Field(5, ge=0, le=50)
+
+
+class RuleSimulationResult(BaseModel):
+    name: str
+    matched: int
+    match_rate: float
+    samples: list[dict[str, Any]] = Field(default_factory=list)
+
+
+class RuleSimulationResponse(BaseModel):
+    source: str
+    contexts: int
+    touched: int
+    elapsed_ms: float
+    rules: list[RuleSimulationResult]
+
+
 class OfferPreviewRequest(BaseModel):
     url: str
     store: Optional[str] = None
@@ -80,6 +104,13 @@ class OfferPreviewRequest(BaseModel):
     overrides: dict[str, Any] = Field(default_factory=dict)
 
 
+class DuplicateOffer(BaseModel):
+    status: str  # "posted" (publicada) ou "generated" (só gerada)
+    generated_count: int
+    posted_count: int
+    last_seen_at: datetime
+
+
 class OfferPreviewResponse(BaseModel):
     title: str
     store: str
@@ -89,5 +120,105 @@ class OfferPreviewResponse(BaseModel):
     price_original: Optional[str]
     benefits: list[str] = Field(default_factory=list)
     image: Optional[str]
+    images: dict[str, str] = Field(default_factory=dict)
     text: str
-    metadata: dict[str, Any] = Field(default_factory=dict)
+    metadata: dict[str, Any] = Field(default_factory=dict)
+    # Preenchidos quando o prazo (``X-Deadline-Ms``) estourou: "partial", "cache" ou "minimal".
+    degraded: Optional[str] = None
+    missing_fields: list[str] = Field(default_factory=list)
+    # Mesmo produto, preço e cupom já gerado/publicado na janela ``DEDUPE_WINDOW_HOURS``.
+    duplicate: Optional[DuplicateOffer] = None
+
+
+LEAN_PREVIEW_FIELDS = ("text", "short_url")
+
+
+class ImageVariantsRequest(BaseModel):
+    url: str
+    channels: list[str] = Field(default_factory=list)
+
+
+class ImageVariantsResponse(BaseModel):
+    images: dict[str, str]
+
+
+class BulkImportRead(BaseModel):
+    id: str
+    status: str
+    rows_read: int = 0
+    rows_done: int = 0
+    rows_failed: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class OfferJobRead(BaseModel):
+    id: str
+    status: str
+    attempts: int = 0
+    error: Optional[str] = None
+    result: Optional[OfferPreviewResponse] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class OfferSearchResult(BaseModel):
+    id: int
+    url: str
+    product_key: Optional[str] = None
+    store: str
+    template_slug: Optional[str] = None
+    coupon: Optional[str] = None
+    title: Optional[str] = None
+    price: Optional[str] = None
+    price_cents: Optional[int] = None
+    text: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class PublishRequest(BaseModel):
+    channels: list[str] = Field(..., min_length=1)
+    text: str
+    image: Optional[str] = None
+
+
+class PublishQueued(BaseModel):
+    channel: str
+    id: str
+
+
+class PublishResponse(BaseModel):
+    queued: list[PublishQueued]
+    pending: dict[str, int]
+
+
+class ScheduleRequest(BaseModel):
+    items: list[OfferPreviewRequest] = Field(..., min_length=1, max_length=10_000)
+    publish_at: datetime
+    channels: list[str] = Field(default_factory=list)
+
+
+class ScheduledPostRead(BaseModel):
+    id: int
+    status: str
+    publish_at: datetime
+    payload: dict[str, Any]
+    channels: list[str]
+    error: Optional[str] = None
+    prefetched_at: Optional[datetime] = None
+    published_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -1,13 +1,19 @@
-﻿from . import auth, headlines, integrations, metadata, offer_builder, rules, shortener, stores, users
+﻿from . import auth, cache_versions, headlines, http_client, integrations, jobs, metadata, metrics, offer_builder, pipeline, rules, shortener, stores, structured_data, users
 
 __all__ = [
     "auth",
+    "cache_versions",
     "headlines",
+    "http_client",
     "integrations",
+    "jobs",
     "metadata",
+    "metrics",
     "offer_builder",
+    "pipeline",
     "rules",
     "shortener",
     "stores",
+    "structured_data",
     "users",
 ]
@@ -0,0 +1 @@
+"""Adaptadores por loja, carregados sob demanda por ``stores.get_adapter``."""
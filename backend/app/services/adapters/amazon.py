@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from bs4 import BeautifulSoup
+
+from ...config import settings
+from ..metadata import normalize_price
+from ..stores import StoreAdapter
+
+SALE_SELECTORS = [
+    "#priceblock_ourprice",
+    "#priceblock_dealprice",
+    "span.apexPriceToPay span.a-offscreen",
+    "span.a-price[data-a-size=\"l\"] span.a-offscreen",
+    "span.a-price[data-a-size=\"xl\"] span.a-offscreen",
+]
+
+STRIKE_SELECTORS = [
+    "#priceblock_strikeprice",
+    "span.a-price.a-text-price span.a-offscreen",
+    "span[data-a-color=\"secondary\"] span.a-offscreen",
+]
+
+
+def _first_price(soup: BeautifulSoup, selectors: list[str]) -> str | None:
+    for selector in selectors:
+        el = soup.select_one(selector)
+        if el and el.text.strip():
+            return normalize_price(el.text)
+    return None
+
+
+def extract_prices(soup: BeautifulSoup) -> tuple[str | None, str | None]:
+    return _first_price(soup, SALE_SELECTORS), _first_price(soup, STRIKE_SELECTORS)
+
+
+def apply_affiliate(url: str, data: dict[str, Any]) -> str:
+    tag = data.get("tag") or settings.default_amazon_tag
+    if not tag:
+        return url
+    parsed = urlparse(url)
+    query = dict(parse_qsl(parsed.query, keep_blank_values=True))
+    query["tag"] = tag
+    filtered = {k: v for k, v in query.items() if v is not None}
+    return urlunparse(parsed._replace(query=urlencode(filtered)))
+
+
+ADAPTER = StoreAdapter(name="amazon", extract_prices=extract_prices, apply_affiliate=apply_affiliate)
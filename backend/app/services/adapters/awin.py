@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from typing import Any
+from urllib.parse import quote
+
+from ..stores import StoreAdapter
+from .generic import extract_prices
+
+
+def apply_affiliate(url: str, data: dict[str, Any]) -> str:
+    prefix = data.get("deeplink_prefix")
+    if not prefix:
+        return url
+    return f"{prefix}{quote(url, safe='')}"
+
+
+ADAPTER = StoreAdapter(name="awin", extract_prices=extract_prices, apply_affiliate=apply_affiliate, scans_full_text=True)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from typing import Any
+
+from bs4 import BeautifulSoup
+
+from ..metadata import find_price_candidates, normalize_price
+from ..stores import StoreAdapter
+
+
+def extract_prices(soup: BeautifulSoup, text: str | None = None) -> tuple[str | None, str | None]:
+    """``text`` é o texto da página já extraído por quem chama, para não percorrer o documento de novo."""
+    if text is None:
+        text = soup.get_text(" ", strip=True)
+    candidates = find_price_candidates(text)
+    if candidates:
+        return normalize_price(candidates[0]), normalize_price(candidates[1]) if len(candidates) > 1 else None
+    return None, None
+
+
+def apply_affiliate(url: str, data: dict[str, Any]) -> str:
+    return url
+
+
+ADAPTER = StoreAdapter(name="generic", extract_prices=extract_prices, apply_affiliate=apply_affiliate, scans_full_text=True)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import re
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from bs4 import BeautifulSoup
+
+from ..mercadolivre_api import fetch_item_metadata
+from ..metadata import normalize_price
+from ..stores import StoreAdapter
+
+STRIKE_CLASS_RE = re.compile("price-tag-strike")
+
+
+def extract_prices(soup: BeautifulSoup) -> tuple[str | None, str | None]:
+    price_el = soup.select_one("meta[name='twitter:data1']")
+    price = normalize_price(price_el.get("content")) if price_el else None
+    installment = soup.select_one("meta[name='twitter:data2']")
+    if installment and installment.get("content"):
+        price = normalize_price(installment.get("content")) or price
+    strike_el = soup.find("span", attrs={"class": STRIKE_CLASS_RE})
+    strike = normalize_price(strike_el.text) if strike_el else None
+    return price, strike
+
+
+def apply_affiliate(url: str, data: dict[str, Any]) -> str:
+    campaign = data.get("campaign_id")
+    if not campaign:
+        return url
+    parsed = urlparse(url)
+    query = dict(parse_qsl(parsed.query, keep_blank_values=True))
+    query["mldcid"] = campaign
+    return urlunparse(parsed._replace(query=urlencode(query)))
+
+
+ADAPTER = StoreAdapter(
+    name="mercadolivre",
+    extract_prices=extract_prices,
+    apply_affiliate=apply_affiliate,
+    fetch_api=fetch_item_metadata,
+)
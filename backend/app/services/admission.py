@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from ..config import settings
+from .metrics import metrics
+
+
+class ByteBudget:
+    """Semáforo ponderado por bytes: cada leitura reserva o pico estimado de memória e espera na fila
+    (FIFO) enquanto a soma passar de ``capacity``. Uma página maior que o orçamento inteiro ainda
+    entra, mas sozinha."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = max(1, capacity)
+        self.in_use = 0
+        self._waiters: deque[tuple[int, asyncio.Future]] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def weight(self, nbytes: int) -> int:
+        return min(max(1, nbytes), self.capacity)
+
+    async def acquire(self, nbytes: int) -> int:
+        """Reserva ``nbytes`` (limitado a ``capacity``); devolve o peso a passar para ``release``."""
+        weight = self.weight(nbytes)
+        if not self._waiters and self.in_use + weight <= self.capacity:
+            self.in_use += weight
+            return weight
+        entry = (weight, asyncio.get_running_loop().create_future())
+        self._waiters.append(entry)
+        try:
+            await entry[1]
+        except asyncio.CancelledError:
+            if entry[1].done() and not entry[1].cancelled():
+                self.release(weight)  # liberado junto com o cancelamento: devolve a reserva
+            else:
+                self._waiters.remove(entry)
+                self._wake()
+            raise
+        return weight
+
+    @asynccontextmanager
+    async def reserve(self, nbytes: int) -> AsyncIterator[int]:
+        weight = await self.acquire(nbytes)
+        try:
+            yield weight
+        finally:
+            self.release(weight)
+
+    def release(self, weight: int) -> None:
+        self.in_use -= weight
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_use + self._waiters[0][0] <= self.capacity:
+            weight, future = self._waiters.popleft()
+            if future.done():
+                continue
+            self.in_use += weight
+            future.set_result(None)
+
+
+def estimated_parse_bytes(html: str) -> int:
+    """Pico aproximado de uma leitura: HTML, texto extraído e árvore do BeautifulSoup juntos."""
+    return int(len(html) * settings.parse_memory_factor)
+
+
+_budgets: dict[asyncio.AbstractEventLoop, ByteBudget] = {}
+
+
+def get_parse_budget() -> ByteBudget:
+    """Orçamento de ``PARSE_MEMORY_BUDGET_MB`` do event loop atual."""
+    loop = asyncio.get_running_loop()
+    budget = _budgets.get(loop)
+    if budget is None:
+        for other in [other for other in _budgets if other.is_closed()]:
+            del _budgets[other]
+        budget = _budgets[loop] = ByteBudget(settings.parse_memory_budget_mb * 1024 * 1024)
+    return budget
+
+
+async def admit_parse(html: str, store: str) -> int:
+    """Espera a vez de ler ``html`` no orçamento de memória; devolve o peso para ``release_parse``."""
+    budget = get_parse_budget()
+    needed = estimated_parse_bytes(html)
+    started = time.monotonic()
+    weight = await budget.acquire(needed)
+    metrics.observe("parse_queue_wait_ms", (time.monotonic() - started) * 1000, {"store": store})
+    metrics.observe("parse_memory_bytes", needed, {"store": store})
+    metrics.set_gauge("parse_memory_in_use_bytes", budget.in_use)
+    metrics.set_gauge("parse_queue_depth", budget.waiting)
+    return weight
+
+
+def release_parse(weight: int) -> None:
+    budget = get_parse_budget()
+    budget.release(weight)
+    metrics.set_gauge("parse_memory_in_use_bytes", budget.in_use)
+
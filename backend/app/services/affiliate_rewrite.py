@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+from collections import Counter
+from typing import Any, AsyncIterator
+from urllib.parse import urlparse
+
+from .metrics import metrics
+from .stores import detect_store, get_adapter
+
+# Junta as linhas de saída em blocos: um envio por URL custaria mais que a própria reescrita.
+FLUSH_BYTES = 64 * 1024
+
+
+def _parse_line(line: str, fmt: str) -> tuple[str, str | None]:
+    """Devolve ``(url, loja)`` de uma linha de texto ou JSON lines (objeto com ``url`` ou string)."""
+    if fmt != "ndjson":
+        return line.strip(), None
+    item = json.loads(line)
+    if isinstance(item, dict):
+        return str(item.get("url") or "").strip(), item.get("store") or None
+    return str(item).strip(), None
+
+
+def rewrite_link(url: str, store: str | None, integrations: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("URL inválida")
+    store = store or detect_store(url)
+    affiliate_url = get_adapter(store).apply_affiliate(url, integrations.get(store, {}))
+    return {"url": url, "store": store, "affiliate_url": affiliate_url}
+
+
+async def rewrite_links(
+    lines: AsyncIterator[str],
+    integrations: dict[str, dict[str, Any]],
+    fmt: str = "text",
+) -> AsyncIterator[str]:
+    """Reescreve cada URL com as credenciais de ``integrations`` e emite JSON lines na ordem de entrada.
+
+    Nada é acumulado além do bloco de saída atual, então a memória não cresce com o número de linhas.
+    """
+    totals: Counter = Counter()
+    buffer: list[str] = []
+    size = 0
+    index = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        index += 1
+        try:
+            url, store = _parse_line(line, fmt)
+            result = {"row": index, **rewrite_link(url, store, integrations)}
+            totals[result["store"]] += 1
+        except Exception as exc:  # noqa: BLE001 - o erro vai na linha correspondente
+            message = exc.msg if isinstance(exc, json.JSONDecodeError) else str(exc) or type(exc).__name__
+            result = {"row": index, "url": line.strip(), "error": message}
+            totals["error"] += 1
+        encoded = json.dumps(result, ensure_ascii=False) + "\n"
+        buffer.append(encoded)
+        size += len(encoded)
+        if size >= FLUSH_BYTES:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+    for store, count in totals.items():
+        metrics.inc("affiliate_rewrite_total", {"store": store}, count)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import BulkImport
+from .metrics import metrics
+from .pipeline import generate_offer
+
+IMPORT_RUNNING = "running"
+IMPORT_DONE = "done"
+IMPORT_FAILED = "failed"
+
+OUTPUT_COLUMNS = ("row", "url", "status", "title", "price", "short_url", "text", "error")
+
+
+@dataclass
+class BulkProgress:
+    """Contadores da importação em andamento, gravados na tabela ``bulk_imports`` a cada intervalo."""
+
+    id: str
+    flush_interval: float = 1.0
+    rows_read: int = 0
+    rows_done: int = 0
+    rows_failed: int = 0
+    error: str | None = None
+    _flushed_at: float = field(default_factory=time.monotonic)
+
+    def maybe_flush(self) -> None:
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self, finished: bool = False) -> None:
+        self._flushed_at = time.monotonic()
+        values: dict[str, Any] = {
+            BulkImport.rows_read: self.rows_read,
+            BulkImport.rows_done: self.rows_done,
+            BulkImport.rows_failed: self.rows_failed,
+            BulkImport.error: self.error,
+            BulkImport.updated_at: datetime.utcnow(),
+        }
+        if finished:
+            values[BulkImport.status] = IMPORT_FAILED if self.error else IMPORT_DONE
+            values[BulkImport.finished_at] = datetime.utcnow()
+        with SessionLocal() as session:
+            session.query(BulkImport).filter(BulkImport.id == self.id).update(values, synchronize_session=False)
+            session.commit()
+
+
+def create_bulk_import(session: Session) -> BulkProgress:
+    record = BulkImport(id=uuid.uuid4().hex, status=IMPORT_RUNNING)
+    session.add(record)
+    session.commit()
+    return BulkProgress(id=record.id, flush_interval=settings.bulk_import_progress_interval)
+
+
+def get_bulk_import(session: Session, import_id: str) -> BulkImport | None:
+    return session.query(BulkImport).filter_by(id=import_id).first()
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Quebra o corpo em linhas conforme os pedaços chegam, sem juntar o arquivo inteiro."""
+    buffer = b""
+    first = True
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig" if first else "utf-8").rstrip("\r")
+            first = False
+    if buffer:
+        yield buffer.decode("utf-8-sig" if first else "utf-8").rstrip("\r")
+
+
+async def iter_rows(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[dict[str, Any]]:
+    """Linhas de CSV (com cabeçalho) ou JSON lines viram dicionários; linhas inválidas viram ``{"error": ...}``."""
+    if fmt == "ndjson":
+        async for line in lines:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield {"error": f"JSON inválido: {exc.msg}"}
+                continue
+            yield row if isinstance(row, dict) else {"url": str(row)}
+        return
+
+    header: list[str] | None = None
+    pending = ""
+    async for line in lines:
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue  # campo entre aspas com quebra de linha: espera a próxima
+        record = next(csv.reader([pending]), [])
+        pending = ""
+        if not any(value.strip() for value in record):
+            continue
+        if header is None:
+            header = [value.strip().lower() for value in record]
+            continue
+        yield dict(zip(header, record))
+
+
+def _row_payload(row: dict[str, Any]) -> dict[str, Any]:
+    url = str(row.get("url") or "").strip()
+    if not url:
+        raise ValueError(row.get("error") or "Linha sem URL")
+    return {
+        "url": url,
+        "store": row.get("store") or None,
+        "coupon": row.get("coupon") or None,
+        "template_slug": row.get("template") or row.get("template_slug") or None,
+    }
+
+
+async def _process_row(index: int, row: dict[str, Any], progress: BulkProgress) -> dict[str, Any]:
+    output: dict[str, Any] = {"row": index, "url": row.get("url") or ""}
+    try:
+        payload = _row_payload(row)
+        with SessionLocal() as session:
+            result = await generate_offer(session, **payload)
+    except Exception as exc:  # noqa: BLE001 - o erro vai para a coluna da linha
+        progress.rows_failed += 1
+        metrics.inc("bulk_import_rows_total", {"status": "error"})
+        return {**output, "status": "error", "error": str(exc) or type(exc).__name__}
+    progress.rows_done += 1
+    metrics.inc("bulk_import_rows_total", {"status": "ok"})
+    return {**output, "status": "ok", **{key: result.get(key) for key in ("title", "price", "short_url", "text")}}
+
+
+def _csv_line(values: dict[str, Any]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow([values.get(column) if values.get(column) is not None else "" for column in OUTPUT_COLUMNS])
+    return buffer.getvalue()
+
+
+async def run_bulk_import(
+    rows: AsyncIterator[dict[str, Any]],
+    progress: BulkProgress,
+    concurrency: int,
+) -> AsyncIterator[str]:
+    """Processa as linhas com no máximo ``concurrency`` ofertas em paralelo e emite o CSV na ordem de conclusão.
+
+    As filas são limitadas, então a leitura do upload só avança quando há worker livre:
+    a memória fica constante qualquer que seja o tamanho do arquivo.
+    """
+    concurrency = max(1, concurrency)
+    inbox: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    outbox: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def produce() -> None:
+        index = 0
+        try:
+            async for row in rows:
+                index += 1
+                progress.rows_read += 1
+                await inbox.put((index, row))
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # noqa: BLE001 - upload corrompido ou conexão caída no meio
+            progress.error = str(exc) or type(exc).__name__
+        for _ in range(concurrency):
+            await inbox.put(None)
+
+    async def work() -> None:
+        while (item := await inbox.get()) is not None:
+            await outbox.put(await _process_row(*item, progress))
+        await outbox.put(None)
+
+    producer = asyncio.create_task(produce())
+    workers = [asyncio.create_task(work()) for _ in range(concurrency)]
+    remaining = concurrency
+    try:
+        yield _csv_line({column: column for column in OUTPUT_COLUMNS})
+        while remaining:
+            item = await outbox.get()
+            if item is None:
+                remaining -= 1
+                continue
+            progress.maybe_flush()
+            yield _csv_line(item)
+        if progress.error:
+            yield _csv_line({"status": "error", "error": f"Leitura interrompida: {progress.error}"})
+    finally:
+        for task in [producer, *workers]:
+            task.cancel()
+        await asyncio.gather(producer, *workers, return_exceptions=True)
+        if progress.error is None and remaining:
+            progress.error = "Importação interrompida antes do fim"
+        progress.flush(finished=True)
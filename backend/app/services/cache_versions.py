@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import logging
+import select
+import threading
+import time
+from typing import Any, Callable, Generic, TypeVar
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import CacheVersion
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES = "templates"
+RULES = "rules"
+INTEGRATIONS = "integrations"
+OFFERS = "offers"  # histórico de ofertas: sincroniza os feeds entre processos
+ENTITIES = (TEMPLATES, RULES, INTEGRATIONS, OFFERS)
+
+NOTIFY_CHANNEL = "cache_versions"
+
+T = TypeVar("T")
+
+
+class VersionTracker:
+    """Versões conhecidas por este processo, relidas do banco no máximo a cada intervalo."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._versions: dict[Engine, dict[str, int]] = {}
+        self._checked_at: dict[Engine, float] = {}
+        self.push_enabled = False
+
+    @property
+    def check_interval(self) -> float:
+        if self.push_enabled:
+            return settings.cache_version_push_fallback_ms / 1000
+        return settings.cache_version_check_ms / 1000
+
+    def versions(self, session: Session) -> dict[str, int]:
+        bind = session.get_bind()
+        now = time.monotonic()
+        with self._lock:
+            cached = self._versions.get(bind)
+            if cached is not None and now - self._checked_at.get(bind, 0.0) < self.check_interval:
+                return cached
+        rows = session.query(CacheVersion.entity, CacheVersion.version).all()
+        fresh = {entity: version for entity, version in rows}
+        with self._lock:
+            self._versions[bind] = fresh
+            self._checked_at[bind] = now
+        return fresh
+
+    def mark_stale(self) -> None:
+        with self._lock:
+            self._checked_at.clear()
+
+
+version_tracker = VersionTracker()
+
+
+class VersionedCache(Generic[T]):
+    """Valor carregado do banco e reaproveitado enquanto a versão da entidade não muda."""
+
+    def __init__(self, entity: str, loader: Callable[[Session], T]) -> None:
+        self.entity = entity
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._entries: dict[Engine, tuple[int, T]] = {}
+
+    def get(self, session: Session) -> T:
+        version = version_tracker.versions(session).get(self.entity, 0)
+        bind = session.get_bind()
+        entry = self._entries.get(bind)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        value = self.loader(session)
+        with self._lock:
+            self._entries[bind] = (version, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def ensure_cache_versions(session: Session) -> None:
+    existing = {entity for (entity,) in session.query(CacheVersion.entity).all()}
+    for entity in ENTITIES:
+        if entity not in existing:
+            session.add(CacheVersion(entity=entity, version=0))
+    session.commit()
+
+
+def bump_version(session: Session, entity: str) -> None:
+    """Incrementa a versão na mesma transação da escrita; os workers recarregam após o commit."""
+    updated = (
+        session.query(CacheVersion)
+        .filter(CacheVersion.entity == entity)
+        .update({CacheVersion.version: CacheVersion.version + 1}, synchronize_session=False)
+    )
+    if not updated:
+        session.add(CacheVersion(entity=entity, version=1))
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(text("SELECT pg_notify(:channel, :entity)"), {"channel": NOTIFY_CHANNEL, "entity": entity})
+    if not event.contains(session, "after_commit", _mark_stale_after_commit):
+        event.listen(session, "after_commit", _mark_stale_after_commit, once=True)
+
+
+def _mark_stale_after_commit(session: Session) -> None:
+    version_tracker.mark_stale()
+
+
+class NotifyListener:
+    """Escuta NOTIFY do PostgreSQL para invalidar as versões sem esperar o próximo intervalo."""
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="cache-notify", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        version_tracker.push_enabled = False
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception:  # noqa: BLE001 - reconecta após falhas de rede/banco
+                version_tracker.push_enabled = False
+                logger.exception("Listener de invalidação de cache desconectado")
+                self._stop.wait(5)
+
+    def _listen(self) -> None:
+        raw: Any = self.engine.raw_connection()
+        try:
+            dbapi_conn = raw.driver_connection
+            dbapi_conn.autocommit = True
+            with dbapi_conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            version_tracker.push_enabled = True
+            version_tracker.mark_stale()
+            while not self._stop.is_set():
+                ready, _, _ = select.select([dbapi_conn], [], [], 5)
+                if not ready:
+                    continue
+                dbapi_conn.poll()
+                if dbapi_conn.notifies:
+                    dbapi_conn.notifies.clear()
+                    version_tracker.mark_stale()
+        finally:
+            version_tracker.push_enabled = False
+            raw.invalidate()
+
+
+def start_notify_listener(engine: Engine) -> NotifyListener | None:
+    if not settings.cache_listen_notify or engine.dialect.name != "postgresql":
+        return None
+    listener = NotifyListener(engine)
+    listener.start()
+    return listener
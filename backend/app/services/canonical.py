@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import logging
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+
+from .http_client import get_http_client
+from .metrics import metrics
+from .stores import GENERIC_STORE, detect_store
+
+logger = logging.getLogger(__name__)
+
+_ASIN_RE = re.compile(r"/(?:dp|gp/product|gp/aw/d|exec/obidos/asin|o/asin)/([A-Z0-9]{10})(?:[/?]|$)", re.IGNORECASE)
+_ML_ITEM_RE = re.compile(r"\b(ML[A-Z])-?(\d{6,})", re.IGNORECASE)
+_ML_CATALOG_RE = re.compile(r"/p/(ML[A-Z]\d{6,})", re.IGNORECASE)
+
+# Parâmetros de rastreamento que não mudam o produto, em qualquer loja.
+TRACKING_PARAMS = frozenset({"ref", "ref_", "gclid", "fbclid", "mc_cid", "mc_eid", "_encoding"})
+TRACKING_PREFIXES = ("utm_",)
+# Por loja; o parâmetro de afiliado também sai, porque o nosso é reaplicado depois.
+STORE_TRACKING_PARAMS = {
+    "amazon": frozenset(
+        {
+            "tag", "psc", "th", "smid", "qid", "sr", "keywords", "crid", "sprefix", "dib", "dib_tag", "linkcode",
+            "linkid", "camp", "creative", "creativeasin", "ascsubtag", "content-id", "pf_rd_p", "pf_rd_r",
+            "pd_rd_i", "pd_rd_r", "pd_rd_w", "pd_rd_wg",
+        }
+    ),
+    "mercadolivre": frozenset(
+        {
+            "mldcid", "tracking_id", "searchvariation", "position", "search_layout", "type", "deal_print_id",
+            "c_id", "c_uid", "polycard_client", "sid", "source", "matt_tool", "matt_word", "reco_id",
+            "reco_backend", "reco_client", "reco_item_pos", "reco_backend_type",
+        }
+    ),
+}
+
+SHORT_LINK_HOSTS = frozenset({"amzn.to", "a.co", "meli.la"})
+SHORT_LINK_MAX_HOPS = 3
+SHORT_LINK_CACHE_SIZE = 10_000
+
+
+@dataclass(frozen=True)
+class CanonicalURL:
+    """URL limpa para buscar e a chave estável do produto (``amazon:<domínio>:<ASIN>``, ``mercadolivre:MLB123``...)."""
+
+    url: str
+    key: str
+    store: str
+    product_id: str | None = None
+    # Página de catálogo (``/p/MLB...``): o id é do produto, não de um anúncio.
+    catalog: bool = False
+
+
+def _is_tracking(name: str, store: str | None) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES) or name in STORE_TRACKING_PARAMS.get(store or "", ())
+
+
+def _domain(host: str) -> str:
+    for prefix in ("www.", "m.", "smile.", "produto.", "articulo."):
+        if host.startswith(prefix):
+            return host[len(prefix):]
+    return host
+
+
+def strip_tracking(url: str, store: str | None = None) -> str:
+    """Remove fragmento e parâmetros de rastreamento (comuns e da loja), ordenando os que sobram."""
+    parsed = urlparse(url.strip())
+    store = store or detect_store(url)
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parsed.query, keep_blank_values=True) if not _is_tracking(name, store)
+    )
+    return urlunparse(parsed._replace(netloc=parsed.netloc.lower(), query=urlencode(query), fragment=""))
+
+
+def canonicalize(url: str, store: str | None = None) -> CanonicalURL:
+    """Deriva a chave do produto sem rede: ASIN, id MLB ou, na falta deles, a URL normalizada."""
+    store = store or detect_store(url)
+    clean = strip_tracking(url, store)
+    parsed = urlparse(clean)
+    host = (parsed.hostname or "").lower()
+
+    if store == "amazon":
+        match = _ASIN_RE.search(parsed.path)
+        if match and host not in SHORT_LINK_HOSTS:
+            asin = match.group(1).upper()
+            fetch_url = urlunparse(parsed._replace(path=f"/dp/{asin}", params="", query=""))
+            return CanonicalURL(fetch_url, f"amazon:{_domain(host)}:{asin}", store, asin)
+
+    if store == "mercadolivre":
+        catalog = _ML_CATALOG_RE.search(parsed.path)
+        if catalog:
+            product_id = catalog.group(1).upper()
+            return CanonicalURL(clean, f"mercadolivre:p:{product_id}", store, product_id, catalog=True)
+        match = _ML_ITEM_RE.search(parsed.path) or _ML_ITEM_RE.search(parsed.query)
+        if match:
+            product_id = f"{match.group(1)}{match.group(2)}".upper()
+            return CanonicalURL(clean, f"mercadolivre:{product_id}", store, product_id)
+
+    path = parsed.path.rstrip("/") or "/"
+    key = f"{store or GENERIC_STORE}:{_domain(host)}{path}" + (f"?{parsed.query}" if parsed.query else "")
+    return CanonicalURL(clean, key, store or GENERIC_STORE)
+
+
+_ID_SEGMENT_RE = re.compile(r"^(?:ML[A-Z]-?\d+|[A-Z0-9]{10}|\d+|dp|gp|product|p|ref=.*)$", re.IGNORECASE)
+
+
+def title_from_url(url: str) -> str | None:
+    """Título aproximado a partir do slug da URL (``/Fone-Bluetooth-XYZ/dp/...``), sem buscar a página."""
+    best = ""
+    for segment in urlparse(url).path.split("/"):
+        segment = _ML_ITEM_RE.sub("", segment).replace("_JM", "")
+        words = [word for word in re.split(r"[-_+]+", segment) if word and not _ID_SEGMENT_RE.match(word)]
+        candidate = " ".join(words)
+        if len(words) >= 2 and len(candidate) > len(best):
+            best = candidate
+    return best[:1].upper() + best[1:] if best else None
+
+
+def product_key(url: str, store: str | None = None) -> str:
+    return canonicalize(url, store).key
+
+
+def is_short_link(url: str) -> bool:
+    parsed = urlparse(url.strip())
+    host = (parsed.hostname or "").lower()
+    return host in SHORT_LINK_HOSTS or (detect_store(url) == "mercadolivre" and parsed.path.startswith("/sec/"))
+
+
+_resolved: OrderedDict[str, str] = OrderedDict()
+
+
+async def _follow_short_link(url: str) -> str:
+    client = get_http_client()
+    for _ in range(SHORT_LINK_MAX_HOPS):
+        if not is_short_link(url):
+            break
+        response = await client.head(url, follow_redirects=False, timeout=5.0)
+        location = response.headers.get("location")
+        if not response.is_redirect or not location:
+            break
+        url = urljoin(url, location)
+    return url
+
+
+async def resolve_canonical(url: str, store: str | None = None) -> CanonicalURL:
+    """Como ``canonicalize``, mas segue links curtos (amzn.to, a.co, meli.la) com HEAD, guardando o destino."""
+    if not is_short_link(url):
+        return canonicalize(url, store)
+    target = _resolved.get(url)
+    if target is not None:
+        _resolved.move_to_end(url)
+        metrics.inc("short_link_resolve_total", {"result": "hit"})
+    else:
+        try:
+            target = await _follow_short_link(url)
+        except Exception as exc:  # noqa: BLE001 - sem resolver, a busca segue os redirecionamentos
+            logger.warning("Falha ao resolver link curto %s: %s", url, exc)
+            metrics.inc("short_link_resolve_total", {"result": "error"})
+            return canonicalize(url, store)
+        metrics.inc("short_link_resolve_total", {"result": "miss"})
+        _resolved[url] = target
+        if len(_resolved) > SHORT_LINK_CACHE_SIZE:
+            _resolved.popitem(last=False)
+    resolved_store = detect_store(target)
+    return canonicalize(target, store if resolved_store == GENERIC_STORE else resolved_store)
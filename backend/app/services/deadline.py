@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """Prazo absoluto (relógio monotônico) repartido entre as etapas do pipeline."""
+
+    expires_at: float
+
+    @classmethod
+    def after_ms(cls, milliseconds: float) -> "Deadline":
+        return cls(time.monotonic() + max(0.0, milliseconds) / 1000)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def budget(self, share: float = 1.0, reserve: float = 0.0) -> float:
+        """Fatia ``share`` do que sobra depois de guardar ``reserve`` segundos para as etapas seguintes."""
+        return max(0.0, (self.remaining() - reserve) * share)
+
+    async def run(self, awaitable: Awaitable[T], share: float = 1.0, reserve: float = 0.0) -> T:
+        timeout = self.budget(share, reserve)
+        if timeout <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceeded("Prazo esgotado antes da etapa")
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError as exc:
+            raise DeadlineExceeded(f"Prazo de {timeout * 1000:.0f} ms esgotado") from exc
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import OfferRecord, ScheduledPost
+from .metrics import metrics
+
+SEEN_GENERATED = "generated"
+SEEN_POSTED = "posted"
+
+
+def offer_fingerprint(product_key: str | None, price: str | None, coupon: str | None) -> bytes | None:
+    """Hash de 8 bytes de produto + preço + cupom; "R$ 1.299,90" e "R$1299,90" dão o mesmo preço."""
+    if not product_key:
+        return None
+    digits = re.sub(r"\D", "", price or "")
+    normalized = f"{product_key}|{digits}|{(coupon or '').strip().upper()}"
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest()
+
+
+def _epoch(value: datetime) -> float:
+    """Datas do banco são UTC sem fuso (``datetime.utcnow``)."""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+@dataclass
+class _Seen:
+    generated: int = 0
+    posted: int = 0
+    last_generated: float = 0.0
+    last_posted: float = 0.0
+
+
+class RecentOffers:
+    """Ofertas geradas e publicadas na janela ``DEDUPE_WINDOW_HOURS``, por impressão digital.
+
+    Um dicionário de hashes responde à checagem em O(1) sem consulta; uma fila em ordem de
+    chegada expira os eventos antigos aos poucos, a cada registro. O índice é do processo e
+    remontado do banco (``offer_history`` e ``scheduled_posts``) no start.
+    """
+
+    def __init__(self, window_seconds: float, max_events: int = 200_000) -> None:
+        self.window = window_seconds
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._seen: dict[bytes, _Seen] = {}
+        self._events: deque[tuple[float, bytes, str]] = deque()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._seen.clear()
+            self._events.clear()
+
+    def add(self, fingerprint: bytes | None, kind: str = SEEN_GENERATED, at: float | None = None) -> None:
+        if fingerprint is None or self.window <= 0:
+            return
+        at = time.time() if at is None else at
+        with self._lock:
+            seen = self._seen.setdefault(fingerprint, _Seen())
+            if kind == SEEN_POSTED:
+                seen.posted += 1
+                seen.last_posted = max(seen.last_posted, at)
+            else:
+                seen.generated += 1
+                seen.last_generated = max(seen.last_generated, at)
+            self._events.append((at, fingerprint, kind))
+            self._expire(time.time())
+
+    def check(self, fingerprint: bytes | None, now: float | None = None) -> dict[str, Any] | None:
+        """``None`` se a oferta é nova na janela; senão status ("posted" vence "generated"), contagens e
+        o último uso (ISO 8601, para caber no JSON de jobs e posts agendados)."""
+        if fingerprint is None or self.window <= 0:
+            return None
+        now = time.time() if now is None else now
+        cutoff = now - self.window
+        with self._lock:
+            seen = self._seen.get(fingerprint)
+            if seen is None:
+                return None
+            generated = seen.generated if seen.last_generated >= cutoff else 0
+            posted = seen.posted if seen.last_posted >= cutoff else 0
+            last_seen = max(seen.last_posted if posted else 0.0, seen.last_generated if generated else 0.0)
+        if not generated and not posted:
+            return None
+        return {
+            "status": SEEN_POSTED if posted else SEEN_GENERATED,
+            "generated_count": generated,
+            "posted_count": posted,
+            "last_seen_at": datetime.fromtimestamp(last_seen, timezone.utc).isoformat(timespec="seconds"),
+        }
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window
+        while self._events and (self._events[0][0] < cutoff or len(self._events) > self.max_events):
+            _, fingerprint, kind = self._events.popleft()
+            seen = self._seen.get(fingerprint)
+            if seen is None:
+                continue
+            if kind == SEEN_POSTED:
+                seen.posted -= 1
+            else:
+                seen.generated -= 1
+            if seen.posted <= 0 and seen.generated <= 0:
+                del self._seen[fingerprint]
+
+    def rebuild(self, session: Session) -> int:
+        """Relê só a janela: o histórico é percorrido pelo id (decrescente) até sair dela."""
+        self.clear()
+        if self.window <= 0:
+            return 0
+        cutoff = datetime.utcnow() - timedelta(seconds=self.window)
+        events: list[tuple[float, bytes, str]] = []
+        rows = (
+            session.query(OfferRecord.product_key, OfferRecord.price, OfferRecord.coupon, OfferRecord.created_at)
+            .order_by(OfferRecord.id.desc())
+            .yield_per(5000)
+        )
+        for product_key, price, coupon, created_at in rows:
+            if created_at < cutoff:
+                break
+            fingerprint = offer_fingerprint(product_key, price, coupon)
+            if fingerprint is not None:
+                events.append((_epoch(created_at), fingerprint, SEEN_GENERATED))
+        posts = session.query(ScheduledPost.payload, ScheduledPost.result, ScheduledPost.published_at).filter(
+            ScheduledPost.status == "published", ScheduledPost.published_at >= cutoff
+        )
+        for payload, result, published_at in posts.yield_per(1000):
+            fingerprint = posted_fingerprint(payload or {}, result or {})
+            if fingerprint is not None:
+                events.append((_epoch(published_at), fingerprint, SEEN_POSTED))
+        for at, fingerprint, kind in sorted(events, key=lambda event: event[0]):
+            self.add(fingerprint, kind, at)
+        metrics.set_gauge("dedupe_index_size", len(self._seen))
+        return len(events)
+
+
+def posted_fingerprint(payload: dict[str, Any], result: dict[str, Any]) -> bytes | None:
+    """Impressão digital de um post agendado: produto e preço do resultado, cupom do pedido."""
+    product_key = (result.get("metadata") or {}).get("product_key")
+    coupon = (payload.get("overrides") or {}).get("coupon") or payload.get("coupon")
+    return offer_fingerprint(product_key, result.get("price"), coupon)
+
+
+recent_offers = RecentOffers(settings.dedupe_window_hours * 3600, settings.dedupe_max_events)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Iterator
+
+
+class DiskStore:
+    """Armazenamento endereçado por conteúdo com despejo dos arquivos menos usados ao passar do limite."""
+
+    def __init__(self, root: str | Path, max_bytes: int, suffix: str = "") -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._size: int | None = None
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}{self.suffix}"
+
+    def exists(self, digest: str) -> bool:
+        return self.path_for(digest).exists()
+
+    def get(self, digest: str) -> bytes | None:
+        path = self.path_for(digest)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, digest: str, data: bytes) -> Path:
+        path = self.path_for(digest)
+        if path.exists():
+            os.utime(path)
+            return path
+        with self._lock:
+            self._current_size()  # contabiliza o diretório antes de o arquivo novo existir
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp_name, path)
+        with self._lock:
+            self._size = (self._size or 0) + len(data)
+            if self._size > self.max_bytes:
+                self._evict(keep=path)
+        return path
+
+    def iter_paths(self) -> Iterator[Path]:
+        if not self.root.exists():
+            return
+        for path in self.root.glob(f"*/*{self.suffix}"):
+            if not path.name.startswith(".tmp-"):
+                yield path
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._current_size()
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            self._size = sum(path.stat().st_size for path in self.iter_paths())
+        return self._size
+
+    def _evict(self, keep: Path) -> None:
+        target = int(self.max_bytes * 0.9)
+        entries = []
+        for path in self.iter_paths():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        size = sum(item[1] for item in entries)
+        for _, file_size, path in entries:
+            if size <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            size -= file_size
+        self._size = size
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import OfferRecord
+from .cache_versions import OFFERS, version_tracker
+from .metrics import metrics
+
+FEED_ALL = "all"
+FEED_STORE = "store"
+FEED_TEMPLATE = "template"
+
+JSON_FEED = "json"
+RSS_FEED = "xml"
+FEED_MEDIA_TYPES = {JSON_FEED: "application/feed+json", RSS_FEED: "application/rss+xml; charset=utf-8"}
+
+
+def feed_path(kind: str, key: str, fmt: str) -> str:
+    if kind == FEED_ALL:
+        return f"/feeds/offers.{fmt}"
+    return f"/feeds/{kind}s/{key}.{fmt}"
+
+
+def _utc(value: datetime) -> datetime:
+    """Datas do banco são UTC sem fuso (``datetime.utcnow``)."""
+    return value.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+@dataclass(frozen=True)
+class FeedItem:
+    """Uma oferta já serializada nos dois formatos; montada uma vez e reaproveitada por todos os feeds."""
+
+    id: int
+    published_at: datetime
+    json: bytes
+    rss: bytes
+
+
+def feed_item(record: OfferRecord) -> FeedItem:
+    context = record.context or {}
+    link = context.get("short_url") or record.url
+    title = record.title or "Oferta"
+    published_at = _utc(record.created_at or datetime.utcnow())
+    entry = {
+        "id": str(record.id),
+        "url": link,
+        "title": title,
+        "content_text": record.text,
+        "date_published": published_at.isoformat(),
+        "tags": [record.store],
+        "_offer": {
+            "product_url": record.url,
+            "store": record.store,
+            "template": record.template_slug,
+            "price": record.price,
+            "price_cents": record.price_cents,
+            "coupon": record.coupon,
+        },
+    }
+    if context.get("image"):
+        entry["image"] = context["image"]
+    rss = (
+        f"<item><title>{escape(title)}</title><link>{escape(link)}</link>"
+        f'<guid isPermaLink="false">offer-{record.id}</guid>'
+        f"<pubDate>{format_datetime(published_at, usegmt=True)}</pubDate>"
+        f"<category>{escape(record.store)}</category>"
+        f"<description>{escape(record.text)}</description></item>"
+    )
+    return FeedItem(
+        id=record.id,
+        published_at=published_at,
+        json=json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        rss=rss.encode("utf-8"),
+    )
+
+
+class OfferFeed:
+    """As ``size`` ofertas mais recentes de um feed, da mais nova para a mais antiga.
+
+    Cada sincronização só serializa as ofertas que ainda não estavam no feed e invalida os corpos
+    montados; cada formato é montado uma vez por mudança, juntando os itens já prontos. O ETag é
+    um hash dos ids do feed: processos com o mesmo conteúdo respondem com o mesmo ETag, e uma
+    consulta sem novidade é só uma comparação.
+    """
+
+    def __init__(self, kind: str, key: str, title: str, size: int) -> None:
+        self.kind = kind
+        self.key = key
+        self.title = title
+        self.size = max(1, size)
+        self.version: int | None = None  # versão de ``offers`` (cache_versions) já sincronizada
+        self.last_modified: datetime | None = None
+        self._items: list[FeedItem] = []
+        self._digest = self._hash()
+        self._bodies: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def ids(self) -> list[int]:
+        return [item.id for item in self._items]
+
+    def by_id(self) -> dict[int, FeedItem]:
+        return {item.id: item for item in self._items}
+
+    def _hash(self) -> str:
+        raw = f"{self.kind}|{self.key}|{self.title}|{','.join(map(str, self.ids))}"
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+
+    def replace(self, items: list[FeedItem]) -> bool:
+        """Troca o conteúdo (mais nova primeiro); ``False`` se os ids não mudaram."""
+        items = items[: self.size]
+        with self._lock:
+            if [item.id for item in items] == self.ids:
+                return False
+            self._items = items
+            self._digest = self._hash()
+            self.last_modified = max((item.published_at for item in items), default=None)
+            self._bodies.clear()
+        return True
+
+    def etag(self, fmt: str) -> str:
+        return f'"{self._digest}-{fmt}"'
+
+    def body(self, fmt: str) -> bytes:
+        with self._lock:
+            body = self._bodies.get(fmt)
+            if body is None:
+                body = self._bodies[fmt] = self._render(fmt)
+                metrics.inc("feed_renders_total", {"kind": self.kind, "format": fmt})
+            return body
+
+    def _render(self, fmt: str) -> bytes:
+        site = settings.feed_site_url.rstrip("/")
+        if fmt == JSON_FEED:
+            header = json.dumps(
+                {
+                    "version": "https://jsonfeed.org/version/1.1",
+                    "title": self.title,
+                    "home_page_url": site,
+                    "feed_url": site + feed_path(self.kind, self.key, fmt),
+                },
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+            return b"".join(
+                (header[:-1].encode("utf-8"), b',"items":[', b",".join(item.json for item in self._items), b"]}")
+            )
+        built = format_datetime(self.last_modified or _utc(datetime.utcnow()), usegmt=True)
+        header = (
+            '<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+            f"<title>{escape(self.title)}</title><link>{escape(site)}/</link>"
+            f"<description>{escape(self.title)}</description><lastBuildDate>{built}</lastBuildDate>"
+        )
+        return b"".join((header.encode("utf-8"), *(item.rss for item in self._items), b"</channel></rss>"))
+
+
+class FeedRegistry:
+    """Feeds em memória por ``(tipo, chave)``: todas as ofertas, por loja e por template.
+
+    ``record_offer`` incrementa a versão ``offers`` de ``cache_versions`` na mesma transação;
+    quando um feed é pedido e a versão mudou (oferta gravada neste ou em outro processo, avisada
+    por NOTIFY no Postgres ou vista na checagem periódica), ele relê só os ids das ``size``
+    ofertas mais recentes e carrega as linhas que ainda não tinha.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._feeds: dict[tuple[str, str], OfferFeed] = {}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._feeds.clear()
+
+    def cached(self, kind: str, key: str = "") -> OfferFeed | None:
+        return self._feeds.get((kind, key))
+
+    def get(self, session: Session, kind: str, key: str = "", title: str = "Ofertas") -> OfferFeed:
+        version = version_tracker.versions(session).get(OFFERS, 0)
+        feed = self._feeds.get((kind, key))
+        if feed is not None and feed.version == version:
+            return feed
+        with self._lock:
+            feed = self._feeds.get((kind, key))
+            if feed is None:
+                feed = self._feeds[(kind, key)] = OfferFeed(kind, key, title, self.size)
+                metrics.set_gauge("feeds_loaded", len(self._feeds))
+            if feed.version != version:
+                if self._sync(session, feed):
+                    metrics.inc("feed_syncs_total", {"kind": kind})
+                feed.version = version
+        return feed
+
+    def _sync(self, session: Session, feed: OfferFeed) -> bool:
+        ids = session.query(OfferRecord.id)
+        if feed.kind == FEED_STORE:
+            ids = ids.filter(OfferRecord.store == feed.key)
+        elif feed.kind == FEED_TEMPLATE:
+            ids = ids.filter(OfferRecord.template_slug == feed.key)
+        latest = [record_id for (record_id,) in ids.order_by(OfferRecord.id.desc()).limit(self.size)]
+        if latest == feed.ids:
+            return False
+        # Ids menores que o mais novo também podem aparecer (commit fora de ordem entre processos).
+        known = feed.by_id()
+        missing = [record_id for record_id in latest if record_id not in known]
+        if missing:
+            for record in session.query(OfferRecord).filter(OfferRecord.id.in_(missing)):
+                known[record.id] = feed_item(record)
+        return feed.replace([known[record_id] for record_id in latest if record_id in known])
+
+
+offer_feeds = FeedRegistry(settings.feed_size)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Any, Iterator
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import OfferRecord
+from .cache_versions import OFFERS, bump_version
+from .dedupe import offer_fingerprint, recent_offers
+from .structured_data import price_cents
+
+# Campos do contexto (antes das regras) guardados para simular regras sobre o histórico.
+CONTEXT_KEYS = ("store", "title", "coupon", "price", "price_original", "benefits")
+# Campos da prévia guardados junto para montar os feeds (link e imagem de cada item).
+FEED_KEYS = ("short_url", "image")
+
+
+def base_context(metadata: dict[str, Any], coupon: str | None, overrides: dict[str, Any]) -> dict[str, Any]:
+    """Mesmo ponto de partida de ``build_context``, restrito a ``CONTEXT_KEYS``."""
+    context = {
+        "store": metadata.get("store"),
+        "title": metadata.get("title"),
+        "coupon": overrides.get("coupon") or coupon,
+        "price": metadata.get("price"),
+        "price_original": metadata.get("price_original"),
+        "benefits": list(metadata.get("benefits") or []),
+    }
+    for key in CONTEXT_KEYS:
+        if key in overrides and key != "coupon":
+            context[key] = overrides[key]
+    return context
+
+
+def record_offer(
+    session: Session,
+    url: str,
+    preview: dict[str, Any],
+    context: dict[str, Any],
+    template_slug: str | None,
+    product_key: str | None = None,
+) -> OfferRecord | None:
+    if not settings.offer_history_enabled:
+        return None
+    record = OfferRecord(
+        url=url,
+        product_key=product_key or (preview.get("metadata") or {}).get("product_key"),
+        store=preview.get("store") or context.get("store") or "generic",
+        template_slug=template_slug,
+        coupon=context.get("coupon"),
+        title=preview.get("title"),
+        price=preview.get("price"),
+        price_cents=price_cents(preview.get("price")),
+        text=preview.get("text") or "",
+        context={**context, **{key: preview[key] for key in FEED_KEYS if preview.get(key)}},
+    )
+    session.add(record)
+    bump_version(session, OFFERS)
+    session.commit()
+    recent_offers.add(offer_fingerprint(record.product_key, record.price, record.coupon))
+    return record
+
+
+def iter_history_contexts(session: Session, limit: int, store: str | None = None) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Contextos das ofertas mais recentes, lidos em lotes para não materializar tudo de uma vez."""
+    query = session.query(OfferRecord.id, OfferRecord.context)
+    if store:
+        query = query.filter(OfferRecord.store == store)
+    for record_id, context in query.order_by(OfferRecord.id.desc()).limit(limit).yield_per(2000):
+        yield record_id, context or {}
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from ..config import settings
+from .disk_store import DiskStore
+from .http_client import get_http_client
+from .metrics import metrics
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - dependência opcional
+    Image = None
+    ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_SIZES: dict[str, tuple[int, int]] = {
+    "telegram": (1280, 1280),
+    "instagram": (1080, 1080),
+    "whatsapp": (800, 800),
+    "thumb": (320, 320),
+}
+
+IMAGE_SUFFIX = ".jpg"
+IMAGE_ROUTE = "/images"
+# Faz parte da chave em disco: mudar a qualidade/formato gera variantes novas em vez de servir as antigas.
+VARIANT_FORMAT = "jpeg-q85-v1"
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+def render_variant(data: bytes, size: tuple[int, int], quality: int = 85) -> bytes:
+    """Redimensiona mantendo a proporção e grava em JPEG progressivo (roda no pool de workers)."""
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        image.thumbnail(size, Image.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, "JPEG", quality=quality, optimize=True, progressive=True)
+    return output.getvalue()
+
+
+def variant_key(url: str, channel: str) -> str:
+    width, height = CHANNEL_SIZES[channel]
+    return hashlib.sha256(f"{VARIANT_FORMAT}\n{url}\n{channel}\n{width}x{height}".encode("utf-8")).hexdigest()
+
+
+def image_path(digest: str) -> str:
+    return f"{IMAGE_ROUTE}/{digest}{IMAGE_SUFFIX}"
+
+
+class ImageCache:
+    """Variantes redimensionadas por canal, gravadas em disco sob uma chave derivada do pedido.
+
+    A chave (URL + canal + tamanho) é determinística, então um restart ou outro worker
+    encontram no disco a variante já gerada sem baixar a imagem de novo.
+    """
+
+    def __init__(self, root: str, max_bytes: int, workers: int = 2) -> None:
+        self.disk = DiskStore(root, max_bytes, suffix=IMAGE_SUFFIX)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="images")
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._background: dict[str, asyncio.Future] = {}
+
+    def ready(self, url: str, channels: list[str]) -> dict[str, str]:
+        """Só as variantes que já estão no disco, sem rede nem redimensionamento."""
+        keys = {channel: variant_key(url, channel) for channel in channels}
+        return {channel: image_path(key) for channel, key in keys.items() if self.disk.exists(key)}
+
+    def _render_and_store(self, data: bytes, size: tuple[int, int], key: str) -> None:
+        self.disk.put(key, render_variant(data, size))
+
+    async def variants(self, url: str, channels: list[str]) -> dict[str, str]:
+        """Devolve ``{canal: caminho local}``; baixa e redimensiona só o que ainda não está no disco."""
+        result = self.ready(url, channels)
+        missing = [channel for channel in channels if channel not in result]
+        metrics.inc("image_variants_total", {"result": "hit"}, len(channels) - len(missing))
+        if not missing:
+            return result
+
+        data = await self._download_once(url)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(self._pool, self._render_and_store, data, CHANNEL_SIZES[channel], variant_key(url, channel))
+                for channel in missing
+            )
+        )
+        metrics.inc("image_variants_total", {"result": "miss"}, len(missing))
+        result.update({channel: image_path(variant_key(url, channel)) for channel in missing})
+        return {channel: result[channel] for channel in channels}
+
+    def schedule(self, url: str, channels: list[str]) -> dict[str, str]:
+        """Devolve as variantes prontas e gera as que faltam em segundo plano, sem esperar."""
+        result = self.ready(url, channels)
+        missing = [channel for channel in channels if channel not in result]
+        if missing and url not in self._background:
+            task = asyncio.ensure_future(self.variants(url, missing))
+            self._background[url] = task
+            task.add_done_callback(lambda done: self._finish_background(url, done))
+        return result
+
+    def _finish_background(self, url: str, task: asyncio.Future) -> None:
+        self._background.pop(url, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Falha ao preparar imagem %s: %s", url, task.exception())
+            metrics.inc("image_variants_total", {"result": "error"})
+
+    async def wait_background(self) -> None:
+        await asyncio.gather(*self._background.values(), return_exceptions=True)
+
+    async def _download_once(self, url: str) -> bytes:
+        future = self._inflight.get(url)
+        if future is not None:
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(download_image(url))
+        self._inflight[url] = future
+        future.add_done_callback(lambda done: self._finish_download(url, done))
+        # Também protegido: se quem iniciou for cancelado, o download segue para os demais.
+        return await asyncio.shield(future)
+
+    def _finish_download(self, url: str, future: asyncio.Future) -> None:
+        if self._inflight.get(url) is future:
+            del self._inflight[url]
+        if not future.cancelled():
+            future.exception()  # marca a falha como lida quando ninguém mais espera
+
+    def load(self, digest: str) -> bytes | None:
+        return self.disk.get(digest)
+
+
+async def download_image(url: str) -> bytes:
+    max_bytes = settings.image_max_download_mb * 1024 * 1024
+    client = get_http_client()
+    async with client.stream("GET", url, timeout=settings.image_fetch_timeout, follow_redirects=True) as response:
+        response.raise_for_status()
+        declared = response.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            raise ImageTooLarge(f"Imagem maior que {settings.image_max_download_mb} MB")
+        chunks: list[bytes] = []
+        received = 0
+        async for chunk in response.aiter_bytes():
+            received += len(chunk)
+            if received > max_bytes:
+                raise ImageTooLarge(f"Imagem maior que {settings.image_max_download_mb} MB")
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def configured_channels() -> list[str]:
+    channels = [item.strip() for item in settings.image_channels.split(",") if item.strip()]
+    return [channel for channel in channels if channel in CHANNEL_SIZES]
+
+
+@lru_cache()
+def get_image_cache() -> ImageCache | None:
+    if not settings.image_dir:
+        return None
+    if Image is None:
+        logger.warning("IMAGE_DIR definido, mas o pacote 'pillow' não está instalado; imagens desativadas")
+        return None
+    return ImageCache(
+        settings.image_dir,
+        max_bytes=settings.image_cache_max_mb * 1024 * 1024,
+        workers=settings.image_workers,
+    )
+
+
+def offer_images(image_url: str | None) -> dict[str, str]:
+    """Etapa de imagens do pipeline: não bloqueia a oferta, devolve só as variantes já prontas."""
+    cache = get_image_cache()
+    if cache is None or not image_url:
+        return {}
+    return cache.schedule(image_url, configured_channels())
@@ -1,12 +1,13 @@
 ﻿from __future__ import annotations
 
 from typing import Any
-from urllib.parse import urlencode, urlparse, parse_qsl, urlunparse, quote
 
 from sqlalchemy.orm import Session
 
 from ..config import settings
 from ..models import IntegrationSetting
+from .cache_versions import INTEGRATIONS, VersionedCache, bump_version
+from .stores import get_adapter
 
 
 def upsert_integration(session: Session, provider: str, label: str, data: dict[str, Any]) -> IntegrationSetting:
@@ -17,6 +18,7 @@ def upsert_integration(session: Session, provider: str, label: str, data: dict[s
     else:
         integration.label = label
         integration.data = data
+    bump_version(session, INTEGRATIONS)
     session.commit()
     session.refresh(integration)
     return integration
@@ -26,11 +28,20 @@ def get_integration(session: Session, provider: str) -> IntegrationSetting | Non
     return session.query(IntegrationSetting).filter_by(provider=provider).first()
 
 
+def _load_integration_data(session: Session) -> dict[str, dict[str, Any]]:
+    return {item.provider: dict(item.data or {}) for item in session.query(IntegrationSetting).all()}
+
+
+_integrations_cache: VersionedCache[dict[str, dict[str, Any]]] = VersionedCache(INTEGRATIONS, _load_integration_data)
+
+
 def get_integration_data(session: Session, provider: str) -> dict[str, Any]:
-    integration = get_integration(session, provider)
-    if integration:
-        return integration.data or {}
-    return {}
+    return _integrations_cache.get(session).get(provider, {})
+
+
+def get_integrations_snapshot(session: Session) -> dict[str, dict[str, Any]]:
+    """Credenciais de todos os provedores numa leitura só; o dicionário é compartilhado, não altere."""
+    return _integrations_cache.get(session)
 
 
 def ensure_default_integrations(session: Session) -> None:
@@ -61,32 +72,4 @@ def ensure_default_integrations(session: Session) -> None:
 
 def apply_affiliate(url: str, store: str, session: Session) -> str:
     data = get_integration_data(session, store)
-    if store == "amazon":
-        tag = data.get("tag") or settings.default_amazon_tag
-        if not tag:
-            return url
-        parsed = urlparse(url)
-        query = dict(parse_qsl(parsed.query, keep_blank_values=True))
-        query["tag"] = tag
-        filtered = {k: v for k, v in query.items() if v is not None}
-        new_query = urlencode(filtered)
-        return urlunparse(parsed._replace(query=new_query))
-
-    if store == "mercadolivre":
-        campaign = data.get("campaign_id")
-        if not campaign:
-            return url
-        parsed = urlparse(url)
-        query = dict(parse_qsl(parsed.query, keep_blank_values=True))
-        query["mldcid"] = campaign
-        new_query = urlencode(query)
-        return urlunparse(parsed._replace(query=new_query))
-
-    if store == "awin":
-        prefix = data.get("deeplink_prefix")
-        if not prefix:
-            return url
-        encoded = quote(url, safe="")
-        return f"{prefix}{encoded}"
-
-    return url
+    return get_adapter(store).apply_affiliate(url, data)
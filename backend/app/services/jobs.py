@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import OfferJob
+from .pipeline import generate_offer
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+FINISHED_STATUSES = {JOB_DONE, JOB_FAILED}
+
+
+def submit_job(session: Session, payload: dict[str, Any]) -> OfferJob:
+    job = OfferJob(id=uuid.uuid4().hex, status=JOB_PENDING, payload=payload)
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    job_queue.notify()
+    return job
+
+
+def get_job(session: Session, job_id: str) -> OfferJob | None:
+    return session.query(OfferJob).filter_by(id=job_id).first()
+
+
+def claim_next_job(session: Session) -> OfferJob | None:
+    """Reserva o job pendente mais antigo com um UPDATE condicional (seguro entre processos)."""
+    for _ in range(3):
+        job_id = (
+            session.query(OfferJob.id)
+            .filter(OfferJob.status == JOB_PENDING)
+            .order_by(OfferJob.created_at.asc())
+            .limit(1)
+            .scalar()
+        )
+        if job_id is None:
+            return None
+        claimed = (
+            session.query(OfferJob)
+            .filter(OfferJob.id == job_id, OfferJob.status == JOB_PENDING)
+            .update(
+                {
+                    OfferJob.status: JOB_RUNNING,
+                    OfferJob.attempts: OfferJob.attempts + 1,
+                    OfferJob.started_at: datetime.utcnow(),
+                },
+                synchronize_session=False,
+            )
+        )
+        session.commit()
+        if claimed:
+            return get_job(session, job_id)
+    return None
+
+
+def requeue_stale_jobs(session: Session) -> int:
+    """Devolve à fila jobs presos em 'running' (processo reiniciado ou morto no meio do trabalho)."""
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.offer_job_stale_after)
+    stale = session.query(OfferJob).filter(OfferJob.status == JOB_RUNNING, OfferJob.started_at < cutoff)
+    failed = stale.filter(OfferJob.attempts >= settings.offer_job_max_attempts).update(
+        {OfferJob.status: JOB_FAILED, OfferJob.error: "Tentativas esgotadas", OfferJob.finished_at: datetime.utcnow()},
+        synchronize_session=False,
+    )
+    requeued = stale.filter(OfferJob.attempts < settings.offer_job_max_attempts).update(
+        {OfferJob.status: JOB_PENDING}, synchronize_session=False
+    )
+    session.commit()
+    return failed + requeued
+
+
+async def run_job(session: Session, job: OfferJob) -> None:
+    try:
+        result = await generate_offer(session, **job.payload)
+    except Exception as exc:  # noqa: BLE001 - o erro fica registrado no job
+        session.rollback()
+        job.status = JOB_FAILED
+        job.error = str(exc) or type(exc).__name__
+    else:
+        job.status = JOB_DONE
+        job.result = result
+        job.error = None
+    job.finished_at = datetime.utcnow()
+    session.commit()
+
+
+class JobQueue:
+    """Pool de workers asyncio no processo que consome a tabela ``offer_jobs``."""
+
+    def __init__(self) -> None:
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: asyncio.Event | None = None
+        self._waiters: dict[str, set[asyncio.Event]] = {}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self, workers: int) -> None:
+        if self._tasks or workers <= 0:
+            return
+        self._wakeup = asyncio.Event()
+        with SessionLocal() as session:
+            requeue_stale_jobs(session)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def wait_finished(self, job_id: str, timeout: float) -> None:
+        """Espera o job terminar neste processo; cada chamador tem o próprio evento."""
+        event = asyncio.Event()
+        waiters = self._waiters.setdefault(job_id, set())
+        waiters.add(event)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            waiters.discard(event)
+            if not waiters and self._waiters.get(job_id) is waiters:
+                del self._waiters[job_id]
+
+    def _wake_waiters(self, job_id: str) -> None:
+        for event in self._waiters.pop(job_id, ()):
+            event.set()
+
+    async def _worker(self) -> None:
+        last_recovery = datetime.utcnow()
+        while True:
+            try:
+                with SessionLocal() as session:
+                    job = claim_next_job(session)
+                    if job is not None:
+                        await run_job(session, job)
+                        self._wake_waiters(job.id)
+                        continue
+                    if datetime.utcnow() - last_recovery > timedelta(seconds=settings.offer_job_stale_after):
+                        requeue_stale_jobs(session)
+                        last_recovery = datetime.utcnow()
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # noqa: BLE001 - o worker não pode morrer por erro de banco
+                logger.exception("Erro no worker de jobs de oferta")
+            await self._idle()
+
+    async def _idle(self) -> None:
+        assert self._wakeup is not None
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), settings.offer_job_poll_interval)
+        except asyncio.TimeoutError:
+            return
+        self._wakeup.clear()
+
+
+job_queue = JobQueue()
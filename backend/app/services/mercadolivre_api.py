@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+from ..config import settings
+from .http_client import get_http_client
+from .metrics import metrics
+from .structured_data import format_price
+
+logger = logging.getLogger(__name__)
+
+ITEM_ATTRIBUTES = "id,title,price,original_price,currency_id,thumbnail,pictures,permalink,shipping"
+# Margem para renovar o token antes de expirar de fato.
+TOKEN_REFRESH_MARGIN = 60.0
+
+
+class MercadoLivreAPIError(RuntimeError):
+    pass
+
+
+class MercadoLivreClient:
+    """Cliente da API do Mercado Livre: token OAuth (client credentials) em cache e multi-get de itens.
+
+    Pedidos de ``get_item`` que chegam juntos são agrupados em chamadas ``/items?ids=`` de até
+    ``batch_size`` ids, esperando no máximo ``batch_window`` segundos para completar o lote.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        app_id: str,
+        secret: str,
+        batch_size: int = 20,
+        batch_window: float = 0.01,
+        timeout: float = 5.0,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.app_id = app_id
+        self.secret = secret
+        self.batch_size = max(1, min(batch_size, 20))
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self._token: str | None = None
+        self._token_expires_at = 0.0
+        self._token_lock = asyncio.Lock()
+        self._pending: dict[str, asyncio.Future] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def token(self, force_refresh: bool = False) -> str:
+        if not force_refresh and self._token and time.monotonic() < self._token_expires_at:
+            return self._token
+        async with self._token_lock:
+            if not force_refresh and self._token and time.monotonic() < self._token_expires_at:
+                return self._token
+            response = await get_http_client().post(
+                f"{self.base_url}/oauth/token",
+                data={"grant_type": "client_credentials", "client_id": self.app_id, "client_secret": self.secret},
+                headers={"Accept": "application/json"},
+                timeout=self.timeout,
+            )
+            if response.status_code != 200:
+                raise MercadoLivreAPIError(f"Falha ao obter token do Mercado Livre: HTTP {response.status_code}")
+            payload = response.json()
+            self._token = payload["access_token"]
+            expires_in = float(payload.get("expires_in") or 21600)
+            self._token_expires_at = time.monotonic() + max(0.0, expires_in - TOKEN_REFRESH_MARGIN)
+            metrics.inc("ml_api_token_refresh_total")
+            return self._token
+
+    async def get_items(self, item_ids: list[str]) -> dict[str, dict[str, Any] | None]:
+        """Uma chamada multi-get; itens inexistentes ou com erro voltam como ``None``."""
+        params = {"ids": ",".join(item_ids), "attributes": ITEM_ATTRIBUTES}
+        response = None
+        for attempt in range(2):
+            token = await self.token(force_refresh=attempt > 0)
+            response = await get_http_client().get(
+                f"{self.base_url}/items",
+                params=params,
+                headers={"Authorization": f"Bearer {token}"},
+                timeout=self.timeout,
+            )
+            if response.status_code != 401:
+                break
+        metrics.inc("ml_api_requests_total", {"status": response.status_code})
+        if response.status_code != 200:
+            raise MercadoLivreAPIError(f"API do Mercado Livre respondeu HTTP {response.status_code}")
+        items: dict[str, dict[str, Any] | None] = {item_id: None for item_id in item_ids}
+        for entry in response.json():
+            body = entry.get("body") or {}
+            if entry.get("code") == 200 and body.get("id") in items:
+                items[body["id"]] = body
+        return items
+
+    async def get_item(self, item_id: str) -> dict[str, Any] | None:
+        future = self._pending.get(item_id)
+        if future is None:
+            future = self._pending[item_id] = asyncio.get_running_loop().create_future()
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.ensure_future(self._resolve(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, batch: dict[str, asyncio.Future]) -> None:
+        metrics.observe("ml_api_batch_size", len(batch))
+        try:
+            items = await self.get_items(list(batch))
+        except Exception as exc:  # noqa: BLE001 - cada chamador decide o fallback
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for item_id, future in batch.items():
+            if not future.done():
+                future.set_result(items.get(item_id))
+
+
+def item_metadata(item: dict[str, Any]) -> dict[str, Any]:
+    """Converte o item da API no mesmo formato de ``extract_metadata``."""
+    currency = item.get("currency_id") or "BRL"
+    price = format_price(item.get("price"), currency)
+    pictures = item.get("pictures") or []
+    image = (pictures[0].get("secure_url") or pictures[0].get("url")) if pictures else item.get("thumbnail")
+    benefits = ["Frete grátis"] if (item.get("shipping") or {}).get("free_shipping") else []
+    return {
+        "store": "mercadolivre",
+        "title": item.get("title") or "Produto",
+        "image": image,
+        "price": price,
+        "price_original": format_price(item.get("original_price"), currency),
+        "currency": currency,
+        "structured_data": "mercadolivre_api",
+        "benefits": benefits,
+        "raw_prices": [price] if price else [],
+    }
+
+
+_clients: dict[asyncio.AbstractEventLoop, MercadoLivreClient] = {}
+
+
+def get_ml_client() -> MercadoLivreClient | None:
+    """Cliente do event loop atual, ou ``None`` sem credenciais (``DEFAULT_ML_APP_ID``/``DEFAULT_ML_SECRET``)."""
+    if not (settings.ml_api_enabled and settings.default_ml_app_id and settings.default_ml_secret):
+        return None
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        for other in [other for other in _clients if other.is_closed()]:
+            del _clients[other]
+        client = _clients[loop] = MercadoLivreClient(
+            settings.ml_api_base_url,
+            settings.default_ml_app_id,
+            settings.default_ml_secret,
+            batch_size=settings.ml_api_batch_size,
+            batch_window=settings.ml_api_batch_window_ms / 1000,
+        )
+    return client
+
+
+async def fetch_item_metadata(item_id: str) -> dict[str, Any] | None:
+    """Metadados pela API, ou ``None`` para cair no scraping (sem credenciais, item ausente ou erro)."""
+    client = get_ml_client()
+    if client is None:
+        return None
+    try:
+        item = await client.get_item(item_id)
+    except Exception as exc:  # noqa: BLE001 - o scraping continua como alternativa
+        logger.warning("API do Mercado Livre indisponível para %s: %s", item_id, exc)
+        metrics.inc("ml_api_items_total", {"result": "error"})
+        return None
+    metrics.inc("ml_api_items_total", {"result": "hit" if item else "miss"})
+    return item_metadata(item) if item else None
@@ -1,22 +1,33 @@
 ﻿from __future__ import annotations
 
+import asyncio
+import copy
+import functools
 import re
-from typing import Any
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Collection
 
-import httpx
 from bs4 import BeautifulSoup
 
-from .stores import detect_store
+from ..config import settings
+from .admission import admit_parse, release_parse
+from .canonical import CanonicalURL, canonicalize
+from .deadline import Deadline
+from .http_client import get_http_client
+from .metrics import metrics
+from .snapshots import save_snapshot_in_background
+from .stores import get_adapter
+from .structured_data import extract_structured_data
 
 PRICE_RE = re.compile(r"R\$\s*\d{1,3}(?:\.\d{3})*,\d{2}")
+HEAD_END_RE = re.compile(r"</head\s*>", re.IGNORECASE)
+HEAD_TAIL = 32  # fim do pedaço anterior reexaminado junto com o próximo (tag partida ao meio)
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
-    "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
-}
+# Partes caras e opcionais dos metadados; quem não vai usá-las passa ``parts`` sem elas.
+OPTIONAL_PARTS = ("raw_prices", "raw_text_excerpt")
 
 
-def _normalize_price(value: str | None) -> str | None:
+def normalize_price(value: str | None) -> str | None:
     if not value:
         return None
     cleaned = value.strip()
@@ -27,7 +38,7 @@ def _normalize_price(value: str | None) -> str | None:
     return cleaned
 
 
-def _find_price_candidates(text: str) -> list[str]:
+def find_price_candidates(text: str) -> list[str]:
     return list(dict.fromkeys(PRICE_RE.findall(text)))
 
 
@@ -53,57 +64,6 @@ def _extract_image(soup: BeautifulSoup) -> str | None:
     return None
 
 
-def _extract_amazon_prices(soup: BeautifulSoup) -> tuple[str | None, str | None]:
-    selectors = [
-        "#priceblock_ourprice",
-        "#priceblock_dealprice",
-        "span.apexPriceToPay span.a-offscreen",
-        "span.a-price[data-a-size=\"l\"] span.a-offscreen",
-        "span.a-price[data-a-size=\"xl\"] span.a-offscreen",
-    ]
-    for selector in selectors:
-        el = soup.select_one(selector)
-        if el and el.text.strip():
-            sale = _normalize_price(el.text)
-            break
-    else:
-        sale = None
-
-    strike_selectors = [
-        "#priceblock_strikeprice",
-        "span.a-price.a-text-price span.a-offscreen",
-        "span[data-a-color=\"secondary\"] span.a-offscreen",
-    ]
-    for selector in strike_selectors:
-        el = soup.select_one(selector)
-        if el and el.text.strip():
-            original = _normalize_price(el.text)
-            break
-    else:
-        original = None
-
-    return sale, original
-
-
-def _extract_ml_prices(soup: BeautifulSoup) -> tuple[str | None, str | None]:
-    price_el = soup.select_one("meta[name='twitter:data1']")
-    price = _normalize_price(price_el.get("content")) if price_el else None
-    installment = soup.select_one("meta[name='twitter:data2']")
-    if installment and installment.get("content"):
-        price = _normalize_price(installment.get("content")) or price
-    strike_el = soup.find("span", attrs={"class": re.compile("price-tag-strike")})
-    strike = _normalize_price(strike_el.text) if strike_el else None
-    return price, strike
-
-
-def _extract_generic_prices(soup: BeautifulSoup) -> tuple[str | None, str | None]:
-    text = soup.get_text(" ", strip=True)
-    candidates = _find_price_candidates(text)
-    if candidates:
-        return _normalize_price(candidates[0]), _normalize_price(candidates[1]) if len(candidates) > 1 else None
-    return None, None
-
-
 def _extract_benefits(soup: BeautifulSoup) -> list[str]:
     benefits: list[str] = []
     bullets = soup.select("ul li")
@@ -122,40 +82,269 @@ def _extract_installment(text: str) -> str | None:
     return None
 
 
-async def fetch_metadata(url: str, store: str | None = None) -> dict[str, Any]:
-    store = store or detect_store(url)
-    async with httpx.AsyncClient(timeout=12.0, headers=HEADERS, follow_redirects=True) as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
-        html = resp.text
+def _text_excerpt(soup: BeautifulSoup, limit: int = 1000) -> str:
+    """Início do texto da página sem percorrer o documento inteiro."""
+    parts: list[str] = []
+    size = 0
+    for piece in soup.stripped_strings:
+        parts.append(piece)
+        size += len(piece) + 1
+        if size > limit:
+            break
+    return " ".join(parts)[:limit]
 
-    soup = BeautifulSoup(html, "lxml")
-    title = _extract_title(soup) or "Produto"
-    image = _extract_image(soup)
 
-    if store == "amazon":
-        price_current, price_original = _extract_amazon_prices(soup)
-    elif store == "mercadolivre":
-        price_current, price_original = _extract_ml_prices(soup)
+def extract_metadata(html: str, store: str, parts: Collection[str] | None = None) -> dict[str, Any]:
+    """``parts`` limita as chaves de ``OPTIONAL_PARTS`` calculadas (``None`` = todas).
+
+    A árvore é desmontada ao final: só os valores extraídos sobrevivem à chamada.
+    """
+    soup = BeautifulSoup(html, "lxml")
+    try:
+        return _extract(soup, store, parts)
+    finally:
+        soup.decompose()
+
+
+def _extract(soup: BeautifulSoup, store: str, parts: Collection[str] | None) -> dict[str, Any]:
+    wanted = set(OPTIONAL_PARTS if parts is None else parts)
+    adapter = get_adapter(store)
+    structured = extract_structured_data(soup)
+    metrics.inc("metadata_structured_data_total", {"store": store, "result": "hit" if structured else "miss"})
+
+    title = structured.get("title") or _extract_title(soup) or "Produto"
+    image = structured.get("image") or _extract_image(soup)
+    if structured:
+        # Dados estruturados bastam: o texto completo da página não é percorrido.
+        price_current, price_original = structured["price"], structured.get("price_original")
+        if not price_original and not adapter.scans_full_text:
+            price_original = adapter.extract_prices(soup)[1]
+        text = _text_excerpt(soup)
     else:
-        price_current, price_original = _extract_generic_prices(soup)
+        text = soup.get_text(" ", strip=True)
+        if adapter.scans_full_text:
+            price_current, price_original = adapter.extract_prices(soup, text)
+        else:
+            price_current, price_original = adapter.extract_prices(soup)
 
-    text = soup.get_text(" ", strip=True)
     installment = _extract_installment(text)
-
     benefits = _extract_benefits(soup)
     if installment and installment not in benefits:
         benefits.append(installment)
 
-    candidates = _find_price_candidates(text)
-
-    return {
+    result = {
         "store": store,
         "title": title,
         "image": image,
         "price": price_current,
         "price_original": price_original,
+        "currency": structured.get("currency") or "BRL",
+        "structured_data": structured.get("source"),
         "benefits": benefits,
-        "raw_prices": candidates,
-        "raw_text_excerpt": text[:1000],
-    }
+    }
+    if "raw_prices" in wanted:
+        result["raw_prices"] = [price_current] if structured else find_price_candidates(text)
+    if "raw_text_excerpt" in wanted:
+        result["raw_text_excerpt"] = text[:1000]
+    return result
+
+
+def head_metadata(html: str, store: str) -> dict[str, Any]:
+    """Metadados parciais só do ``<head>`` (título e imagem), para quando não há tempo de ler a página inteira."""
+    end = html.lower().find("</head>")
+    head = BeautifulSoup(html[: end + len("</head>")] if end != -1 else html[:65536], "lxml")
+    title, image = _extract_title(head), _extract_image(head)
+    head.decompose()
+    return {
+        "store": store,
+        "title": title,
+        "image": image,
+        "price": None,
+        "price_original": None,
+        "currency": "BRL",
+        "structured_data": None,
+        "benefits": [],
+        "partial": True,
+    }
+
+
+async def _api_metadata(
+    canonical: CanonicalURL,
+    parts: Collection[str] | None,
+    deadline: Deadline | None = None,
+) -> dict[str, Any] | None:
+    """Metadados pela API da loja, quando o adaptador tem uma e a URL traz o id do anúncio."""
+    fetch_api = get_adapter(canonical.store).fetch_api
+    if fetch_api is None or not canonical.product_id or canonical.catalog:
+        return None
+    if deadline is None:
+        data = await fetch_api(canonical.product_id)
+    else:
+        data = await deadline.run(fetch_api(canonical.product_id), reserve=settings.deadline_render_reserve_ms / 1000)
+    if data is None:
+        return None
+    wanted = set(OPTIONAL_PARTS if parts is None else parts)
+    return {
+        **{key: value for key, value in data.items() if key not in OPTIONAL_PARTS or key in wanted},
+        "product_key": canonical.key,
+    }
+
+
+async def _download_metadata(
+    canonical: CanonicalURL,
+    parts: Collection[str] | None,
+    deadline: Deadline | None = None,
+) -> dict[str, Any]:
+    """Com ``deadline``, a busca leva ``DEADLINE_FETCH_SHARE`` do prazo e a leitura do HTML o resto; se a
+    leitura não couber, volta só o ``<head>`` marcado como ``partial``."""
+    url, store = canonical.url, canonical.store
+    api_data = await _api_metadata(canonical, parts, deadline)
+    if api_data is not None:
+        return api_data
+    policy = get_adapter(store).fetch_policy
+    reserve = settings.deadline_render_reserve_ms / 1000
+    timeout = policy.timeout if deadline is None else min(policy.timeout, deadline.budget(settings.deadline_fetch_share, reserve))
+    request = get_http_client().get(
+        url,
+        headers=policy.headers,
+        timeout=timeout,
+        follow_redirects=policy.follow_redirects,
+    )
+    resp = await (request if deadline is None else deadline.run(request, settings.deadline_fetch_share, reserve))
+    resp.raise_for_status()
+    html = resp.text
+    del resp  # o corpo em bytes não precisa esperar a leitura terminar
+    save_snapshot_in_background(url, store, html)
+    if deadline is None:
+        return {**await _parse_in_executor(html, store, parts), "product_key": canonical.key}
+    try:
+        parsed = await deadline.run(_parse_in_executor(html, store, parts), reserve=reserve)
+    except TimeoutError:
+        metrics.inc("metadata_parse_timeout_total", {"store": store})
+        parsed = head_metadata(html, store)
+    return {**parsed, "product_key": canonical.key}
+
+
+async def _parse_in_executor(html: str, store: str, parts: Collection[str] | None) -> dict[str, Any]:
+    """Lê numa thread, fora do event loop; quantas leituras rodam juntas depende do tamanho das
+    páginas (``PARSE_MEMORY_BUDGET_MB``), não do número de pedidos."""
+    weight = await admit_parse(html, store)
+    future = asyncio.get_running_loop().run_in_executor(None, extract_metadata, html, store, parts)
+    # Se o prazo estourar a thread segue lendo; a reserva só sai quando ela terminar de fato.
+    future.add_done_callback(lambda _: release_parse(weight))
+    return await future
+
+
+_recent: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+
+def _remember(result: dict[str, Any]) -> None:
+    key = result.get("product_key")
+    if not key or result.get("partial") or settings.metadata_recent_size <= 0:
+        return
+    _recent[key] = copy.deepcopy(result)
+    _recent.move_to_end(key)
+    while len(_recent) > settings.metadata_recent_size:
+        _recent.popitem(last=False)
+
+
+def cached_metadata(product_key: str) -> dict[str, Any] | None:
+    """Última leitura completa do produto neste processo (fallback quando o prazo estoura)."""
+    cached = _recent.get(product_key)
+    return copy.deepcopy(cached) if cached is not None else None
+
+
+_inflight: dict[tuple[str, frozenset[str] | None, bool], asyncio.Future] = {}
+_shared: set[asyncio.Future] = set()
+
+
+def _finish_inflight(key: tuple[str, frozenset[str] | None, bool], future: asyncio.Future) -> None:
+    """Fim do download compartilhado, mesmo que quem o iniciou já tenha desistido."""
+    if _inflight.get(key) is future:
+        del _inflight[key]
+    if not future.cancelled() and future.exception() is None:
+        _remember(future.result())
+
+
+async def fetch_metadata(
+    url: str,
+    store: str | None = None,
+    parts: Collection[str] | None = None,
+    deadline: Deadline | None = None,
+) -> dict[str, Any]:
+    """Busca pela URL canônica; pedidos simultâneos do mesmo produto compartilham um único download.
+
+    Todos esperam o download através de ``asyncio.shield``: cancelar um pedido (cliente que
+    desconectou) não derruba o download dos demais. Com ``deadline`` a espera é limitada
+    (``DeadlineExceeded``) e o resultado pode vir ``partial``.
+    """
+    canonical = canonicalize(url, store)
+    key = (canonical.key, frozenset(parts) if parts is not None else None, deadline is not None)
+    future = _inflight.get(key)
+    if future is not None:
+        _shared.add(future)
+        metrics.inc("metadata_fetch_coalesced_total")
+        shared = asyncio.shield(future)
+        return copy.deepcopy(await (shared if deadline is None else deadline.run(shared)))
+
+    future = asyncio.ensure_future(_download_metadata(canonical, parts, deadline))
+    _inflight[key] = future
+    future.add_done_callback(functools.partial(_finish_inflight, key))
+    try:
+        result = await asyncio.shield(future)
+    finally:
+        shared = future in _shared
+        _shared.discard(future)
+    return copy.deepcopy(result) if shared else result
+
+
+async def stream_metadata(url: str, store: str | None = None) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """Emite ("head", título/imagem) assim que o <head> chega e depois ("metadata", dados completos)."""
+    canonical = canonicalize(url, store)
+    url, store = canonical.url, canonical.store
+    api_data = await _api_metadata(canonical, None)
+    if api_data is not None:
+        _remember(api_data)
+        yield "metadata", api_data
+        return
+    policy = get_adapter(store).fetch_policy
+    chunks: list[str] = []
+    head_sent = False
+    received = 0  # caracteres já recebidos
+    tail = ""  # fim do texto anterior, para achar um "</head>" partido entre dois pedaços
+    async with get_http_client().stream(
+        "GET",
+        url,
+        headers=policy.headers,
+        timeout=policy.timeout,
+        follow_redirects=policy.follow_redirects,
+    ) as resp:
+        resp.raise_for_status()
+        async for chunk in resp.aiter_text():
+            chunks.append(chunk)
+            if head_sent:
+                continue
+            window = tail + chunk
+            found = HEAD_END_RE.search(window)
+            received += len(chunk)
+            if found is None:
+                tail = window[-HEAD_TAIL:]
+                continue
+            end = received - len(window) + found.end()
+            head = BeautifulSoup("".join(chunks)[:end], "lxml")
+            head_sent = True
+            head_data = {
+                "store": store,
+                "product_key": canonical.key,
+                "title": _extract_title(head),
+                "image": _extract_image(head),
+            }
+            head.decompose()
+            yield "head", head_data
+
+    html = "".join(chunks)
+    chunks.clear()
+    save_snapshot_in_background(url, store, html)
+    metadata = {**await _parse_in_executor(html, store, None), "product_key": canonical.key}
+    _remember(metadata)
+    yield "metadata", metadata
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: dict[str, Any] | None) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in (labels or {}).items()))
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in key) + "}"
+
+
+class MetricsRegistry:
+    """Contadores e resumos em memória, por processo, expostos em formato Prometheus."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[LabelKey, float]] = {}
+        self._summaries: dict[str, dict[LabelKey, tuple[float, float, float]]] = {}
+        self._gauges: dict[str, dict[LabelKey, float]] = {}
+
+    def inc(self, name: str, labels: dict[str, Any] | None = None, value: float = 1.0) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, labels: dict[str, Any] | None = None) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._summaries.setdefault(name, {})
+            count, total, peak = series.get(key, (0.0, 0.0, value))
+            series[key] = (count + 1, total + value, max(peak, value))
+
+    def set_gauge(self, name: str, value: float, labels: dict[str, Any] | None = None) -> None:
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def counter_value(self, name: str, labels: dict[str, Any] | None = None) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0.0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+            self._gauges.clear()
+
+    def render(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+            for name, series in sorted(self._gauges.items()):
+                lines.append(f"# TYPE {name} gauge")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+            for name, series in sorted(self._summaries.items()):
+                lines.append(f"# TYPE {name} summary")
+                for key, (count, total, peak) in series.items():
+                    lines.append(f"{name}_count{_format_labels(key)} {count:g}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {total:g}")
+                    lines.append(f"{name}_max{_format_labels(key)} {peak:g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
@@ -1,14 +1,16 @@
 ﻿from __future__ import annotations
 
+from dataclasses import dataclass
 from typing import Any
 
 from jinja2 import BaseLoader, Environment, Template, TemplateError
 from sqlalchemy.orm import Session
 
 from ..config import settings
-from ..models import OfferTemplate, TransformationRule
+from ..models import OfferTemplate
+from .cache_versions import TEMPLATES, VersionedCache, bump_version
 from .headlines import headline_for
-from .rules import apply_rules
+from .rules import apply_rules, get_active_rules
 from .shortener import local_short_link
 
 JINJA_ENV = Environment(loader=BaseLoader(), autoescape=False, trim_blocks=True, lstrip_blocks=True)
@@ -43,20 +45,55 @@ def ensure_default_template(session: Session) -> OfferTemplate:
         is_default=True,
     )
     session.add(template)
+    bump_version(session, TEMPLATES)
     session.commit()
     session.refresh(template)
     return template
 
 
-def get_template_by_slug(session: Session, slug: str | None) -> OfferTemplate:
-    if slug:
-        template = session.query(OfferTemplate).filter_by(slug=slug).first()
-        if template:
+@dataclass(frozen=True)
+class TemplateSnapshot:
+    id: int
+    slug: str
+    name: str
+    body: str
+    is_default: bool
+
+
+def _snapshot(template: OfferTemplate) -> TemplateSnapshot:
+    return TemplateSnapshot(
+        id=template.id,
+        slug=template.slug,
+        name=template.name,
+        body=template.body,
+        is_default=bool(template.is_default),
+    )
+
+
+def _load_templates(session: Session) -> dict[str, TemplateSnapshot]:
+    return {template.slug: _snapshot(template) for template in session.query(OfferTemplate).all()}
+
+
+_templates_cache: VersionedCache[dict[str, TemplateSnapshot]] = VersionedCache(TEMPLATES, _load_templates)
+
+
+def get_template_by_slug(session: Session, slug: str | None) -> TemplateSnapshot:
+    templates = _templates_cache.get(session)
+    if slug and slug in templates:
+        return templates[slug]
+    for template in templates.values():
+        if template.is_default:
             return template
-    template = session.query(OfferTemplate).filter_by(is_default=True).first()
-    if template:
-        return template
-    return ensure_default_template(session)
+    return _snapshot(ensure_default_template(session))
+
+
+def list_templates(session: Session) -> list[TemplateSnapshot]:
+    """Templates em cache, por nome, para selects e listagens; cria o padrão se não houver nenhum."""
+    templates = _templates_cache.get(session)
+    if not templates:
+        ensure_default_template(session)
+        templates = _templates_cache.get(session)
+    return sorted(templates.values(), key=lambda template: template.name.lower())
 
 
 def render_template(template_body: str, context: dict[str, Any]) -> str:
@@ -83,7 +120,8 @@ def build_context(metadata: dict[str, Any], affiliate_url: str, coupon: str | No
         "coupon": overrides.get("coupon") or coupon,
         "extra_lines": overrides.get("extra_lines", []),
     }
-    for key, value in overrides.items():\n        context[key] = value
+    for key, value in overrides.items():
+        context[key] = value
     return context
 
 
@@ -100,8 +138,7 @@ def build_offer_text(
     short_url = overrides.get("short_url") or local_short_link(affiliate_url)
     context.setdefault("short_url", short_url)
 
-    rules = session.query(TransformationRule).all()
-    apply_rules(rules, context, context["extra_lines"])
+    apply_rules(get_active_rules(session), context, context["extra_lines"])
 
     text = render_template(template.body, context)
     return text.strip(), context
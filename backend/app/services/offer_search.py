@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import logging
+import re
+from datetime import datetime
+
+from sqlalchemy import func, literal_column, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from ..models import OfferRecord
+from ..pagination import keyset_page
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "offer_history_fts"
+PG_SEARCH_INDEX = "ix_offer_history_search"
+# A expressão da consulta precisa ser idêntica à do índice GIN para o Postgres usá-lo.
+PG_CONFIG = "'portuguese'::regconfig"
+PG_DOCUMENT = "coalesce(title, '') || ' ' || text"
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+SQLITE_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, text, content='offer_history', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS offer_history_fts_ai AFTER INSERT ON offer_history BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, text) VALUES (new.id, new.title, new.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS offer_history_fts_ad AFTER DELETE ON offer_history BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS offer_history_fts_au AFTER UPDATE OF title, text ON offer_history BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, title, text) VALUES (new.id, new.title, new.text);
+    END""",
+)
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """Cria o índice de texto do histórico: GIN sobre ``tsvector`` no Postgres, FTS5 (tabela externa
+    mantida por triggers) no SQLite. Idempotente; um índice FTS5 novo é preenchido com o que já existe."""
+    dialect = engine.dialect.name
+    with engine.begin() as connection:
+        if dialect == "postgresql":
+            connection.execute(
+                text(
+                    f"CREATE INDEX IF NOT EXISTS {PG_SEARCH_INDEX} ON offer_history "
+                    f"USING gin (to_tsvector({PG_CONFIG}, {PG_DOCUMENT}))"
+                )
+            )
+        elif dialect == "sqlite":
+            existed = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+            ).first()
+            for statement in SQLITE_DDL:
+                connection.execute(text(statement))
+            if not existed:
+                connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        else:  # pragma: no cover - outros bancos ficam sem busca indexada
+            logger.warning("Busca de ofertas sem índice de texto para o banco %s", dialect)
+
+
+def search_terms(query: str) -> list[str]:
+    return TOKEN_RE.findall(query.lower())
+
+
+def _text_filter(session: Session, terms: list[str]):
+    if session.get_bind().dialect.name == "postgresql":
+        document = func.to_tsvector(literal_column(PG_CONFIG), literal_column(PG_DOCUMENT))
+        return document.op("@@")(func.plainto_tsquery(literal_column(PG_CONFIG), " ".join(terms)))
+    # Cada termo entre aspas: o usuário não consegue injetar operadores do FTS5; todos são obrigatórios.
+    match = " ".join(f'"{term}"' for term in terms)
+    return OfferRecord.id.in_(
+        text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match").bindparams(match=match)
+    )
+
+
+def search_offers(
+    session: Session,
+    query: str | None = None,
+    store: str | None = None,
+    min_price_cents: int | None = None,
+    max_price_cents: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    after: str | None = None,
+    limit: int = 50,
+) -> tuple[list[OfferRecord], str | None]:
+    """Ofertas do histórico que contêm todas as palavras de ``query`` (título ou texto), das mais
+    recentes para as mais antigas, com filtros de loja, faixa de preço e período."""
+    rows = session.query(OfferRecord)
+    terms = search_terms(query or "")
+    if terms:
+        rows = rows.filter(_text_filter(session, terms))
+    if store:
+        rows = rows.filter(OfferRecord.store == store)
+    if min_price_cents is not None:
+        rows = rows.filter(OfferRecord.price_cents >= min_price_cents)
+    if max_price_cents is not None:
+        rows = rows.filter(OfferRecord.price_cents <= max_price_cents)
+    if since is not None:
+        rows = rows.filter(OfferRecord.created_at >= since)
+    if until is not None:
+        rows = rows.filter(OfferRecord.created_at < until)
+    return keyset_page(rows, (OfferRecord.id,), after, limit, descending=True)
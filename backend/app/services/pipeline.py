@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from typing import Any, AsyncIterator, Collection
+
+from sqlalchemy.orm import Session
+
+from .canonical import CanonicalURL, canonicalize, resolve_canonical, title_from_url
+from .deadline import Deadline
+from .dedupe import offer_fingerprint, recent_offers
+from .history import base_context, record_offer
+from .images import offer_images
+from .integrations import apply_affiliate
+from .metadata import cached_metadata, fetch_metadata, stream_metadata
+from .metrics import metrics
+from .offer_builder import build_offer_text
+
+# Campos que a prévia degradada sinaliza quando não vieram da página.
+FLAGGED_FIELDS = ("title", "price", "image")
+
+
+def _preview_fields(metadata: dict[str, Any], affiliate_url: str, text: str, context: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "title": context.get("title", metadata.get("title")),
+        "store": metadata.get("store"),
+        "affiliate_url": affiliate_url,
+        "short_url": context.get("short_url", affiliate_url),
+        "price": context.get("price") or metadata.get("price"),
+        "price_original": context.get("price_original") or metadata.get("price_original"),
+        "benefits": context.get("benefits", []),
+        "image": metadata.get("image"),
+        "images": {},
+        "text": text,
+        "metadata": metadata,
+        "degraded": None,
+        "missing_fields": [],
+        "duplicate": None,
+    }
+
+
+def _check_duplicate(preview: dict[str, Any], product_key: str, coupon: str | None) -> dict[str, Any] | None:
+    """Mesma oferta (produto, preço e cupom) já gerada ou publicada na janela ``DEDUPE_WINDOW_HOURS``."""
+    duplicate = recent_offers.check(offer_fingerprint(product_key, preview.get("price"), coupon))
+    if duplicate is not None:
+        metrics.inc("offer_duplicates_total", {"store": preview.get("store"), "status": duplicate["status"]})
+    return duplicate
+
+
+def _metadata_parts(fields: Collection[str] | None) -> set[str] | None:
+    """Partes opcionais dos metadados que os campos pedidos realmente usam."""
+    if fields is None or "metadata" in fields:
+        return None
+    # Templates podem usar ``raw_prices`` no texto.
+    return {"raw_prices"} if "text" in fields else set()
+
+
+def minimal_metadata(canonical: CanonicalURL) -> dict[str, Any]:
+    """Metadados sem a página: título do slug da URL (ou genérico); preço e imagem ficam vazios."""
+    return {
+        "store": canonical.store,
+        "title": title_from_url(canonical.url) or "Oferta",
+        "image": None,
+        "price": None,
+        "price_original": None,
+        "currency": "BRL",
+        "structured_data": None,
+        "benefits": [],
+        "raw_prices": [],
+        "product_key": canonical.key,
+    }
+
+
+async def _canonical_within(url: str, store: str | None, deadline: Deadline | None) -> CanonicalURL:
+    if deadline is None:
+        return await resolve_canonical(url, store)
+    try:
+        return await deadline.run(resolve_canonical(url, store), share=0.25)
+    except TimeoutError:
+        return canonicalize(url, store)
+
+
+async def _metadata_within(
+    canonical: CanonicalURL,
+    parts: set[str] | None,
+    deadline: Deadline | None,
+) -> tuple[dict[str, Any], str | None]:
+    """Metadados e o modo de degradação (``None``, ``"partial"``, ``"cache"`` ou ``"minimal"``).
+
+    Sem ``deadline`` os erros da busca sobem como antes; com ele, a prévia sempre sai.
+    """
+    if deadline is None:
+        return await fetch_metadata(canonical.url, canonical.store, parts=parts), None
+    try:
+        metadata = await fetch_metadata(canonical.url, canonical.store, parts=parts, deadline=deadline)
+    except Exception as exc:  # noqa: BLE001 - prazo esgotado ou loja fora do ar: degrada em vez de falhar
+        reason = "timeout" if isinstance(exc, TimeoutError) else "error"
+        metadata = None
+    else:
+        if not metadata.pop("partial", False):
+            return metadata, None
+        reason = "parse_timeout"
+    cached = cached_metadata(canonical.key)
+    if cached is not None:
+        metadata, mode = cached, "cache"
+    elif metadata is not None:
+        mode = "partial"
+        metadata = {**minimal_metadata(canonical), **{key: value for key, value in metadata.items() if value}}
+    else:
+        metadata, mode = minimal_metadata(canonical), "minimal"
+    metrics.inc("preview_degraded_total", {"store": canonical.store, "mode": mode, "reason": reason})
+    return metadata, mode
+
+
+def _missing_fields(metadata: dict[str, Any], mode: str, overrides: dict[str, Any]) -> list[str]:
+    missing = [field for field in FLAGGED_FIELDS if not metadata.get(field) and not overrides.get(field)]
+    if mode == "minimal" and "title" not in missing and not overrides.get("title"):
+        missing.insert(0, "title")  # veio do slug da URL, não da página
+    return missing
+
+
+async def generate_offer(
+    session: Session,
+    url: str,
+    store: str | None = None,
+    coupon: str | None = None,
+    template_slug: str | None = None,
+    overrides: dict[str, Any] | None = None,
+    fields: Collection[str] | None = None,
+    deadline: Deadline | None = None,
+) -> dict[str, Any]:
+    """Executa busca de metadados → link afiliado → texto, devolvendo os campos da prévia.
+
+    Com ``fields``, as etapas que só alimentam campos não pedidos (trechos crus dos
+    metadados, imagens) são puladas; os demais campos continuam presentes no retorno.
+    Com ``deadline``, a busca e a leitura dividem o prazo (guardando ``DEADLINE_RENDER_RESERVE_MS``
+    para o texto) e, se ele estourar, a prévia sai com metadados do cache, parciais ou mínimos,
+    indicados em ``degraded`` e ``missing_fields``.
+    """
+    overrides = overrides or {}
+    canonical = await _canonical_within(url, store, deadline)
+    metadata, degraded = await _metadata_within(canonical, _metadata_parts(fields), deadline)
+    affiliate_url = apply_affiliate(canonical.url, metadata["store"], session)
+    text, context = build_offer_text(
+        session=session,
+        metadata=metadata,
+        affiliate_url=affiliate_url,
+        coupon=coupon,
+        template_slug=template_slug,
+        overrides=overrides,
+    )
+    preview = _preview_fields(metadata, affiliate_url, text, context)
+    if fields is None or "images" in fields:
+        preview["images"] = offer_images(metadata.get("image"))
+    if degraded:
+        preview["degraded"] = degraded
+        preview["missing_fields"] = _missing_fields(metadata, degraded, overrides)
+    else:
+        recorded = base_context(metadata, coupon, overrides)
+        preview["duplicate"] = _check_duplicate(preview, canonical.key, recorded["coupon"])
+        record_offer(session, url, preview, recorded, template_slug, canonical.key)
+    return preview
+
+
+async def stream_offer(
+    session: Session,
+    url: str,
+    store: str | None = None,
+    coupon: str | None = None,
+    template_slug: str | None = None,
+    overrides: dict[str, Any] | None = None,
+) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """Versão progressiva de ``generate_offer``: emite "head", "prices" e "text" à medida que ficam prontos."""
+    overrides = overrides or {}
+    canonical = await resolve_canonical(url, store)
+    store = canonical.store
+    affiliate_url = apply_affiliate(canonical.url, store, session)
+    metadata: dict[str, Any] = {}
+    head_sent = False
+    async for stage, data in stream_metadata(canonical.url, store):
+        if stage == "head":
+            head_sent = True
+            yield "head", {**data, "affiliate_url": affiliate_url}
+        else:
+            metadata = data
+    if not head_sent:
+        yield "head", {
+            "store": store,
+            "product_key": canonical.key,
+            "title": metadata.get("title"),
+            "image": metadata.get("image"),
+            "affiliate_url": affiliate_url,
+        }
+    yield "prices", {
+        "price": metadata.get("price"),
+        "price_original": metadata.get("price_original"),
+        "benefits": metadata.get("benefits") or [],
+    }
+    text, context = build_offer_text(
+        session=session,
+        metadata=metadata,
+        affiliate_url=affiliate_url,
+        coupon=coupon,
+        template_slug=template_slug,
+        overrides=overrides,
+    )
+    preview = _preview_fields(metadata, affiliate_url, text, context)
+    recorded = base_context(metadata, coupon, overrides)
+    preview["duplicate"] = _check_duplicate(preview, canonical.key, recorded["coupon"])
+    record_offer(session, url, preview, recorded, template_slug, canonical.key)
+    yield "text", preview
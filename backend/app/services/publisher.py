@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Protocol
+
+from ..config import settings
+from .http_client import get_http_client
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimited(Exception):
+    """O destino recusou por excesso de mensagens (HTTP 429); ``retry_after`` em segundos."""
+
+    def __init__(self, retry_after: float, scope: str = "channel") -> None:
+        super().__init__(f"Limite de envio atingido; tentar de novo em {retry_after:g}s")
+        self.retry_after = retry_after
+        self.scope = scope
+
+
+class PublishError(Exception):
+    pass
+
+
+@dataclass
+class PublishMessage:
+    channel: str
+    text: str
+    image: str | None = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    attempts: int = 0
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+class Transport(Protocol):
+    async def send(self, destination: str, message: PublishMessage) -> None:
+        """Envia para o destino (sem o prefixo do canal); levanta ``RateLimited`` em 429."""
+
+
+class TokenBucket:
+    """Balde de fichas: ``rate`` por segundo, até ``capacity`` acumuladas; ``pause`` atende ao ``retry_after``."""
+
+    def __init__(self, rate: float, capacity: float = 1.0) -> None:
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds: float) -> None:
+        now = time.monotonic()
+        self._refill(now)
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self) -> float:
+        """Espera uma ficha e devolve quanto tempo esperou."""
+        started = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return time.monotonic() - started
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+def _retry_after(response) -> float:
+    try:
+        payload = response.json()
+    except ValueError:
+        payload = {}
+    parameters = payload.get("parameters") if isinstance(payload, dict) else None
+    value = (parameters or {}).get("retry_after") or response.headers.get("retry-after") or 1
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 1.0
+
+
+class TelegramTransport:
+    """Bot API do Telegram: ``sendPhoto`` com legenda quando há imagem, senão ``sendMessage``."""
+
+    def __init__(self, token: str, base_url: str = "https://api.telegram.org") -> None:
+        self.base_url = f"{base_url.rstrip('/')}/bot{token}"
+
+    async def send(self, destination: str, message: PublishMessage) -> None:
+        if message.image:
+            method, payload = "sendPhoto", {"chat_id": destination, "photo": message.image, "caption": message.text[:1024]}
+        else:
+            method, payload = "sendMessage", {"chat_id": destination, "text": message.text}
+        response = await get_http_client().post(f"{self.base_url}/{method}", json=payload, timeout=15.0)
+        if response.status_code == 429:
+            raise RateLimited(_retry_after(response))
+        if response.status_code >= 400:
+            raise PublishError(f"Telegram respondeu HTTP {response.status_code}: {response.text[:200]}")
+
+
+class WhatsAppTransport:
+    """WhatsApp Cloud API: mensagem de texto (ou imagem com legenda) para um número/grupo."""
+
+    def __init__(self, token: str, phone_number_id: str, base_url: str = "https://graph.facebook.com/v19.0") -> None:
+        self.url = f"{base_url.rstrip('/')}/{phone_number_id}/messages"
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    async def send(self, destination: str, message: PublishMessage) -> None:
+        payload: dict = {"messaging_product": "whatsapp", "to": destination}
+        if message.image:
+            payload.update(type="image", image={"link": message.image, "caption": message.text})
+        else:
+            payload.update(type="text", text={"body": message.text})
+        response = await get_http_client().post(self.url, json=payload, headers=self.headers, timeout=15.0)
+        if response.status_code == 429:
+            raise RateLimited(_retry_after(response))
+        if response.status_code >= 400:
+            raise PublishError(f"WhatsApp respondeu HTTP {response.status_code}: {response.text[:200]}")
+
+
+class FakeTransport:
+    """Transporte em memória para testes: aplica os mesmos limites que o destino real e devolve 429 ao estourar.
+
+    ``per_channel``/``global_limit`` são ``(mensagens, janela em segundos)``.
+    """
+
+    def __init__(
+        self,
+        per_channel: tuple[int, float] | None = None,
+        global_limit: tuple[int, float] | None = None,
+        latency: float = 0.0,
+        fail_times: int = 0,
+    ) -> None:
+        self.per_channel = per_channel
+        self.global_limit = global_limit
+        self.latency = latency
+        self.fail_times = fail_times
+        self.sent: list[tuple[float, str, PublishMessage]] = []
+        self.rejected = 0
+        self._history: dict[str, deque[float]] = {}
+
+    def _over(self, key: str, limit: tuple[int, float] | None, now: float) -> bool:
+        if limit is None:
+            return False
+        count, window = limit
+        history = self._history.setdefault(key, deque())
+        while history and history[0] <= now - window:
+            history.popleft()
+        return len(history) >= count
+
+    async def send(self, destination: str, message: PublishMessage) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_times:
+            self.fail_times -= 1
+            raise PublishError("Falha simulada")
+        now = time.monotonic()
+        if self._over("*", self.global_limit, now):
+            self.rejected += 1
+            raise RateLimited(self.global_limit[1] / self.global_limit[0], scope="global")
+        if self._over(destination, self.per_channel, now):
+            self.rejected += 1
+            raise RateLimited(self.per_channel[1] / self.per_channel[0])
+        self._history.setdefault("*", deque()).append(now)
+        self._history.setdefault(destination, deque()).append(now)
+        self.sent.append((now, destination, message))
+
+
+def split_channel(channel: str) -> tuple[str, str]:
+    """``"telegram:@ofertas"`` → ``("telegram", "@ofertas")``."""
+    kind, _, destination = channel.partition(":")
+    if not destination:
+        raise ValueError(f"Canal inválido: {channel!r} (use '<transporte>:<destino>')")
+    return kind, destination
+
+
+class PublishDispatcher:
+    """Uma fila e um worker por canal; os canais enviam em paralelo, limitados por baldes por canal e global.
+
+    A ordem dentro de um canal é preservada: após um 429 o canal pausa pelo ``retry_after`` e
+    reenvia a mesma mensagem antes das seguintes.
+    """
+
+    def __init__(
+        self,
+        transports: dict[str, Transport],
+        global_rate: float,
+        channel_rate: float,
+        channel_burst: float = 1.0,
+        max_attempts: int = 5,
+        retry_backoff: float = 1.0,
+    ) -> None:
+        self.transports = transports
+        self.global_bucket = TokenBucket(global_rate, capacity=1.0)
+        self.channel_rate = channel_rate
+        self.channel_burst = channel_burst
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._queues: dict[str, asyncio.Queue[PublishMessage]] = {}
+        self._buckets: dict[str, TokenBucket] = {}
+        self._workers: dict[str, asyncio.Task] = {}
+
+    def enqueue(self, channel: str, text: str, image: str | None = None) -> PublishMessage:
+        kind, _ = split_channel(channel)
+        if kind not in self.transports:
+            raise ValueError(f"Transporte não configurado: {kind}")
+        message = PublishMessage(channel=channel, text=text, image=image)
+        queue = self._queues.get(channel)
+        if queue is None:
+            queue = self._queues[channel] = asyncio.Queue()
+            self._buckets[channel] = TokenBucket(self.channel_rate, capacity=self.channel_burst)
+            self._workers[channel] = asyncio.create_task(self._worker(channel, queue))
+        queue.put_nowait(message)
+        metrics.set_gauge("publish_queue_depth", queue.qsize(), {"channel": channel})
+        return message
+
+    def pending(self) -> dict[str, int]:
+        return {channel: queue.qsize() for channel, queue in self._queues.items()}
+
+    async def drain(self) -> None:
+        await asyncio.gather(*(queue.join() for queue in list(self._queues.values())))
+
+    async def stop(self) -> None:
+        for task in self._workers.values():
+            task.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
+        self._queues.clear()
+        self._buckets.clear()
+
+    async def _worker(self, channel: str, queue: asyncio.Queue[PublishMessage]) -> None:
+        while True:
+            message = await queue.get()
+            try:
+                await self._deliver(channel, message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # noqa: BLE001 - o worker do canal não pode morrer
+                logger.exception("Erro inesperado ao publicar em %s", channel)
+            finally:
+                queue.task_done()
+                metrics.set_gauge("publish_queue_depth", queue.qsize(), {"channel": channel})
+
+    async def _deliver(self, channel: str, message: PublishMessage) -> None:
+        kind, destination = split_channel(channel)
+        transport = self.transports[kind]
+        bucket = self._buckets[channel]
+        while True:
+            # Primeiro o balde do canal, para não segurar uma ficha global enquanto o canal espera.
+            await bucket.acquire()
+            await self.global_bucket.acquire()
+            message.attempts += 1
+            try:
+                await transport.send(destination, message)
+            except RateLimited as exc:
+                metrics.inc("publish_rate_limited_total", {"transport": kind, "scope": exc.scope})
+                (self.global_bucket if exc.scope == "global" else bucket).pause(exc.retry_after)
+                continue
+            except Exception as exc:  # noqa: BLE001 - erro do destino: tenta de novo com espera crescente
+                if message.attempts >= self.max_attempts:
+                    logger.warning("Desistindo de publicar %s em %s: %s", message.id, channel, exc)
+                    metrics.inc("publish_messages_total", {"transport": kind, "result": "failed"})
+                    return
+                await asyncio.sleep(self.retry_backoff * 2 ** (message.attempts - 1))
+                continue
+            metrics.inc("publish_messages_total", {"transport": kind, "result": "sent"})
+            metrics.observe("publish_queue_wait_ms", (time.monotonic() - message.queued_at) * 1000, {"transport": kind})
+            return
+
+
+def configured_transports() -> dict[str, Transport]:
+    transports: dict[str, Transport] = {}
+    if settings.telegram_bot_token:
+        transports["telegram"] = TelegramTransport(settings.telegram_bot_token, settings.telegram_api_base_url)
+    if settings.whatsapp_token and settings.whatsapp_phone_number_id:
+        transports["whatsapp"] = WhatsAppTransport(settings.whatsapp_token, settings.whatsapp_phone_number_id)
+    return transports
+
+
+_dispatcher: PublishDispatcher | None = None
+
+
+def get_dispatcher() -> PublishDispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = PublishDispatcher(
+            configured_transports(),
+            global_rate=settings.publish_global_per_second,
+            channel_rate=settings.publish_channel_per_minute / 60,
+            max_attempts=settings.publish_max_attempts,
+        )
+    return _dispatcher
+
+
+async def stop_dispatcher() -> None:
+    global _dispatcher
+    if _dispatcher is not None:
+        await _dispatcher.stop()
+        _dispatcher = None
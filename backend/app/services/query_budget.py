@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QUERY_COUNT_HEADER = "X-DB-Queries"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_RE = re.compile(r"%\(\w+\)s|:\w+|\$\d+|%s")
+_PARAM_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Normaliza o SQL (literais e parâmetros viram ``?``) para agrupar execuções da mesma consulta."""
+    text = _STRING_RE.sub("?", statement)
+    text = _PARAM_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    text = _PARAM_LIST_RE.sub("(?...)", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+@dataclass
+class QueryStats:
+    """Consultas executadas no escopo atual (uma requisição, em geral)."""
+
+    count: int = 0
+    total_ms: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.statements[fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Consultas idênticas executadas ``threshold`` vezes ou mais: o padrão típico de N+1."""
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> QueryStats | None:
+    return _current.get()
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryStats]:
+    """Conta as consultas feitas dentro do bloco (tarefas e threads criadas nele herdam o contador)."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current.get() is not None:
+        conn.info.setdefault("query_budget_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current.get()
+    starts = conn.info.get("query_budget_start")
+    if stats is None or not starts:
+        return
+    stats.record(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Liga a contagem de consultas no engine; fora de um escopo de contagem os eventos não fazem nada."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def query_count(response: Any) -> int:
+    """Número de consultas informado no cabeçalho da resposta (para testes de endpoint)."""
+    return int(response.headers[QUERY_COUNT_HEADER])
+
+
+def assert_max_queries(response: Any, limit: int) -> None:
+    """Falha o teste se o endpoint fez mais de ``limit`` consultas."""
+    count = query_count(response)
+    assert count <= limit, f"{response.request.method} {response.request.url.path} fez {count} consultas (limite {limit})"
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, Collection, Iterable
+
+from .rules import RuleSnapshot, apply_actions
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """Condições de uma regra pré-processadas uma vez; equivale a ``matches_rule``."""
+
+    snapshot: RuleSnapshot
+    store_in: Collection[Any] | None
+    keywords: tuple[str, ...]
+    requires_coupon: bool
+
+    @classmethod
+    def compile(cls, snapshot: RuleSnapshot) -> CompiledRule:
+        conditions = snapshot.conditions or {}
+        store_in = conditions.get("store_in") or None
+        if isinstance(store_in, (list, tuple)) and all(isinstance(item, str) for item in store_in):
+            store_in = frozenset(store_in)
+        keywords = tuple(keyword.lower() for keyword in conditions.get("title_contains") or ())
+        return cls(
+            snapshot=snapshot,
+            store_in=store_in,
+            keywords=keywords,
+            requires_coupon=bool(conditions.get("requires_coupon")),
+        )
+
+    def matches(self, context: dict[str, Any]) -> bool:
+        if self.store_in is not None and context.get("store") not in self.store_in:
+            return False
+        if self.keywords:
+            title = (context.get("title") or "").lower()
+            if not any(keyword in title for keyword in self.keywords):
+                return False
+        if self.requires_coupon and not context.get("coupon"):
+            return False
+        return True
+
+
+def _diff(before: dict[str, Any], after: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    return {
+        key: {"before": before.get(key), "after": after.get(key)}
+        for key in before.keys() | after.keys()
+        if before.get(key) != after.get(key)
+    }
+
+
+def simulate_rules(
+    rules: Iterable[RuleSnapshot],
+    contexts: Iterable[tuple[Any, dict[str, Any]]],
+    sample_size: int = 5,
+) -> dict[str, Any]:
+    """Aplica as regras em sequência sobre cada contexto, como ``apply_rules``, sem tocar nos originais.
+
+    O contexto só é copiado quando alguma regra casa, e o diff completo só é calculado
+    para as primeiras ``sample_size`` ocorrências de cada regra.
+    """
+    started = time.perf_counter()
+    compiled = [CompiledRule.compile(rule) for rule in rules]
+    results = [{"name": rule.snapshot.name, "matched": 0, "samples": []} for rule in compiled]
+    total = touched = 0
+    for ref, context in contexts:
+        total += 1
+        current = context
+        lines: list[str] = []
+        for rule, result in zip(compiled, results):
+            if not rule.matches(current):
+                continue
+            result["matched"] += 1
+            if current is context:
+                current = {**context, "benefits": list(context.get("benefits") or [])}
+            if len(result["samples"]) >= sample_size:
+                apply_actions(rule.snapshot, current, lines)
+                continue
+            before = {**current, "benefits": list(current["benefits"])}
+            lines_before = len(lines)
+            apply_actions(rule.snapshot, current, lines)
+            result["samples"].append({"ref": ref, "changes": _diff(before, current), "lines_added": lines[lines_before:]})
+        if current is not context:
+            touched += 1
+    for result in results:
+        result["match_rate"] = round(result["matched"] / total, 4) if total else 0.0
+    return {
+        "contexts": total,
+        "touched": touched,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "rules": results,
+    }
@@ -1,11 +1,39 @@
 ﻿from __future__ import annotations
 
+import copy
+from dataclasses import dataclass
 from typing import Any
 
+from sqlalchemy.orm import Session
+
 from ..models import TransformationRule
+from .cache_versions import RULES, VersionedCache
+
+
+@dataclass(frozen=True)
+class RuleSnapshot:
+    id: int
+    name: str
+    conditions: dict[str, Any]
+    actions: dict[str, Any]
+
+
+def _load_rules(session: Session) -> tuple[RuleSnapshot, ...]:
+    rules = session.query(TransformationRule).order_by(TransformationRule.id.asc()).all()
+    return tuple(
+        RuleSnapshot(id=rule.id, name=rule.name, conditions=rule.conditions or {}, actions=rule.actions or {})
+        for rule in rules
+    )
+
+
+_rules_cache: VersionedCache[tuple[RuleSnapshot, ...]] = VersionedCache(RULES, _load_rules)
+
+
+def get_active_rules(session: Session) -> tuple[RuleSnapshot, ...]:
+    return _rules_cache.get(session)
 
 
-def matches_rule(rule: TransformationRule, context: dict[str, Any]) -> bool:
+def matches_rule(rule: TransformationRule | RuleSnapshot, context: dict[str, Any]) -> bool:
     conditions = rule.conditions or {}
     store = context.get("store")
     title = (context.get("title") or "").lower()
@@ -25,12 +53,12 @@ def matches_rule(rule: TransformationRule, context: dict[str, Any]) -> bool:
     return True
 
 
-def apply_actions(rule: TransformationRule, context: dict[str, Any], lines: list[str]) -> None:
+def apply_actions(rule: TransformationRule | RuleSnapshot, context: dict[str, Any], lines: list[str]) -> None:
     actions = rule.actions or {}
 
     set_fields = actions.get("set_fields") or {}
     for key, value in set_fields.items():
-        context[key] = value
+        context[key] = copy.deepcopy(value)
 
     prepend = actions.get("prepend_lines") or []
     append = actions.get("append_lines") or []
@@ -50,7 +78,7 @@ def apply_actions(rule: TransformationRule, context: dict[str, Any], lines: list
                 context["benefits"].append(benefit)
 
 
-def apply_rules(rules: list[TransformationRule], context: dict[str, Any], lines: list[str]) -> None:
+def apply_rules(rules: list[TransformationRule] | tuple[RuleSnapshot, ...], context: dict[str, Any], lines: list[str]) -> None:
     for rule in rules:
         if matches_rule(rule, context):
             apply_actions(rule, context, lines)
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import ScheduledPost
+from .dedupe import SEEN_POSTED, posted_fingerprint, recent_offers
+from .metrics import metrics
+from .pipeline import generate_offer
+from .publisher import get_dispatcher
+
+logger = logging.getLogger(__name__)
+
+POST_PENDING = "pending"
+POST_PREFETCHING = "prefetching"
+POST_PREFETCHED = "prefetched"
+POST_PUBLISHING = "publishing"
+POST_PUBLISHED = "published"
+POST_FAILED = "failed"
+POST_CANCELLED = "cancelled"
+POST_EXPIRED = "expired"
+ACTIVE_STATUSES = (POST_PENDING, POST_PREFETCHING, POST_PREFETCHED)
+
+ACTION_PREFETCH = "prefetch"
+ACTION_PUBLISH = "publish"
+
+
+def local_timezone() -> ZoneInfo:
+    return ZoneInfo(settings.default_timezone)
+
+
+def to_utc(value: datetime) -> datetime:
+    """Horário sem fuso é de ``DEFAULT_TIMEZONE``; o banco guarda UTC sem fuso, como ``datetime.utcnow``."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=local_timezone())
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def to_local(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc).astimezone(local_timezone())
+
+
+def _timestamp(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def schedule_posts(
+    session: Session,
+    items: list[dict[str, Any]],
+    publish_at: datetime,
+    channels: list[str],
+) -> list[ScheduledPost]:
+    when = to_utc(publish_at)
+    posts = [ScheduledPost(status=POST_PENDING, publish_at=when, payload=item, channels=list(channels)) for item in items]
+    session.add_all(posts)
+    session.flush()
+    entries = [(post.id, when, POST_PENDING) for post in posts]
+    session.commit()
+    campaign_scheduler.add(entries)
+    return posts
+
+
+def get_scheduled_post(session: Session, post_id: int) -> ScheduledPost | None:
+    return session.query(ScheduledPost).filter_by(id=post_id).first()
+
+
+def _transition(
+    session: Session,
+    post_id: int,
+    from_statuses: Iterable[str],
+    to_status: str,
+    values: dict[Any, Any] | None = None,
+) -> bool:
+    """UPDATE condicional: só um processo (ou tarefa) ganha cada transição; ``values`` vai no mesmo UPDATE."""
+    changed = (
+        session.query(ScheduledPost)
+        .filter(ScheduledPost.id == post_id, ScheduledPost.status.in_(tuple(from_statuses)))
+        .update(
+            {**(values or {}), ScheduledPost.status: to_status, ScheduledPost.updated_at: datetime.utcnow()},
+            synchronize_session=False,
+        )
+    )
+    session.commit()
+    return bool(changed)
+
+
+def cancel_post(session: Session, post_id: int) -> bool:
+    return _transition(session, post_id, ACTIVE_STATUSES, POST_CANCELLED)
+
+
+class CampaignScheduler:
+    """Min-heap de ``(horário, ação, id)`` no processo: dorme até o próximo item vencer, sem varrer a tabela.
+
+    Cada post entra duas vezes: a busca antecipada (``SCHEDULE_PREFETCH_MINUTES`` antes) guarda a
+    oferta pronta em ``result`` e a publicação só a envia ao dispatcher. As transições de status são
+    UPDATEs condicionais, então vários processos podem ter o mesmo heap sem publicar em dobro.
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, str, int]] = []
+        self._counter = itertools.count()
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+        self._prefetching: dict[int, asyncio.Task] = {}
+        self._semaphore: asyncio.Semaphore | None = None
+        self._last_seen_id = 0
+        self._synced_at = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(max(1, settings.schedule_concurrency))
+        self._heap.clear()
+        with SessionLocal() as session:
+            self._recover(session)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        tasks = [task for task in [self._task, *self._running] if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._running.clear()
+        self._prefetching.clear()
+
+    def add(self, entries: Iterable[tuple[int, datetime, str]]) -> None:
+        if self._task is None:
+            return
+        earliest = self._heap[0][0] if self._heap else None
+        for post_id, publish_at, status in entries:
+            self._push(post_id, publish_at, status)
+            self._last_seen_id = max(self._last_seen_id, post_id)
+        if self._heap and (earliest is None or self._heap[0][0] < earliest):
+            self._wakeup.set()
+
+    def _push(self, post_id: int, publish_at: datetime, status: str) -> None:
+        when = _timestamp(publish_at)
+        lead = settings.schedule_prefetch_minutes * 60
+        if status == POST_PENDING and lead > 0:
+            heapq.heappush(self._heap, (when - lead, next(self._counter), ACTION_PREFETCH, post_id))
+        heapq.heappush(self._heap, (when, next(self._counter), ACTION_PUBLISH, post_id))
+
+    def _recover(self, session: Session) -> None:
+        """Após um restart: busca interrompida volta a pendente, publicação interrompida vira falha e
+        posts atrasados demais expiram; o resto (inclusive os que venceram durante a parada) volta ao heap."""
+        session.query(ScheduledPost).filter(ScheduledPost.status == POST_PREFETCHING).update(
+            {ScheduledPost.status: POST_PENDING}, synchronize_session=False
+        )
+        session.query(ScheduledPost).filter(ScheduledPost.status == POST_PUBLISHING).update(
+            {ScheduledPost.status: POST_FAILED, ScheduledPost.error: "Publicação interrompida por reinício"},
+            synchronize_session=False,
+        )
+        cutoff = datetime.utcnow() - timedelta(minutes=settings.schedule_max_lateness_minutes)
+        expired = (
+            session.query(ScheduledPost)
+            .filter(ScheduledPost.status.in_(ACTIVE_STATUSES), ScheduledPost.publish_at < cutoff)
+            .update({ScheduledPost.status: POST_EXPIRED}, synchronize_session=False)
+        )
+        session.commit()
+        if expired:
+            logger.warning("%d posts agendados expiraram durante a parada", expired)
+            metrics.inc("scheduled_posts_total", {"result": "expired"}, expired)
+        self._load_active(session, after_id=0)
+
+    def _load_active(self, session: Session, after_id: int) -> None:
+        rows = (
+            session.query(ScheduledPost.id, ScheduledPost.publish_at, ScheduledPost.status)
+            .filter(ScheduledPost.status.in_(ACTIVE_STATUSES), ScheduledPost.id > after_id)
+            .order_by(ScheduledPost.id.asc())
+            .yield_per(5000)
+        )
+        for post_id, publish_at, status in rows:
+            self._push(post_id, publish_at, status)
+            self._last_seen_id = max(self._last_seen_id, post_id)
+        metrics.set_gauge("scheduled_posts_pending", len(self._heap))
+        self._synced_at = time.monotonic()
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        sync_every = settings.schedule_sync_seconds
+        while True:
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, action, post_id = heapq.heappop(self._heap)
+                self._spawn(action, post_id)
+            delay = self._heap[0][0] - now if self._heap else None
+            if sync_every > 0:
+                delay = min(delay, sync_every) if delay is not None else sync_every
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if sync_every > 0 and time.monotonic() - self._synced_at >= sync_every:
+                # Posts criados por outros processos: só as linhas com id acima do último visto.
+                try:
+                    with SessionLocal() as session:
+                        self._load_active(session, after_id=self._last_seen_id)
+                except Exception:  # noqa: BLE001 - o agendador não pode morrer por erro de banco
+                    logger.exception("Erro ao sincronizar posts agendados")
+
+    def _spawn(self, action: str, post_id: int) -> None:
+        if action == ACTION_PREFETCH:
+            task = asyncio.create_task(self._prefetch(post_id))
+            self._prefetching[post_id] = task
+            task.add_done_callback(lambda _: self._prefetching.pop(post_id, None))
+        else:
+            task = asyncio.create_task(self._publish(post_id))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _prefetch(self, post_id: int) -> None:
+        assert self._semaphore is not None
+        async with self._semaphore:
+            with SessionLocal() as session:
+                if not _transition(session, post_id, (POST_PENDING,), POST_PREFETCHING):
+                    return
+                payload = get_scheduled_post(session, post_id).payload
+                # O fim também é condicional: um cancelamento durante a geração não pode ser desfeito.
+                try:
+                    result = await generate_offer(session, **payload)
+                except Exception as exc:  # noqa: BLE001 - a publicação tenta gerar de novo na hora
+                    session.rollback()
+                    metrics.inc("scheduled_posts_total", {"result": "prefetch_failed"})
+                    outcome = {ScheduledPost.error: str(exc) or type(exc).__name__}
+                    finished = _transition(session, post_id, (POST_PREFETCHING,), POST_PENDING, outcome)
+                else:
+                    outcome = {
+                        ScheduledPost.result: result,
+                        ScheduledPost.error: None,
+                        ScheduledPost.prefetched_at: datetime.utcnow(),
+                    }
+                    finished = _transition(session, post_id, (POST_PREFETCHING,), POST_PREFETCHED, outcome)
+                if not finished:
+                    metrics.inc("scheduled_posts_total", {"result": "prefetch_discarded"})
+
+    async def _publish(self, post_id: int) -> None:
+        assert self._semaphore is not None
+        prefetch = self._prefetching.get(post_id)
+        if prefetch is not None:
+            await asyncio.gather(prefetch, return_exceptions=True)
+        async with self._semaphore:
+            with SessionLocal() as session:
+                if not _transition(session, post_id, (POST_PENDING, POST_PREFETCHED), POST_PUBLISHING):
+                    return
+                post = get_scheduled_post(session, post_id)
+                lateness = datetime.utcnow() - post.publish_at
+                try:
+                    if lateness > timedelta(minutes=settings.schedule_max_lateness_minutes):
+                        post.status = POST_EXPIRED
+                        metrics.inc("scheduled_posts_total", {"result": "expired"})
+                        return
+                    result = post.result or await generate_offer(session, **post.payload)
+                    dispatcher = get_dispatcher()
+                    for channel in post.channels or []:
+                        dispatcher.enqueue(channel, result["text"], result.get("image"))
+                except Exception as exc:  # noqa: BLE001 - o erro fica registrado no post
+                    session.rollback()
+                    post.status = POST_FAILED
+                    post.error = str(exc) or type(exc).__name__
+                    metrics.inc("scheduled_posts_total", {"result": "failed"})
+                else:
+                    post.status = POST_PUBLISHED
+                    post.result = result
+                    post.published_at = datetime.utcnow()
+                    recent_offers.add(posted_fingerprint(post.payload, result), SEEN_POSTED)
+                    metrics.inc("scheduled_posts_total", {"result": "published"})
+                    metrics.observe("scheduled_post_lateness_ms", max(0.0, lateness.total_seconds() * 1000))
+                finally:
+                    session.commit()
+                    metrics.set_gauge("scheduled_posts_pending", len(self._heap))
+
+
+campaign_scheduler = CampaignScheduler()
@@ -2,7 +2,10 @@
 
 import hashlib
 
+from .canonical import product_key
+
 
 def local_short_link(url: str) -> str:
-    digest = hashlib.sha256(url.encode("utf-8")).hexdigest()[:8]
+    """Link curto determinístico por produto: variantes da mesma URL (ref=, utm_, /gp/product/) dão o mesmo link."""
+    digest = hashlib.sha256(product_key(url).encode("utf-8")).hexdigest()[:8]
     return f"https://go.example/{digest}"
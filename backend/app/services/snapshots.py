@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import io
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator
+
+from ..config import settings
+from .disk_store import DiskStore
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependência opcional
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CODEC_SUFFIXES = {"zstd": ".zst", "gzip": ".gz"}
+
+
+@dataclass
+class Snapshot:
+    digest: str
+    url: str
+    store: str
+    fetched_at: str
+    html: str
+
+
+def _compress(codec: str, payload: bytes) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(payload)
+    return gzip.compress(payload, compresslevel=6)
+
+
+def _decompress(suffix: str, data: bytes) -> bytes:
+    if suffix == CODEC_SUFFIXES["zstd"]:
+        if zstandard is None:
+            raise RuntimeError("Snapshot em zstd exige o pacote 'zstandard'")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _open_stream(path: Path) -> BinaryIO:
+    if path.suffix == CODEC_SUFFIXES["zstd"]:
+        if zstandard is None:
+            raise RuntimeError("Snapshot em zstd exige o pacote 'zstandard'")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(path.open("rb"), closefd=True))
+    return gzip.open(path, "rb")
+
+
+def read_snapshot_header(path: Path) -> dict[str, Any]:
+    """Lê só a primeira linha (url, loja, data) sem descomprimir o HTML."""
+    with _open_stream(path) as stream:
+        return json.loads(stream.readline())
+
+
+def read_snapshot(path: Path) -> Snapshot:
+    payload = _decompress(path.suffix, path.read_bytes())
+    header, _, body = payload.partition(b"\n")
+    info = json.loads(header)
+    return Snapshot(
+        digest=path.name.removesuffix(path.suffix),
+        url=info["url"],
+        store=info["store"],
+        fetched_at=info["fetched_at"],
+        html=body.decode("utf-8"),
+    )
+
+
+class SnapshotStore:
+    """HTML das páginas buscadas, comprimido e endereçado pelo SHA-256 do conteúdo."""
+
+    def __init__(self, root: str | Path, max_bytes: int, codec: str = "gzip") -> None:
+        if codec == "zstd" and zstandard is None:
+            codec = "gzip"
+        self.codec = codec
+        self.disk = DiskStore(root, max_bytes, suffix=CODEC_SUFFIXES[codec])
+
+    def save(self, url: str, store: str, html: str) -> str:
+        body = html.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        if self.disk.exists(digest):
+            return digest
+        header = json.dumps(
+            {"url": url, "store": store, "fetched_at": datetime.utcnow().isoformat(timespec="seconds")},
+            ensure_ascii=False,
+        ).encode("utf-8")
+        self.disk.put(digest, _compress(self.codec, header + b"\n" + body))
+        return digest
+
+    def load(self, digest: str) -> Snapshot | None:
+        path = self.disk.path_for(digest)
+        if not path.exists():
+            return None
+        return read_snapshot(path)
+
+    def iter_paths(self) -> Iterator[Path]:
+        return self.disk.iter_paths()
+
+
+@lru_cache()
+def get_snapshot_store() -> SnapshotStore | None:
+    if not settings.snapshot_dir:
+        return None
+    return SnapshotStore(
+        settings.snapshot_dir,
+        max_bytes=settings.snapshot_max_mb * 1024 * 1024,
+        codec=settings.snapshot_compression,
+    )
+
+
+def save_snapshot_in_background(url: str, store: str, html: str) -> None:
+    snapshot_store = get_snapshot_store()
+    if snapshot_store is None:
+        return
+    future = asyncio.get_running_loop().run_in_executor(None, snapshot_store.save, url, store, html)
+    future.add_done_callback(_log_failure)
+
+
+def _log_failure(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception():
+        logger.warning("Falha ao gravar snapshot: %s", future.exception())
+
+
+def _reprocess_path(path: str, store_filter: str | None) -> dict[str, Any] | None:
+    from .metadata import extract_metadata
+
+    try:
+        if store_filter and read_snapshot_header(Path(path)).get("store") != store_filter:
+            return None
+        snapshot = read_snapshot(Path(path))
+        metadata = extract_metadata(snapshot.html, snapshot.store)
+    except Exception as exc:  # noqa: BLE001 - um snapshot corrompido ou um extrator com erro não interrompe o lote
+        return {"digest": Path(path).name.split(".")[0], "path": path, "error": str(exc) or type(exc).__name__}
+    return {
+        "digest": snapshot.digest,
+        "url": snapshot.url,
+        "fetched_at": snapshot.fetched_at,
+        "metadata": metadata,
+    }
+
+
+def reprocess_snapshots(
+    snapshot_store: SnapshotStore,
+    workers: int | None = None,
+    store_filter: str | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Reexecuta os extratores atuais sobre os snapshots gravados, em paralelo entre processos."""
+    paths = [str(path) for path in snapshot_store.iter_paths()]
+    if not paths:
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_reprocess_path, paths, [store_filter] * len(paths), chunksize=16)
+        for result in results:
+            if result is not None:
+                yield result
@@ -1,21 +1,116 @@
-﻿from __future__ import annotations
+from __future__ import annotations
 
+import importlib
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
 from urllib.parse import urlparse
 
-SUPPORTED_STORES = {
-    "amazon": "Amazon",
-    "mercadolivre": "Mercado Livre",
-    "awin": "AWIN",
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
 }
 
+GENERIC_STORE = "generic"
+
+
+@dataclass(frozen=True)
+class FetchPolicy:
+    timeout: float = 12.0
+    headers: dict[str, str] = field(default_factory=lambda: dict(DEFAULT_HEADERS))
+    follow_redirects: bool = True
+
+
+@dataclass(frozen=True)
+class StoreAdapter:
+    name: str
+    extract_prices: Callable[..., tuple[str | None, str | None]]
+    apply_affiliate: Callable[[str, dict[str, Any]], str]
+    fetch_policy: FetchPolicy = field(default_factory=FetchPolicy)
+    # O extrator lê o texto inteiro da página e aceita ``text`` já pronto como segundo argumento.
+    scans_full_text: bool = False
+    # Busca os metadados por API a partir do id do produto; ``None`` no retorno cai no scraping.
+    fetch_api: Callable[[str], Awaitable[dict[str, Any] | None]] | None = None
+
+
+@dataclass(frozen=True)
+class StoreSpec:
+    """Declaração leve de uma loja; o módulo do adaptador só é importado no primeiro uso."""
+
+    name: str
+    label: str
+    host_suffixes: tuple[str, ...]
+    module: str
+    brands: tuple[str, ...] = ()
+
+
+STORE_SPECS: tuple[StoreSpec, ...] = (
+    StoreSpec(
+        name="amazon",
+        label="Amazon",
+        host_suffixes=("amzn.to", "amzn.com", "a.co"),
+        module=".adapters.amazon",
+        brands=("amazon",),
+    ),
+    StoreSpec(
+        name="mercadolivre",
+        label="Mercado Livre",
+        host_suffixes=(),
+        module=".adapters.mercadolivre",
+        brands=("mercadolivre", "mercadolibre"),
+    ),
+    StoreSpec(
+        name="awin",
+        label="AWIN",
+        host_suffixes=("awin1.com", "awin.com"),
+        module=".adapters.awin",
+    ),
+)
+
+GENERIC_SPEC = StoreSpec(name=GENERIC_STORE, label="Genérica", host_suffixes=(), module=".adapters.generic")
+
+SUPPORTED_STORES = {spec.name: spec.label for spec in STORE_SPECS}
+
+_SPECS_BY_NAME = {spec.name: spec for spec in (*STORE_SPECS, GENERIC_SPEC)}
+_HOST_INDEX = {suffix: spec.name for spec in STORE_SPECS for suffix in spec.host_suffixes}
+_BRAND_INDEX = {brand: spec.name for spec in STORE_SPECS for brand in spec.brands}
+_ADAPTERS: dict[str, StoreAdapter] = {}
+
+
+def _host_of(url: str) -> str:
+    return (urlparse(url.strip()).hostname or "").lower()
+
+
+def _brand_of(labels: list[str]) -> str | None:
+    """Rótulo do domínio registrável: ``amazon`` em amazon.de, amazon.co.uk ou amazon.com.br."""
+    if len(labels) >= 3 and labels[-2] in ("com", "co") and len(labels[-1]) == 2:
+        return labels[-3]
+    if len(labels) >= 2:
+        return labels[-2]
+    return None
+
+
+def store_for_host(host: str) -> str | None:
+    labels = host.split(".")
+    for index in range(len(labels)):
+        store = _HOST_INDEX.get(".".join(labels[index:]))
+        if store:
+            return store
+    return _BRAND_INDEX.get(_brand_of(labels) or "")
+
 
 def detect_store(url: str) -> str:
-    parsed = urlparse(url.lower())
-    host = parsed.netloc
-    if "amazon" in host:
-        return "amazon"
-    if "mercadolivre" in host or "mlb" in parsed.path.lower():
+    store = store_for_host(_host_of(url))
+    if store:
+        return store
+    if "mlb" in urlparse(url).path.lower():
         return "mercadolivre"
-    if "awin" in host or "go.awin" in host:
-        return "awin"
-    return "generic"
+    return GENERIC_STORE
+
+
+def get_adapter(store: str | None) -> StoreAdapter:
+    name = store if store in _SPECS_BY_NAME else GENERIC_STORE
+    adapter = _ADAPTERS.get(name)
+    if adapter is None:
+        module = importlib.import_module(_SPECS_BY_NAME[name].module, __package__)
+        adapter = _ADAPTERS[name] = module.ADAPTER
+    return adapter
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+from decimal import Decimal, InvalidOperation
+from typing import Any, Iterator
+
+from bs4 import BeautifulSoup
+
+PRODUCT_TYPES = {"product", "productgroup", "individualproduct"}
+LIST_PRICE_TYPES = ("listprice", "strikethroughprice", "msrp")
+
+
+def _amount(value: Any) -> Decimal | None:
+    """Valor de preço em ``Decimal``: números passam direto; textos ("R$ 1.299,90", "1.299", "1299.90")
+    perdem moeda e espaços, e um único ``.`` seguido de exatamente 3 dígitos é separador de milhar."""
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float, Decimal)):
+        return Decimal(str(value))
+    raw = "".join(char for char in str(value) if char.isdigit() or char in ",.")
+    if "," in raw:
+        raw = raw.replace(".", "").replace(",", ".") if raw.rfind(",") > raw.rfind(".") else raw.replace(",", "")
+    elif raw.count(".") > 1 or (raw.count(".") == 1 and len(raw.rsplit(".", 1)[1]) == 3):
+        raw = raw.replace(".", "")  # "1.299": separador de milhar
+    try:
+        return Decimal(raw)
+    except InvalidOperation:
+        return None
+
+
+def format_price(value: Any, currency: str | None = None) -> str | None:
+    amount = _amount(value)
+    if amount is None:
+        return None
+    formatted = f"{amount:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+    currency = (currency or "BRL").upper()
+    if currency == "BRL":
+        return f"R$ {formatted}"
+    return f"{currency} {formatted}"
+
+
+def price_cents(value: str | None) -> int | None:
+    """Preço exibido ("R$ 1.299,90") em centavos (129990), para filtros numéricos."""
+    amount = _amount(value) if value else None
+    return None if amount is None else int(amount * 100)
+
+
+def _iter_nodes(data: Any) -> Iterator[dict[str, Any]]:
+    if isinstance(data, list):
+        for item in data:
+            yield from _iter_nodes(item)
+    elif isinstance(data, dict):
+        yield data
+        if "@graph" in data:
+            yield from _iter_nodes(data["@graph"])
+
+
+def _is_product(node: dict[str, Any]) -> bool:
+    types = node.get("@type")
+    if isinstance(types, str):
+        types = [types]
+    return any(str(item).lower() in PRODUCT_TYPES for item in types or [])
+
+
+def _first(value: Any) -> Any:
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _image_url(value: Any) -> str | None:
+    value = _first(value)
+    if isinstance(value, dict):
+        value = value.get("url") or value.get("contentUrl")
+    return str(value).strip() if value else None
+
+
+def _list_price(offer: dict[str, Any]) -> Any:
+    for spec in offer.get("priceSpecification") or []:
+        if isinstance(spec, dict) and any(kind in str(spec.get("priceType", "")).lower() for kind in LIST_PRICE_TYPES):
+            return spec.get("price")
+    return None
+
+
+def _from_json_ld(soup: BeautifulSoup) -> dict[str, Any] | None:
+    for script in soup.find_all("script", attrs={"type": "application/ld+json"}):
+        try:
+            data = json.loads(script.string or script.get_text() or "null")
+        except (TypeError, ValueError):
+            continue
+        for node in _iter_nodes(data):
+            if not _is_product(node):
+                continue
+            offer = _first(node.get("offers")) or {}
+            if not isinstance(offer, dict):
+                offer = {}
+            currency = offer.get("priceCurrency")
+            price = offer.get("price", offer.get("lowPrice"))
+            return {
+                "title": (node.get("name") or "").strip() or None,
+                "image": _image_url(node.get("image")),
+                "price": format_price(price, currency),
+                "price_original": format_price(_list_price(offer), currency),
+                "currency": currency,
+                "source": "json-ld",
+            }
+    return None
+
+
+def _itemprop_value(scope: Any, name: str) -> str | None:
+    el = scope.find(attrs={"itemprop": name})
+    if el is None:
+        return None
+    value = el.get("content") or el.get("src") or el.get("href") or el.get_text(" ", strip=True)
+    return value.strip() if value else None
+
+
+def _from_microdata(soup: BeautifulSoup) -> dict[str, Any] | None:
+    scope = soup.find(attrs={"itemtype": lambda value: bool(value) and "schema.org/product" in value.lower()})
+    if scope is None:
+        return None
+    price = _itemprop_value(scope, "price") or _itemprop_value(scope, "lowPrice")
+    if not price:
+        return None
+    currency = _itemprop_value(scope, "priceCurrency")
+    return {
+        "title": _itemprop_value(scope, "name"),
+        "image": _itemprop_value(scope, "image"),
+        "price": format_price(price, currency),
+        "price_original": None,
+        "currency": currency,
+        "source": "microdata",
+    }
+
+
+def _meta_content(soup: BeautifulSoup, *properties: str) -> str | None:
+    for prop in properties:
+        meta = soup.find("meta", attrs={"property": prop})
+        if meta and meta.get("content"):
+            return meta["content"].strip()
+    return None
+
+
+def _from_meta(soup: BeautifulSoup) -> dict[str, Any] | None:
+    price = _meta_content(soup, "product:price:amount", "og:price:amount")
+    if not price:
+        return None
+    currency = _meta_content(soup, "product:price:currency", "og:price:currency")
+    return {
+        "title": None,
+        "image": None,
+        "price": format_price(price, currency),
+        "price_original": None,
+        "currency": currency,
+        "source": "meta",
+    }
+
+
+def extract_structured_data(soup: BeautifulSoup) -> dict[str, Any]:
+    """Lê JSON-LD, microdata e metatags de preço; devolve {} quando nenhum traz preço."""
+    for extractor in (_from_json_ld, _from_microdata, _from_meta):
+        data = extractor(soup)
+        if data and data.get("price"):
+            return data
+    return {}
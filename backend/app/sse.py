@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+
+def format_sse(event: str, data: str) -> str:
+    """Monta um evento Server-Sent Events; cada linha do payload vira um campo ``data:``."""
+    lines = "\n".join(f"data: {line}" for line in data.splitlines() or [""])
+    return f"event: {event}\n{lines}\n\n"
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse, Response
+from starlette.types import Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".svg", ".txt", ".html", ".json", ".map"}
+ENCODING_SUFFIXES = {"gzip": "gz", "br": "br"}
+
+
+@dataclass(frozen=True)
+class Asset:
+    path: str
+    hashed_path: str
+    media_type: str
+    digest: str
+    bodies: dict[str, bytes] = field(default_factory=dict)
+
+    def etag(self, encoding: str) -> str:
+        suffix = ENCODING_SUFFIXES.get(encoding)
+        return f'"{self.digest}-{suffix}"' if suffix else f'"{self.digest}"'
+
+
+def _hashed_name(path: PurePosixPath, digest: str) -> str:
+    return str(path.with_name(f"{path.stem}.{digest}{path.suffix}"))
+
+
+def _compressed_variants(data: bytes) -> dict[str, bytes]:
+    variants = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(data, quality=11)
+    return {encoding: body for encoding, body in variants.items() if len(body) < len(data)}
+
+
+def build_assets(directory: Path) -> dict[str, Asset]:
+    """Lê ``directory`` uma vez: cada arquivo ganha um nome com o hash do conteúdo e, se for texto,
+    versões gzip (e brotli, com o pacote ``brotli``) já comprimidas."""
+    assets: dict[str, Asset] = {}
+    for file in sorted(directory.rglob("*")):
+        if not file.is_file():
+            continue
+        data = file.read_bytes()
+        relative = PurePosixPath(file.relative_to(directory).as_posix())
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        bodies = {"identity": data}
+        if relative.suffix.lower() in COMPRESSIBLE_SUFFIXES:
+            bodies.update(_compressed_variants(data))
+        media_type = mimetypes.guess_type(relative.name)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type in {"application/javascript", "image/svg+xml"}:
+            media_type = f"{media_type}; charset=utf-8"
+        assets[str(relative)] = Asset(str(relative), _hashed_name(relative, digest), media_type, digest, bodies)
+    return assets
+
+
+def accepted_encodings(header: str) -> dict[str, float]:
+    """``Accept-Encoding`` em ``{codificação: q}``."""
+    accepted: dict[str, float] = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(asset: Asset, accept_encoding: str) -> str:
+    accepted = accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    for encoding in ("br", "gzip"):
+        if encoding in asset.bodies and accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return "identity"
+
+
+class StaticAssets:
+    """Arquivos de ``app/static`` servidos da memória, já comprimidos.
+
+    O nome com hash (``css/styles.<hash>.css``, gerado por ``static_url``) é imutável e vai com cache
+    de um ano; o nome original continua respondendo, mas com revalidação por ETag a cada uso.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.assets = build_assets(directory)
+        self._by_hashed = {asset.hashed_path: asset for asset in self.assets.values()}
+
+    def url(self, path: str) -> str:
+        asset = self.assets.get(path.lstrip("/"))
+        return f"/static/{asset.hashed_path if asset else path.lstrip('/')}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        response = self.response(scope)
+        await response(scope, receive, send)
+
+    def response(self, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            return PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+        path, root_path = scope["path"], scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path) :]
+        path = path.lstrip("/")
+        asset = self._by_hashed.get(path)
+        cache_control = IMMUTABLE_CACHE
+        if asset is None:
+            asset = self.assets.get(path)
+            cache_control = REVALIDATE_CACHE
+        if asset is None:
+            return PlainTextResponse("Not Found", status_code=404)
+
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(asset, request_headers.get("accept-encoding", ""))
+        etag = asset.etag(encoding)
+        headers = {"Cache-Control": cache_control, "ETag": etag, "Vary": "Accept-Encoding"}
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        if etag in request_headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        return Response(asset.bodies[encoding], headers=headers, media_type=asset.media_type)
+
+
+static_assets = StaticAssets(STATIC_DIR)
+
+
+def static_url(path: str) -> str:
+    """URL com hash de um arquivo de ``app/static`` (helper ``static_url`` dos templates Jinja)."""
+    return static_assets.url(path)
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import tempfile
+from typing import AsyncIterator
+
+from fastapi import HTTPException, Request, UploadFile, status
+
+CHUNK_SIZE = 64 * 1024
+
+
+async def spool_upload(request: Request) -> tuple[UploadFile, str]:
+    """Grava o upload em arquivo temporário (só o primeiro MB fica em memória) antes de responder.
+
+    O corpo cru não pode ser lido dentro da ``StreamingResponse``: o Starlette passa a consumir
+    ``receive()`` esperando a desconexão, e clientes HTTP/1.1 só leem a resposta depois de enviar tudo.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Envie o arquivo no campo 'file'")
+        return upload, upload.filename or content_type
+    upload = UploadFile(file=tempfile.SpooledTemporaryFile(max_size=1024 * 1024))
+    async for chunk in request.stream():
+        await upload.write(chunk)
+    await upload.seek(0)
+    return upload, content_type
+
+
+async def read_chunks(upload: UploadFile) -> AsyncIterator[bytes]:
+    try:
+        while chunk := await upload.read(CHUNK_SIZE):
+            yield chunk
+    finally:
+        await upload.close()
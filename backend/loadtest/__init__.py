@@ -0,0 +1 @@
+"""Harness de carga com servidor local que simula páginas de lojas."""
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import argparse
+import json
+
+from .fake_store import FakeStoreConfig
+from .runner import LoadTestConfig, run_load_test
+
+
+def _parse_mix(raw: str) -> dict[str, float]:
+    mix: dict[str, float] = {}
+    for part in raw.split(","):
+        store, _, weight = part.partition("=")
+        mix[store.strip()] = float(weight or 1)
+    return mix
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Teste de carga do endpoint de prévia de ofertas")
+    parser.add_argument("--rps", type=float, default=20.0, help="taxa alvo de requisições por segundo")
+    parser.add_argument("--duration", type=float, default=30.0, help="duração do teste em segundos")
+    parser.add_argument("--endpoint", default="/api/offers/preview")
+    parser.add_argument("--target", help="URL de uma API já em execução (ex.: http://127.0.0.1:8000)")
+    parser.add_argument("--mix", default="amazon=0.5,mercadolivre=0.5", help="proporção de lojas, ex.: amazon=3,generic=1")
+    parser.add_argument("--catalog-size", type=int, default=500)
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="latência média das páginas simuladas")
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--page-kb", type=int, default=250, help="tamanho aproximado de cada página")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração de respostas 503 da loja simulada")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", action="store_true", help="imprime o relatório em JSON")
+    args = parser.parse_args()
+
+    config = LoadTestConfig(
+        rps=args.rps,
+        duration=args.duration,
+        endpoint=args.endpoint,
+        target=args.target,
+        store_mix=_parse_mix(args.mix),
+        catalog_size=args.catalog_size,
+        max_in_flight=args.max_in_flight,
+        fake_store=FakeStoreConfig(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            page_kb=args.page_kb,
+            error_rate=args.error_rate,
+            seed=args.seed,
+        ),
+    )
+    report = run_load_test(config)
+    if args.json:
+        print(json.dumps(report.as_dict(), indent=2))
+    else:
+        print(report.format())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import argparse
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.responses import FastJSONResponse
+from app.schemas import LEAN_PREVIEW_FIELDS, OfferPreviewResponse
+
+from .fake_store import render_product_page
+
+
+def sample_preview(index: int = 0) -> dict:
+    text = render_product_page("amazon", f"AM{index:08d}", page_kb=2)
+    return {
+        "title": f"Fritadeira Air Fryer 4L Digital AM{index:08d}",
+        "store": "amazon",
+        "affiliate_url": f"https://www.amazon.com.br/dp/B0{index:08d}?tag=grupo-20",
+        "short_url": f"https://go.example/{index:08x}",
+        "price": "R$ 399,90",
+        "price_original": "R$ 599,90",
+        "benefits": ["• Frete GRÁTIS para membros Prime", "• Garantia de 12 meses", "💳 10x de R$ 39,99 sem juros"],
+        "image": "https://m.media-amazon.com/images/I/example.jpg",
+        "text": "🍟 Crocância garantida, preço em dieta.\n\n🛍️ Fritadeira Air Fryer\n\n💰 De R$ 599,90 por R$ 399,90\n\n👉 https://go.example/x",
+        "metadata": {
+            "store": "amazon",
+            "title": "Fritadeira Air Fryer 4L Digital",
+            "price": "R$ 399,90",
+            "raw_prices": ["R$ 399,90", "R$ 599,90", "R$ 39,99"],
+            "raw_text_excerpt": text[:1000],
+        },
+    }
+
+
+def _full(item: dict) -> dict:
+    return jsonable_encoder(OfferPreviewResponse(**item))
+
+
+def _lean(item: dict) -> dict:
+    return {key: item[key] for key in LEAN_PREVIEW_FIELDS}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compara serialização das respostas de prévia")
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    single = sample_preview()
+    batch = [sample_preview(index) for index in range(args.batch)]
+    cases = {
+        "single/full/json": lambda: JSONResponse(_full(single)),
+        "single/full/fast": lambda: FastJSONResponse(_full(single)),
+        "single/lean/fast": lambda: FastJSONResponse(_lean(single)),
+        f"batch{args.batch}/full/json": lambda: JSONResponse([_full(item) for item in batch]),
+        f"batch{args.batch}/full/fast": lambda: FastJSONResponse([_full(item) for item in batch]),
+        f"batch{args.batch}/lean/fast": lambda: FastJSONResponse([_lean(item) for item in batch]),
+    }
+    print(f"Serializador rápido: {FastJSONResponse.__name__}")
+    for name, func in cases.items():
+        number = args.number if name.startswith("single") else max(1, args.number // args.batch)
+        elapsed = timeit.timeit(func, number=number) / number
+        size = len(func().body)
+        print(f"{name:<24} {elapsed * 1e6:10.1f} µs  {size:>8} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import random
+from dataclasses import dataclass
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+FILLER_BLOCK = (
+    "<div class=\"a-section\"><p>Descrição detalhada do produto com especificações técnicas, "
+    "garantia do fabricante, dimensões, peso e informações de envio para todo o Brasil.</p></div>\n"
+)
+
+AMAZON_PAGE = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8" />
+<title>Amazon.com.br: {title}</title>
+<meta property="og:title" content="{title}" />
+<meta property="og:image" content="https://m.media-amazon.com/images/I/{item_id}.jpg" />
+</head>
+<body>
+<h1 id="title">{title}</h1>
+<span class="a-price apexPriceToPay"><span class="a-offscreen">R$ {price}</span></span>
+<span class="a-price a-text-price"><span class="a-offscreen">R$ {price_original}</span></span>
+<ul>
+<li>Frete GRÁTIS para membros Prime</li>
+<li>Em até 10x de R$ {installment} sem juros</li>
+<li>Garantia de 12 meses</li>
+</ul>
+{filler}
+</body>
+</html>
+"""
+
+MERCADOLIVRE_PAGE = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8" />
+<title>{title} | Mercado Livre</title>
+<meta property="og:title" content="{title}" />
+<meta property="og:image" content="https://http2.mlstatic.com/D_NQ_NP_{item_id}-O.webp" />
+<meta name="twitter:data1" content="R$ {price}" />
+</head>
+<body>
+<h1 class="ui-pdp-title">{title}</h1>
+<span class="price-tag-strike">R$ {price_original}</span>
+<ul>
+<li>Chegará grátis amanhã</li>
+<li>10x de R$ {installment} sem juros</li>
+</ul>
+{filler}
+</body>
+</html>
+"""
+
+GENERIC_PAGE = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8" />
+<title>{title}</title>
+</head>
+<body>
+<h1>{title}</h1>
+<p>De R$ {price_original} por R$ {price}</p>
+{filler}
+</body>
+</html>
+"""
+
+PAGES = {
+    "amazon": AMAZON_PAGE,
+    "mercadolivre": MERCADOLIVRE_PAGE,
+    "generic": GENERIC_PAGE,
+}
+
+PRODUCT_NAMES = [
+    "Fritadeira Air Fryer 4L Digital",
+    "Smart TV 50\" 4K UHD WebOS",
+    "Creatina Monohidratada 300g",
+    "Desodorante Antitranspirante Aerosol 150ml",
+    "Fone de Ouvido Bluetooth com Cancelamento de Ruído",
+]
+
+
+@dataclass
+class FakeStoreConfig:
+    latency_ms: float = 150.0
+    jitter_ms: float = 50.0
+    page_kb: int = 250
+    error_rate: float = 0.0
+    seed: int | None = None
+    # Stub da API do Mercado Livre (``/ml-api``): validade do token emitido, em segundos.
+    ml_token_ttl: int = 3600
+
+
+def _format_brl(cents: int) -> str:
+    reais, cents = divmod(cents, 100)
+    return f"{reais:,}".replace(",", ".") + f",{cents:02d}"
+
+
+def product_values(item_id: str) -> tuple[str, int, int]:
+    """Título, preço e preço original (centavos) determinísticos por item."""
+    rng = random.Random(item_id)
+    price_cents = rng.randint(2_000, 500_000)
+    original_cents = price_cents + rng.randint(1_000, 100_000)
+    return f"{rng.choice(PRODUCT_NAMES)} {item_id}", price_cents, original_cents
+
+
+def render_product_page(store: str, item_id: str, page_kb: int) -> str:
+    title, price_cents, original_cents = product_values(item_id)
+    template = PAGES.get(store, GENERIC_PAGE)
+    filler_count = max(0, page_kb * 1024 // len(FILLER_BLOCK.encode("utf-8")))
+    return template.format(
+        title=title,
+        item_id=item_id,
+        price=_format_brl(price_cents),
+        price_original=_format_brl(original_cents),
+        installment=_format_brl(price_cents // 10),
+        filler=FILLER_BLOCK * filler_count,
+    )
+
+
+def ml_item_body(item_id: str) -> dict:
+    title, price_cents, original_cents = product_values(item_id)
+    return {
+        "id": item_id,
+        "title": title,
+        "price": price_cents / 100,
+        "original_price": original_cents / 100,
+        "currency_id": "BRL",
+        "thumbnail": f"https://http2.mlstatic.com/D_{item_id}-I.jpg",
+        "pictures": [{"secure_url": f"https://http2.mlstatic.com/D_NQ_NP_{item_id}-O.webp"}],
+        "shipping": {"free_shipping": True},
+    }
+
+
+def create_app(config: FakeStoreConfig | None = None) -> Starlette:
+    config = config or FakeStoreConfig()
+    rng = random.Random(config.seed)
+
+    async def product_page(request: Request):
+        store = request.path_params["store"]
+        item_id = request.path_params["item_id"]
+        delay = max(0.0, rng.gauss(config.latency_ms, config.jitter_ms)) / 1000 if config.jitter_ms else config.latency_ms / 1000
+        if delay:
+            await asyncio.sleep(delay)
+        if config.error_rate and rng.random() < config.error_rate:
+            return PlainTextResponse("Service Unavailable", status_code=503)
+        page_kb = int(request.query_params.get("kb", config.page_kb))
+        return HTMLResponse(render_product_page(store, item_id, page_kb))
+
+    async def ml_listing_page(request: Request):
+        item_id = request.path_params["listing"].split("-", 2)
+        return HTMLResponse(render_product_page("mercadolivre", "".join(item_id[:2]), config.page_kb))
+
+    async def ml_token(request: Request):
+        form = await request.form()
+        app.state.ml_api["token_requests"] += 1
+        if not form.get("client_id") or not form.get("client_secret"):
+            return JSONResponse({"message": "invalid_client"}, status_code=401)
+        token = f"APP_USR-{app.state.ml_api['token_requests']}"
+        app.state.ml_api["valid_tokens"].add(token)
+        return JSONResponse({"access_token": token, "token_type": "bearer", "expires_in": config.ml_token_ttl})
+
+    async def ml_items(request: Request):
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        if token not in app.state.ml_api["valid_tokens"]:
+            return JSONResponse({"message": "invalid_token"}, status_code=401)
+        ids = [item for item in request.query_params.get("ids", "").split(",") if item]
+        if len(ids) > 20:
+            return JSONResponse({"message": "max 20 ids"}, status_code=400)
+        app.state.ml_api["item_batches"].append(ids)
+        return JSONResponse(
+            [
+                {"code": 200, "body": ml_item_body(item_id)} if not item_id.endswith("404") else {"code": 404, "body": {}}
+                for item_id in ids
+            ]
+        )
+
+    app = Starlette(
+        routes=[
+            Route("/{store}/p/{item_id}", product_page),
+            Route("/mercadolivre/{listing}", ml_listing_page),
+            Route("/ml-api/oauth/token", ml_token, methods=["POST"]),
+            Route("/ml-api/items", ml_items),
+        ]
+    )
+    # Chamadas recebidas pelo stub da API, para os testes conferirem lotes e renovação do token.
+    app.state.ml_api = {"token_requests": 0, "valid_tokens": set(), "item_batches": []}
+    return app
+
+
+def product_url(base_url: str, store: str, item_id: str) -> str:
+    return f"{base_url.rstrip('/')}/{store}/p/{item_id}"
+
+
+def ml_item_url(base_url: str, item_id: str) -> str:
+    """URL no formato de anúncio do Mercado Livre (``/MLB-123-titulo``), reconhecida pelo canonicalizador."""
+    return f"{base_url.rstrip('/')}/mercadolivre/{item_id[:3]}-{item_id[3:]}-produto-_JM"
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+import uvicorn
+
+from .fake_store import FakeStoreConfig, create_app, product_url
+
+STORE_PATHS = {
+    "amazon": "amazon",
+    "mercadolivre": "mercadolivre",
+    "generic": "generic",
+}
+
+
+@dataclass
+class LoadTestConfig:
+    rps: float = 20.0
+    duration: float = 30.0
+    endpoint: str = "/api/offers/preview"
+    target: str | None = None
+    store_mix: dict[str, float] = field(default_factory=lambda: {"amazon": 0.5, "mercadolivre": 0.5})
+    catalog_size: int = 500
+    max_in_flight: int = 1000
+    request_timeout: float = 30.0
+    lag_interval: float = 0.05
+    fake_store: FakeStoreConfig = field(default_factory=FakeStoreConfig)
+
+
+@dataclass
+class LoadTestReport:
+    duration: float
+    sent: int
+    completed: int
+    errors: dict[str, int]
+    dropped: int
+    latencies: list[float]
+    loop_lag: list[float] | None
+
+    @property
+    def throughput(self) -> float:
+        return self.completed / self.duration if self.duration else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "duration_s": round(self.duration, 3),
+            "sent": self.sent,
+            "completed": self.completed,
+            "dropped": self.dropped,
+            "errors": dict(self.errors),
+            "throughput_rps": round(self.throughput, 2),
+            "latency_ms": _summary(self.latencies),
+        }
+        data["loop_lag_ms"] = _summary(self.loop_lag) if self.loop_lag is not None else None
+        return data
+
+    def format(self) -> str:
+        data = self.as_dict()
+        latency = data["latency_ms"]
+        lines = [
+            f"Duração: {data['duration_s']}s  enviadas: {self.sent}  concluídas: {self.completed}  descartadas: {self.dropped}",
+            f"Vazão: {data['throughput_rps']} req/s",
+            "Latência (ms): p50={p50} p95={p95} p99={p99} max={max}".format(**latency),
+        ]
+        if self.errors:
+            lines.append("Erros: " + ", ".join(f"{key}={value}" for key, value in sorted(self.errors.items())))
+        lag = data["loop_lag_ms"]
+        if lag is None:
+            lines.append("Lag do event loop: indisponível para alvo externo")
+        else:
+            lines.append("Lag do event loop (ms): p50={p50} p95={p95} p99={p99} max={max}".format(**lag))
+        return "\n".join(lines)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _summary(values: list[float]) -> dict[str, float]:
+    return {
+        "p50": round(percentile(values, 50) * 1000, 2),
+        "p95": round(percentile(values, 95) * 1000, 2),
+        "p99": round(percentile(values, 99) * 1000, 2),
+        "max": round(max(values) * 1000, 2) if values else 0.0,
+    }
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.samples: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - started - self.interval))
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+
+class BackgroundServer:
+    """Executa um app ASGI com uvicorn em uma thread dedicada."""
+
+    def __init__(self, app: Any, lag_interval: float | None = None) -> None:
+        self.port = _free_port()
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", loop="asyncio")
+        )
+        self.lag_monitor = LoopLagMonitor(lag_interval) if lag_interval else None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def _run(self) -> None:
+        asyncio.run(self._serve())
+
+    async def _serve(self) -> None:
+        if self.lag_monitor:
+            self.lag_monitor.start()
+        try:
+            await self.server.serve()
+        finally:
+            if self.lag_monitor:
+                self.lag_monitor.stop()
+
+    def __enter__(self) -> "BackgroundServer":
+        self._thread.start()
+        deadline = time.monotonic() + 15
+        while not self.server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("Servidor de teste não iniciou")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _load_app() -> Any:
+    if not os.environ.get("DATABASE_URL"):
+        db_path = os.path.join(tempfile.mkdtemp(prefix="grupo-loadtest-"), "loadtest.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    from app.main import app
+
+    return app
+
+
+def _build_payloads(config: LoadTestConfig, store_base_url: str) -> list[dict[str, Any]]:
+    rng = random.Random(42)
+    stores = list(config.store_mix)
+    weights = [config.store_mix[store] for store in stores]
+    payloads = []
+    for index in range(config.catalog_size):
+        store = rng.choices(stores, weights)[0]
+        item_id = f"{store[:2].upper()}{index:08d}"
+        payloads.append(
+            {
+                "url": product_url(store_base_url, STORE_PATHS.get(store, "generic"), item_id),
+                "store": store,
+                "coupon": "LOADTEST" if index % 5 == 0 else None,
+            }
+        )
+    return payloads
+
+
+async def drive(config: LoadTestConfig, target: str, payloads: list[dict[str, Any]]) -> LoadTestReport:
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    sent = dropped = 0
+    in_flight: set[asyncio.Task] = set()
+    limits = httpx.Limits(max_connections=config.max_in_flight, max_keepalive_connections=config.max_in_flight)
+
+    async with httpx.AsyncClient(base_url=target, timeout=config.request_timeout, limits=limits) as client:
+
+        async def fire(payload: dict[str, Any]) -> None:
+            started = time.perf_counter()
+            try:
+                response = await client.post(config.endpoint, json=payload)
+            except httpx.HTTPError as exc:
+                key = type(exc).__name__
+                errors[key] = errors.get(key, 0) + 1
+                return
+            if response.status_code >= 400:
+                key = f"HTTP {response.status_code}"
+                errors[key] = errors.get(key, 0) + 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+        interval = 1.0 / config.rps
+        started = time.perf_counter()
+        next_at = started
+        while next_at - started < config.duration:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(in_flight) >= config.max_in_flight:
+                dropped += 1
+            else:
+                task = asyncio.create_task(fire(payloads[sent % len(payloads)]))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+                sent += 1
+            next_at += interval
+        if in_flight:
+            await asyncio.wait(in_flight)
+        elapsed = time.perf_counter() - started
+
+    return LoadTestReport(
+        duration=elapsed,
+        sent=sent,
+        completed=len(latencies),
+        errors=errors,
+        dropped=dropped,
+        latencies=latencies,
+        loop_lag=None,
+    )
+
+
+def run_load_test(config: LoadTestConfig) -> LoadTestReport:
+    with BackgroundServer(create_app(config.fake_store)) as store_server:
+        payloads = _build_payloads(config, store_server.base_url)
+        if config.target:
+            return asyncio.run(drive(config, config.target, payloads))
+        with BackgroundServer(_load_app(), lag_interval=config.lag_interval) as api_server:
+            report = asyncio.run(drive(config, api_server.base_url, payloads))
+            report.loop_lag = list(api_server.lag_monitor.samples)
+            return report
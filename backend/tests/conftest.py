@@ -0,0 +1,4 @@
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='grupo-tests-')}/test.db")
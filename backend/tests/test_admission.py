@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+
+from app.config import settings
+from app.services import metadata
+from app.services.admission import ByteBudget
+from app.services.metadata import fetch_metadata
+from app.services.metrics import metrics
+from loadtest.fake_store import FakeStoreConfig, create_app, product_url
+from loadtest.runner import BackgroundServer
+
+
+def test_byte_budget_weights_by_size_and_skips_cancelled_waiters():
+    async def scenario():
+        budget = ByteBudget(100)
+        active, peak = [0], [0]
+
+        async def work(nbytes):
+            async with budget.reserve(nbytes):
+                active[0] += 1
+                peak[0] = max(peak[0], budget.in_use)
+                await asyncio.sleep(0.01)
+                active[0] -= 1
+
+        await asyncio.gather(*(work(30) for _ in range(6)))
+        assert peak[0] == 90
+
+        async with budget.reserve(500) as weight:  # maior que o orçamento: entra sozinha
+            assert weight == 100
+            waiter = asyncio.create_task(work(10))
+            await asyncio.sleep(0)
+            assert budget.waiting == 1
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            assert budget.waiting == 0
+        assert budget.in_use == 0
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_parsing_is_limited_by_page_size(monkeypatch):
+    # ~62 KB por página × 12 ≈ 750 KB estimados: com 2 MB de orçamento, no máximo duas leituras juntas.
+    monkeypatch.setattr(settings, "parse_memory_budget_mb", 2)
+    lock, running, peak = threading.Lock(), [0], [0]
+    original = metadata.extract_metadata
+
+    def tracked(html, store, parts=None):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        try:
+            time.sleep(0.05)
+            return original(html, store, parts)
+        finally:
+            with lock:
+                running[0] -= 1
+
+    monkeypatch.setattr(metadata, "extract_metadata", tracked)
+    metrics.reset()
+    with BackgroundServer(create_app(FakeStoreConfig(latency_ms=0, jitter_ms=0, page_kb=60))) as server:
+        urls = [product_url(server.base_url, "amazon", f"AM0000050{index}") for index in range(6)]
+
+        async def scenario():
+            return await asyncio.gather(*(fetch_metadata(url, "amazon") for url in urls))
+
+        results = asyncio.run(scenario())
+
+    assert peak[0] == 2 and all(result["price"] for result in results)
+    rendered = metrics.render()
+    assert 'parse_queue_wait_ms_count{store="amazon"} 6' in rendered
+    assert 'parse_memory_bytes_max{store="amazon"}' in rendered
+    assert "parse_memory_in_use_bytes 0" in rendered
@@ -0,0 +1,36 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.services.integrations import get_integration, upsert_integration
+from app.services.query_budget import assert_max_queries
+
+
+def test_rewrite_streams_ndjson_with_one_integration_snapshot():
+    with TestClient(app) as client:
+        with SessionLocal() as session:
+            amazon = get_integration(session, "amazon")
+            label, original = amazon.label, dict(amazon.data or {})
+            upsert_integration(session, "amazon", label, {"tag": "novatag-20"})
+
+        urls = [f"https://www.amazon.com.br/dp/B{index:09d}?tag=velha-20" for index in range(20_000)]
+        urls += ["nao-e-url", "https://produto.mercadolivre.com.br/MLB-123-x"]
+        response = client.post("/api/affiliate/rewrite", content="\n".join(urls).encode(), headers={"content-type": "text/plain"})
+        assert response.status_code == 200
+        assert_max_queries(response, 2)
+        results = [json.loads(line) for line in response.text.splitlines()]
+
+        body = "\n".join([json.dumps({"url": urls[0]}), "{quebrado", json.dumps(urls[-1])])
+        ndjson = client.post("/api/affiliate/rewrite", content=body.encode(), headers={"content-type": "application/x-ndjson"})
+        ndjson_results = [json.loads(line) for line in ndjson.text.splitlines()]
+
+        with SessionLocal() as session:
+            upsert_integration(session, "amazon", label, original)
+
+    assert len(results) == 20_002 and [item["row"] for item in results[:3]] == [1, 2, 3]
+    assert results[0]["store"] == "amazon" and results[0]["affiliate_url"].endswith("?tag=novatag-20")
+    assert results[20_000] == {"row": 20_001, "url": "nao-e-url", "error": "URL inválida"}
+    assert results[20_001]["store"] == "mercadolivre"
+    assert [("error" in item) for item in ndjson_results] == [False, True, False]
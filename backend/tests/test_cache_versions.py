@@ -0,0 +1,53 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base
+from app.models import TransformationRule
+from app.services.cache_versions import RULES, VersionedCache, bump_version, ensure_cache_versions, version_tracker
+
+
+def _names(session):
+    return [rule.name for rule in session.query(TransformationRule).order_by(TransformationRule.id).all()]
+
+
+def test_versioned_cache_reloads_only_after_bump(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(settings, "cache_version_check_ms", 60_000)
+
+    with Session() as session:
+        ensure_cache_versions(session)
+        cache = VersionedCache(RULES, _names)
+        assert cache.get(session) == []
+
+        session.add(TransformationRule(name="sem-bump"))
+        session.commit()
+        assert cache.get(session) == []
+
+        session.add(TransformationRule(name="com-bump"))
+        bump_version(session, RULES)
+        session.commit()
+        assert cache.get(session) == ["sem-bump", "com-bump"]
+
+
+def test_other_worker_bump_is_seen_after_check_interval(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(settings, "cache_version_check_ms", 60_000)
+
+    with Session() as session:
+        ensure_cache_versions(session)
+        cache = VersionedCache(RULES, _names)
+        assert cache.get(session) == []
+
+        with engine.begin() as other_worker:
+            other_worker.execute(text("INSERT INTO transformation_rules (name, conditions, actions, created_at, updated_at) VALUES ('remota', '{}', '{}', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"))
+            other_worker.execute(text("UPDATE cache_versions SET version = version + 1 WHERE entity = 'rules'"))
+        assert cache.get(session) == []
+
+        monkeypatch.setattr(settings, "cache_version_check_ms", 0)
+        assert cache.get(session) == ["remota"]
+        version_tracker.mark_stale()
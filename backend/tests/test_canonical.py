@@ -0,0 +1,106 @@
+import asyncio
+
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse
+from starlette.routing import Route
+
+from app.services import canonical
+from app.services.canonical import canonicalize, product_key, resolve_canonical
+from app.services.metadata import fetch_metadata
+from app.services.shortener import local_short_link
+from loadtest.runner import BackgroundServer
+
+
+def test_amazon_variants_share_one_key_and_fetch_url():
+    variants = [
+        "https://www.amazon.com.br/dp/B0C1234567",
+        "https://www.amazon.com.br/Fone-Bluetooth/dp/B0C1234567/ref=sr_1_3?keywords=fone&qid=1&th=1",
+        "https://amazon.com.br/gp/product/B0C1234567?tag=outro-20&utm_source=x#reviews",
+        "https://www.amazon.com.br/gp/aw/d/b0c1234567/",
+    ]
+    results = {canonicalize(url) for url in variants}
+    keys = {item.key for item in results}
+    assert keys == {"amazon:amazon.com.br:B0C1234567"}
+    assert {item.url for item in results} <= {"https://www.amazon.com.br/dp/B0C1234567", "https://amazon.com.br/dp/B0C1234567"}
+    assert product_key("https://www.amazon.de/dp/B0C1234567") == "amazon:amazon.de:B0C1234567"
+
+
+def test_mercadolivre_item_and_catalog_ids():
+    item = canonicalize("https://produto.mercadolivre.com.br/MLB-1234567890-fone-_JM?searchVariation=1#position=2")
+    assert item.key == "mercadolivre:MLB1234567890" and item.product_id == "MLB1234567890"
+    assert item.url == "https://produto.mercadolivre.com.br/MLB-1234567890-fone-_JM"
+    assert product_key("https://www.mercadolivre.com.br/fone/p/MLB19876543?pdp_filters=x") == "mercadolivre:p:MLB19876543"
+    assert product_key("https://articulo.mercadolibre.com.ar/MLA-998877665-x") == "mercadolivre:MLA998877665"
+
+
+def test_generic_urls_keep_meaningful_params_and_short_links_follow_product():
+    assert canonicalize("https://Loja.example.com/item/?cor=azul&utm_campaign=x&type=1").url == "https://loja.example.com/item/?cor=azul&type=1"
+    assert product_key("https://loja.example.com/item/?utm_source=a") == product_key("https://www.loja.example.com/item")
+    assert local_short_link("https://www.amazon.com.br/dp/B0C1234567?tag=a-20") == local_short_link(
+        "https://amazon.com.br/gp/product/B0C1234567?ref=abc"
+    )
+
+
+def test_short_links_resolve_once(monkeypatch):
+    calls = []
+
+    async def follow(url):
+        calls.append(url)
+        return "https://www.amazon.com.br/dp/B0C7654321?ref_=x"
+
+    monkeypatch.setattr(canonical, "_follow_short_link", follow)
+    monkeypatch.setattr(canonical, "_resolved", canonical.OrderedDict())
+
+    async def scenario():
+        return [await resolve_canonical("https://amzn.to/3abcd") for _ in range(3)]
+
+    results = asyncio.run(scenario())
+    assert calls == ["https://amzn.to/3abcd"]
+    assert {item.key for item in results} == {"amazon:amazon.com.br:B0C7654321"}
+
+
+def test_concurrent_fetches_of_same_product_share_download():
+    hits = []
+
+    async def page(request):
+        hits.append(str(request.url))
+        await asyncio.sleep(0.2)
+        return HTMLResponse("<html><head><title>Produto</title></head><body>R$ 10,00</body></html>")
+
+    server_app = Starlette(routes=[Route("/item", page)])
+    with BackgroundServer(server_app) as server:
+
+        async def scenario():
+            urls = [f"{server.base_url}/item?utm_source={index}" for index in range(4)]
+            return await asyncio.gather(*(fetch_metadata(url, "generic") for url in urls))
+
+        results = asyncio.run(scenario())
+
+    assert len(hits) == 1
+    assert len({id(item) for item in results}) == 4
+    assert {item["product_key"] for item in results} == {results[0]["product_key"]}
+
+
+def test_cancelling_the_first_fetch_keeps_the_shared_download():
+    hits = []
+
+    async def page(request):
+        hits.append(str(request.url))
+        await asyncio.sleep(0.2)
+        return HTMLResponse("<html><head><title>Produto</title></head><body>R$ 10,00</body></html>")
+
+    server_app = Starlette(routes=[Route("/cancelado", page)])
+    with BackgroundServer(server_app) as server:
+
+        async def scenario():
+            first = asyncio.ensure_future(fetch_metadata(f"{server.base_url}/cancelado?utm_source=a", "generic"))
+            await asyncio.sleep(0.05)
+            second = asyncio.ensure_future(fetch_metadata(f"{server.base_url}/cancelado?utm_source=b", "generic"))
+            await asyncio.sleep(0.05)
+            first.cancel()
+            return first, await second
+
+        first, result = asyncio.run(scenario())
+
+    assert first.cancelled()
+    assert len(hits) == 1 and result["title"] == "Produto"
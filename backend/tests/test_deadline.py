@@ -0,0 +1,41 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from loadtest.fake_store import FakeStoreConfig, create_app, product_url
+from loadtest.runner import BackgroundServer
+
+
+def test_preview_degrades_within_deadline():
+    with BackgroundServer(create_app(FakeStoreConfig(latency_ms=600, jitter_ms=0, page_kb=5))) as store_server:
+        url = product_url(store_server.base_url, "amazon", "AM00000400")
+        payload = {"url": url, "store": "amazon", "coupon": "PRAZO"}
+        with TestClient(app) as client:
+            started = time.monotonic()
+            minimal = client.post("/api/offers/preview", json=payload, headers={"X-Deadline-Ms": "150"})
+            elapsed = time.monotonic() - started
+            assert minimal.status_code == 200 and elapsed < 0.5
+            body = minimal.json()
+            assert body["degraded"] == "minimal" and minimal.headers["x-degraded"] == "minimal"
+            assert body["missing_fields"] == ["title", "price", "image"]
+            assert "PRAZO" in body["text"] and body["short_url"] in body["text"]
+
+            fresh = client.post("/api/offers/preview", json=payload, headers={"X-Deadline-Ms": "5000"}).json()
+            assert fresh["degraded"] is None and fresh["price"]
+
+            cached = client.post(
+                "/api/offers/preview", params={"mode": "lean"}, json=payload, headers={"X-Deadline-Ms": "150"}
+            )
+            assert cached.headers["x-degraded"] == "cache" and fresh["title"] in cached.json()["text"]
+
+            assert client.post("/api/offers/preview", json=payload, headers={"X-Deadline-Ms": "0"}).status_code == 422
+
+
+def test_failed_fetch_with_deadline_still_returns_text():
+    with BackgroundServer(create_app(FakeStoreConfig(latency_ms=0, jitter_ms=0, error_rate=1.0))) as store_server:
+        payload = {"url": product_url(store_server.base_url, "generic", "GE00000401"), "overrides": {"title": "Cadeira Gamer"}}
+        with TestClient(app) as client:
+            body = client.post("/api/offers/preview", json=payload, headers={"X-Deadline-Ms": "2000"}).json()
+    assert body["degraded"] == "minimal" and body["missing_fields"] == ["price", "image"]
+    assert "Cadeira Gamer" in body["text"]
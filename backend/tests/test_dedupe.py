@@ -0,0 +1,53 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.services.dedupe import SEEN_POSTED, RecentOffers, offer_fingerprint, recent_offers
+from loadtest.fake_store import FakeStoreConfig, create_app, product_url
+from loadtest.runner import BackgroundServer
+
+
+def test_fingerprint_normalizes_price_and_coupon():
+    assert offer_fingerprint("amazon:br:B0X", "R$ 1.299,90", " promo ") == offer_fingerprint("amazon:br:B0X", "R$1299,90", "PROMO")
+    assert offer_fingerprint("amazon:br:B0X", "R$ 1.299,90", None) != offer_fingerprint("amazon:br:B0X", "R$ 1.199,90", None)
+    assert offer_fingerprint(None, "R$ 10,00", None) is None
+
+
+def test_recent_offers_expire_outside_window():
+    index = RecentOffers(window_seconds=100)
+    now = time.time()
+    old, fresh = offer_fingerprint("p:1", "R$ 1,00", None), offer_fingerprint("p:2", "R$ 2,00", None)
+    index.add(old, at=now - 150)
+    index.add(fresh, at=now - 50)
+    assert index.check(old) is None and len(index) == 1
+    assert index.check(fresh)["status"] == "generated"
+
+    index.add(fresh, SEEN_POSTED, at=now - 10)
+    seen = index.check(fresh)
+    assert seen["status"] == "posted" and seen["generated_count"] == 1 and seen["posted_count"] == 1
+    assert index.check(fresh, now=now + 60)["generated_count"] == 0  # a geração saiu da janela, o post não
+
+
+def test_preview_flags_repeated_offer_and_index_is_rebuilt():
+    with BackgroundServer(create_app(FakeStoreConfig(latency_ms=0, jitter_ms=0, page_kb=5))) as store_server:
+        url = product_url(store_server.base_url, "amazon", f"AM{time.time_ns() % 10**8:08d}")
+        payload = {"url": url, "store": "amazon", "coupon": "DUP10"}
+        with TestClient(app) as client:
+            first = client.post("/api/offers/preview", json=payload)
+            assert first.json()["duplicate"] is None and "x-duplicate-offer" not in first.headers
+
+            second = client.post("/api/offers/preview", json=payload)
+            duplicate = second.json()["duplicate"]
+            assert second.headers["x-duplicate-offer"] == "generated"
+            assert duplicate["status"] == "generated" and duplicate["generated_count"] == 1
+
+            other_coupon = client.post("/api/offers/preview", json={**payload, "coupon": "OUTRO"})
+            assert other_coupon.json()["duplicate"] is None
+
+            recent_offers.clear()
+            with SessionLocal() as session:
+                assert recent_offers.rebuild(session) >= 3
+            lean = client.post("/api/offers/preview", params={"mode": "lean"}, json=payload)
+            assert lean.headers["x-duplicate-offer"] == "generated"
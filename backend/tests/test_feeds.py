@@ -0,0 +1,96 @@
+import uuid
+import xml.etree.ElementTree as ET
+
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.config import settings
+from app.models import CacheVersion, OfferRecord
+from app.services.cache_versions import OFFERS
+from app.services.feeds import FEED_STORE, FeedRegistry, offer_feeds
+from app.services.history import record_offer
+from app.services.offer_builder import DEFAULT_TEMPLATE_SLUG
+
+
+def _record(store, title, template_slug=DEFAULT_TEMPLATE_SLUG):
+    preview = {
+        "title": title,
+        "price": "R$ 99,90",
+        "store": store,
+        "text": f"🔥 {title} <por> R$ 99,90",
+        "short_url": f"https://go.example/{uuid.uuid4().hex[:8]}",
+        "image": "https://img.example/p.jpg",
+    }
+    with SessionLocal() as session:
+        return record_offer(session, f"https://example.com/{uuid.uuid4().hex}", preview, {"store": store}, template_slug).id
+
+
+def test_store_feed_is_updated_incrementally_and_revalidated_by_etag():
+    offer_feeds.clear()
+    with TestClient(app) as client:
+        first = _record("amazon", "Kindle Paperwhite")
+        response = client.get("/feeds/stores/amazon.json")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/feed+json")
+        feed = response.json()
+        assert feed["version"].endswith("1.1") and feed["items"][0]["id"] == str(first)
+        assert feed["items"][0]["url"].startswith("https://go.example/") and feed["items"][0]["image"]
+        etag, last_modified = response.headers["etag"], response.headers["last-modified"]
+
+        assert client.get("/feeds/stores/amazon.json", headers={"If-None-Match": etag}).status_code == 304
+        assert client.get("/feeds/stores/amazon.json", headers={"If-Modified-Since": last_modified}).status_code == 304
+
+        _record("mercadolivre", "Echo Dot")
+        assert client.get("/feeds/stores/amazon.json", headers={"If-None-Match": etag}).status_code == 304
+
+        second = _record("amazon", "Fire TV Stick")
+        updated = client.get("/feeds/stores/amazon.json", headers={"If-None-Match": etag})
+        assert updated.status_code == 200 and updated.headers["etag"] != etag
+        assert [item["id"] for item in updated.json()["items"][:2]] == [str(second), str(first)]
+        assert all(item["tags"] == ["amazon"] for item in updated.json()["items"])
+
+        rss = client.get("/feeds/stores/amazon.xml")
+        assert rss.headers["content-type"].startswith("application/rss+xml")
+        channel = ET.fromstring(rss.content).find("channel")
+        items = channel.findall("item")
+        assert items[0].find("guid").text == f"offer-{second}"
+        assert items[0].find("description").text.endswith("<por> R$ 99,90")
+
+
+def test_all_and_template_feeds_and_unknown_feeds():
+    offer_feeds.clear()
+    with TestClient(app) as client:
+        assert client.get("/feeds/offers.json").status_code == 200
+        newest = _record("mercadolivre", "Air Fryer")
+        assert client.get("/feeds/offers.json").json()["items"][0]["id"] == str(newest)
+        template_feed = client.get(f"/feeds/templates/{DEFAULT_TEMPLATE_SLUG}.json").json()
+        assert template_feed["items"][0]["id"] == str(newest)
+
+        assert client.get("/feeds/templates/nao-existe.json").status_code == 404
+        assert client.get("/feeds/stores/nao-existe.json").status_code == 404
+        assert client.get("/feeds/stores/amazon.csv").status_code == 404
+
+
+def test_feeds_follow_offers_written_by_other_processes(monkeypatch):
+    offer_feeds.clear()
+    monkeypatch.setattr(settings, "cache_version_check_ms", 0)
+    with TestClient(app) as client:
+        _record("amazon", "Kindle Basic")
+        before = client.get("/feeds/stores/amazon.json")
+
+        # Outro worker: grava a oferta e incrementa a versão sem passar por este processo.
+        with SessionLocal() as session:
+            other = OfferRecord(url="https://example.com/outro", store="amazon", title="Echo Show", text="Echo Show", context={})
+            session.add(other)
+            session.query(CacheVersion).filter_by(entity=OFFERS).update({CacheVersion.version: CacheVersion.version + 1})
+            session.commit()
+            other_id = other.id
+
+        after = client.get("/feeds/stores/amazon.json", headers={"If-None-Match": before.headers["etag"]})
+        assert after.status_code == 200 and after.json()["items"][0]["id"] == str(other_id)
+
+        with SessionLocal() as session:
+            second_worker = FeedRegistry(settings.feed_size).get(session, FEED_STORE, "amazon", "Ofertas — Amazon")
+        assert second_worker.etag("json") == after.headers["etag"].removeprefix("W/")
+        assert client.get("/feeds/stores/amazon.json", headers={"If-None-Match": second_worker.etag("json")}).status_code == 304
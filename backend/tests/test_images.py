@@ -0,0 +1,89 @@
+import asyncio
+import io
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+
+from app.services.images import CHANNEL_SIZES, ImageCache
+from loadtest.runner import BackgroundServer
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _image_app(counter):
+    buffer = io.BytesIO()
+    Image.new("RGBA", (2000, 1500), (200, 30, 30, 255)).save(buffer, "PNG")
+
+    async def image(request):
+        counter.append(request.url.path)
+        return Response(buffer.getvalue(), media_type="image/png")
+
+    return Starlette(routes=[Route("/produto.png", image)])
+
+
+def test_variants_are_resized_cached_and_content_addressed(tmp_path):
+    downloads = []
+    cache = ImageCache(str(tmp_path), max_bytes=50 * 1024 * 1024)
+
+    with BackgroundServer(_image_app(downloads)) as server:
+        url = f"{server.base_url}/produto.png"
+
+        async def run():
+            first = await asyncio.gather(
+                cache.variants(url, ["telegram", "thumb"]),
+                cache.variants(url, ["telegram", "thumb"]),
+            )
+            second = await cache.variants(url, ["thumb", "telegram"])
+            return first, second
+
+        (first, again), second = asyncio.run(run())
+
+        restarted = ImageCache(str(tmp_path), max_bytes=50 * 1024 * 1024)
+        assert restarted.ready(url, ["telegram", "thumb"]) == first
+
+    assert downloads == ["/produto.png"]
+    assert first == again == second
+    digest = first["thumb"].rsplit("/", 1)[-1].removesuffix(".jpg")
+    with Image.open(io.BytesIO(cache.load(digest))) as thumb:
+        assert thumb.format == "JPEG"
+        assert thumb.size == (CHANNEL_SIZES["thumb"][0], 240)
+
+
+def test_schedule_returns_ready_variants_and_fills_the_rest_in_background(tmp_path):
+    cache = ImageCache(str(tmp_path), max_bytes=50 * 1024 * 1024)
+
+    with BackgroundServer(_image_app([])) as server:
+        url = f"{server.base_url}/produto.png"
+
+        async def run():
+            before = cache.schedule(url, ["whatsapp", "thumb"])
+            await cache.wait_background()
+            return before, cache.schedule(url, ["whatsapp", "thumb"])
+
+        before, after = asyncio.run(run())
+
+    assert before == {}
+    assert set(after) == {"whatsapp", "thumb"}
+
+
+def test_cancelling_the_first_download_keeps_it_for_the_others(tmp_path):
+    downloads = []
+    cache = ImageCache(str(tmp_path), max_bytes=50 * 1024 * 1024)
+
+    with BackgroundServer(_image_app(downloads)) as server:
+        url = f"{server.base_url}/produto.png"
+
+        async def run():
+            first = asyncio.ensure_future(cache.variants(url, ["thumb"]))
+            await asyncio.sleep(0)
+            second = asyncio.ensure_future(cache.variants(url, ["thumb"]))
+            await asyncio.sleep(0)
+            first.cancel()
+            return first, await second
+
+        first, result = asyncio.run(run())
+
+    assert first.cancelled()
+    assert downloads == ["/produto.png"] and set(result) == {"thumb"}
@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.jobs import JobQueue
+from loadtest.fake_store import FakeStoreConfig, create_app, product_url
+from loadtest.runner import BackgroundServer
+
+
+def test_job_lifecycle_against_fake_store():
+    with BackgroundServer(create_app(FakeStoreConfig(latency_ms=20, jitter_ms=0, page_kb=5))) as store_server:
+        with TestClient(app) as client:
+            url = product_url(store_server.base_url, "amazon", "AM00000042")
+            response = client.post("/api/offers/jobs", json={"url": url, "store": "amazon", "coupon": "JOB10"})
+            assert response.status_code == 202
+            job_id = response.json()["id"]
+
+            deadline = time.monotonic() + 10
+            job = response.json()
+            while job["status"] not in {"done", "failed"} and time.monotonic() < deadline:
+                time.sleep(0.05)
+                job = client.get(f"/api/offers/jobs/{job_id}").json()
+
+            assert job["status"] == "done", job
+            assert "JOB10" in job["result"]["text"]
+            assert job["attempts"] == 1
+
+            events = client.get(f"/api/offers/jobs/{job_id}/events").text
+            assert events.startswith("event: status")
+            assert '"status":"done"' in events
+
+
+def test_unknown_job_returns_404():
+    with TestClient(app) as client:
+        assert client.get("/api/offers/jobs/missing").status_code == 404
+
+
+def test_wait_finished_timeout_does_not_drop_other_waiters():
+    queue = JobQueue()
+
+    async def scenario():
+        patient = asyncio.create_task(queue.wait_finished("job-1", timeout=5))
+        await queue.wait_finished("job-1", timeout=0.01)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        queue._wake_waiters("job-1")
+        await patient
+        return loop.time() - started
+
+    assert asyncio.run(scenario()) < 1
+    assert queue._waiters == {}
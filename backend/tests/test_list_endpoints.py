@@ -0,0 +1,44 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.pagination import encode_cursor
+
+
+def test_templates_keyset_pages_and_etag_revalidation():
+    prefix = uuid.uuid4().hex[:6]
+    with TestClient(app) as client:
+        for index in range(3):
+            body = {"name": f"zz-{prefix}-{index}", "slug": f"{prefix}-{index}", "body": "{{ title }}"}
+            assert client.post("/api/templates/", json=body).status_code == 201
+
+        seen, after = [], None
+        while True:
+            params = {"limit": 2, **({"after": after} if after else {})}
+            response = client.get("/api/templates/", params=params)
+            seen += [item["name"] for item in response.json()]
+            after = response.headers.get("x-next-cursor")
+            if not after:
+                break
+        assert seen == sorted(seen) and len(seen) == len(set(seen))
+        assert [name for name in seen if prefix in name] == [f"zz-{prefix}-{index}" for index in range(3)]
+
+        first = client.get("/api/templates/")
+        etag = first.headers["etag"]
+        cached = client.get("/api/templates/", headers={"If-None-Match": etag})
+        assert cached.status_code == 304 and cached.content == b""
+
+        client.post("/api/templates/", json={"name": f"zz-{prefix}-new", "slug": f"{prefix}-new", "body": "x"})
+        changed = client.get("/api/templates/", headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+        assert client.get("/api/rules/", params={"after": "nao-e-cursor"}).status_code == 422
+
+
+def test_forged_cursor_with_non_scalar_values_is_rejected():
+    with TestClient(app) as client:
+        for forged in ([{"a": 1}, 1], [[1], 2], ["nome", {"id": 1}]):
+            response = client.get("/api/templates/", params={"after": encode_cursor(forged)})
+            assert response.status_code == 422
+        assert client.get("/api/offers/search", params={"after": encode_cursor([[1]])}).status_code == 422
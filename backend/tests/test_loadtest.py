@@ -0,0 +1,25 @@
+from bs4 import BeautifulSoup
+
+from app.services.adapters import amazon, mercadolivre
+from app.services.metadata import _extract_title
+from loadtest.fake_store import render_product_page
+from loadtest.runner import percentile
+
+
+def test_percentile_nearest_rank():
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 95) == 0.0
+
+
+def test_fake_store_pages_match_extractors():
+    amazon_soup = BeautifulSoup(render_product_page("amazon", "AM00000001", page_kb=1), "lxml")
+    price, original = amazon.extract_prices(amazon_soup)
+    assert price and price.startswith("R$ ")
+    assert original and original != price
+    assert _extract_title(amazon_soup).endswith("AM00000001")
+
+    ml_soup = BeautifulSoup(render_product_page("mercadolivre", "ME00000001", page_kb=1), "lxml")
+    price, original = mercadolivre.extract_prices(ml_soup)
+    assert price and original
@@ -0,0 +1,54 @@
+import asyncio
+
+from app.config import settings
+from app.services.metadata import fetch_metadata
+from loadtest.fake_store import FakeStoreConfig, create_app, ml_item_url
+from loadtest.runner import BackgroundServer
+
+
+def _configure(monkeypatch, base_url):
+    monkeypatch.setattr(settings, "default_ml_app_id", "app-id")
+    monkeypatch.setattr(settings, "default_ml_secret", "segredo")
+    monkeypatch.setattr(settings, "ml_api_base_url", f"{base_url}/ml-api")
+
+
+def test_concurrent_items_are_fetched_in_multiget_batches(monkeypatch):
+    stub = create_app(FakeStoreConfig(latency_ms=0, jitter_ms=0, page_kb=1))
+    with BackgroundServer(stub) as server:
+        _configure(monkeypatch, server.base_url)
+        ids = [f"MLB{1_000_000 + index}" for index in range(45)]
+
+        async def scenario():
+            return await asyncio.gather(*(fetch_metadata(ml_item_url(server.base_url, item_id)) for item_id in ids))
+
+        results = asyncio.run(scenario())
+
+    batches = stub.state.ml_api["item_batches"]
+    assert sorted(len(batch) for batch in batches) == [5, 20, 20]
+    assert stub.state.ml_api["token_requests"] == 1
+    assert all(item["structured_data"] == "mercadolivre_api" for item in results)
+    assert results[0]["product_key"] == "mercadolivre:MLB1000000" and results[0]["price"].startswith("R$ ")
+    assert results[0]["benefits"] == ["Frete grátis"]
+
+
+def test_token_refresh_and_scraping_fallback(monkeypatch):
+    stub = create_app(FakeStoreConfig(latency_ms=0, jitter_ms=0, page_kb=1))
+    with BackgroundServer(stub) as server:
+        _configure(monkeypatch, server.base_url)
+
+        async def scenario():
+            first = await fetch_metadata(ml_item_url(server.base_url, "MLB2000001"))
+            stub.state.ml_api["valid_tokens"].clear()  # token revogado: 401 força a renovação
+            second = await fetch_metadata(ml_item_url(server.base_url, "MLB2000002"))
+            missing = await fetch_metadata(ml_item_url(server.base_url, "MLB2000404"))
+            return first, second, missing
+
+        first, second, missing = asyncio.run(scenario())
+
+        monkeypatch.setattr(settings, "default_ml_secret", None)
+        scraped = asyncio.run(fetch_metadata(ml_item_url(server.base_url, "MLB2000003")))
+
+    assert first["structured_data"] == second["structured_data"] == "mercadolivre_api"
+    assert stub.state.ml_api["token_requests"] == 2
+    assert missing["structured_data"] != "mercadolivre_api" and missing["title"].endswith("MLB2000404")
+    assert scraped["structured_data"] != "mercadolivre_api" and len(stub.state.ml_api["item_batches"]) == 3
@@ -0,0 +1,52 @@
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.models import OfferRecord
+from app.services.history import record_offer
+from app.services.structured_data import price_cents
+
+
+def _record(session, marker, title, price, store="amazon"):
+    preview = {"title": f"{title} {marker}", "price": price, "store": store, "text": f"🔥 {title} por {price}"}
+    return record_offer(session, f"https://example.com/{uuid.uuid4().hex}", preview, {"store": store}, None).id
+
+
+def test_price_cents_parses_displayed_prices():
+    assert price_cents("R$ 1.299,90") == 129990
+    assert price_cents("R$ 299,00") == 29900
+    assert price_cents("1.299") == 129900
+    assert price_cents(None) is None and price_cents("sob consulta") is None
+
+
+def test_search_matches_words_with_store_price_and_date_filters():
+    marker = f"m{uuid.uuid4().hex[:10]}"
+    with TestClient(app) as client:
+        with SessionLocal() as session:
+            cheap = _record(session, marker, "Air Fryer Mondial 4L", "R$ 249,90")
+            _record(session, marker, "Air Fryer Philips Walita", "R$ 599,00")
+            _record(session, marker, "Fritadeira Elétrica sem óleo", "R$ 199,00", store="mercadolivre")
+            _record(session, marker, "Liquidificador Arno", "R$ 149,00")
+            old = _record(session, marker, "Air Fryer Britânia antiga", "R$ 189,00")
+            session.query(OfferRecord).filter_by(id=old).update({OfferRecord.created_at: datetime.utcnow() - timedelta(days=60)})
+            session.commit()
+
+        found = client.get("/api/offers/search", params={"q": f"air fryer {marker}"}).json()
+        assert len(found) == 3 and found[0]["id"] > found[-1]["id"]
+
+        since = (datetime.now() - timedelta(days=30)).isoformat()
+        under = client.get("/api/offers/search", params={"q": f"AIR fryer {marker}", "max_price": "300", "since": since}).json()
+        assert [offer["id"] for offer in under] == [cheap] and under[0]["price_cents"] == 24990
+
+        accents = client.get("/api/offers/search", params={"q": f"fritadeira eletrica {marker}", "store": "mercadolivre"}).json()
+        assert len(accents) == 1 and accents[0]["store"] == "mercadolivre"
+        assert client.get("/api/offers/search", params={"q": f'{marker} "OR liquidificador', "store": "mercadolivre"}).json() == []
+
+        first = client.get("/api/offers/search", params={"q": marker, "limit": 2})
+        assert len(first.json()) == 2 and first.headers["x-next-cursor"]
+        rest = client.get("/api/offers/search", params={"q": marker, "limit": 10, "after": first.headers["x-next-cursor"]})
+        assert len(rest.json()) == 3 and "x-next-cursor" not in rest.headers
+        assert {offer["id"] for offer in first.json()}.isdisjoint(offer["id"] for offer in rest.json())
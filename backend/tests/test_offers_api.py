@@ -0,0 +1,62 @@
+import csv
+import io
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from loadtest.fake_store import FakeStoreConfig, create_app, product_url
+from loadtest.runner import BackgroundServer
+
+
+def test_preview_lean_and_fields_modes():
+    with BackgroundServer(create_app(FakeStoreConfig(latency_ms=0, jitter_ms=0, page_kb=5))) as store_server:
+        with TestClient(app) as client:
+            payload = {"url": product_url(store_server.base_url, "amazon", "AM00000100"), "store": "amazon"}
+
+            full = client.post("/api/offers/preview", json=payload).json()
+            assert "raw_text_excerpt" in full["metadata"]
+
+            lean = client.post("/api/offers/preview", params={"mode": "lean"}, json=payload).json()
+            assert set(lean) == {"text", "short_url"}
+
+            picked = client.post("/api/offers/preview", params={"fields": "title,price"}, json=payload).json()
+            assert list(picked) == ["title", "price"]
+
+            bad = client.post("/api/offers/preview", params={"fields": "title,nope"}, json=payload)
+            assert bad.status_code == 422
+
+
+def test_bulk_import_streams_csv_and_reports_progress():
+    with BackgroundServer(create_app(FakeStoreConfig(latency_ms=0, jitter_ms=0, page_kb=5))) as store_server:
+        lines = ["url,coupon", '"' + product_url(store_server.base_url, "amazon", "AM00000200") + '",PROMO10']
+        lines += [product_url(store_server.base_url, "mercadolivre", f"ME{index:08d}") + "," for index in range(5)]
+        lines.append(",SEMURL")
+        body = ("\r\n".join(lines) + "\r\n").encode("utf-8")
+
+        with TestClient(app) as client:
+            response = client.post("/api/offers/bulk", content=body, headers={"content-type": "text/csv"})
+            assert response.status_code == 200
+            rows = list(csv.DictReader(io.StringIO(response.text)))
+            progress = client.get(f"/api/offers/bulk/{response.headers['x-bulk-import-id']}").json()
+
+    assert sorted(int(row["row"]) for row in rows) == list(range(1, 8))
+    by_row = {int(row["row"]): row for row in rows}
+    assert by_row[1]["status"] == "ok" and "PROMO10" in by_row[1]["text"]
+    assert by_row[7] == {**by_row[7], "status": "error", "error": "Linha sem URL"}
+    assert progress["rows_done"] == 6 and progress["rows_failed"] == 1
+    assert progress["status"] == "done" and progress["finished_at"]
+
+
+def test_selected_fields_skip_unused_metadata_parts():
+    from app.services.metadata import extract_metadata
+    from app.services.pipeline import _metadata_parts
+
+    assert _metadata_parts(None) is None
+    assert _metadata_parts(("text", "short_url")) == {"raw_prices"}
+    assert _metadata_parts(("title", "price")) == set()
+
+    html = "<html><body><h1>Fone</h1><p>R$ 99,90 R$ 129,90</p></body></html>"
+    lean = extract_metadata(html, "generic", parts=())
+    assert "raw_prices" not in lean and "raw_text_excerpt" not in lean
+    assert lean["price"] == "R$ 99,90"
+    assert extract_metadata(html, "generic")["raw_prices"] == ["R$ 99,90", "R$ 129,90"]
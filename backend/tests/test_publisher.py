@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.publisher import FakeTransport, PublishDispatcher
+
+
+def _run(transport, channels, per_channel, **limits):
+    async def scenario():
+        dispatcher = PublishDispatcher({"fake": transport}, **limits)
+        started = time.monotonic()
+        for index in range(per_channel):
+            for channel in channels:
+                dispatcher.enqueue(f"fake:{channel}", f"{channel}-{index}")
+        await dispatcher.drain()
+        elapsed = time.monotonic() - started
+        await dispatcher.stop()
+        return elapsed
+
+    return asyncio.run(scenario())
+
+
+def test_channels_share_global_limit_without_tripping_it():
+    transport = FakeTransport(per_channel=(4, 0.1), global_limit=(8, 0.1))
+    elapsed = _run(transport, ["a", "b", "c"], 30, global_rate=76, channel_rate=38)
+
+    assert transport.rejected == 0 and len(transport.sent) == 90
+    for channel in "abc":
+        texts = [message.text for _, destination, message in transport.sent if destination == channel]
+        assert texts == [f"{channel}-{index}" for index in range(30)]
+    assert elapsed < 89 / 76 * 1.4
+
+
+def test_independent_channels_run_in_parallel():
+    transport = FakeTransport(per_channel=(2, 0.1))
+    elapsed = _run(transport, ["a", "b", "c", "d"], 6, global_rate=1000, channel_rate=19)
+    assert transport.rejected == 0 and len(transport.sent) == 24
+    assert elapsed < 5 / 19 * 1.6  # um canal sozinho, não a soma dos quatro
+
+
+def test_rate_limited_and_failed_sends_are_retried_in_order():
+    transport = FakeTransport(per_channel=(2, 0.2), fail_times=2)
+    _run(transport, ["a"], 6, global_rate=1000, channel_rate=50, retry_backoff=0.01)
+    assert transport.rejected > 0
+    assert [message.text for _, _, message in transport.sent] == [f"a-{index}" for index in range(6)]
+
+
+def test_publish_endpoint_rejects_unknown_transport():
+    with TestClient(app) as client:
+        response = client.post("/api/publish", json={"channels": ["pombo:@ofertas"], "text": "oi"})
+        assert response.status_code == 422
+        assert client.post("/api/publish", json={"channels": ["sem-destino"], "text": "oi"}).status_code == 422
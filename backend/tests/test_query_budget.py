@@ -0,0 +1,42 @@
+import logging
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.models import OfferTemplate
+from app.services.metrics import metrics
+from app.services.query_budget import assert_max_queries, capture_queries, fingerprint, query_count
+
+
+def test_fingerprint_groups_statements_by_shape():
+    first = fingerprint("SELECT * FROM templates WHERE id = 3 AND slug = 'a'")
+    second = fingerprint("SELECT *  FROM templates\nWHERE id = 42 AND slug = 'outro'")
+    assert first == second == "SELECT * FROM templates WHERE id = ? AND slug = ?"
+    assert fingerprint("SELECT 1 WHERE id IN (?, ?, ?)") == "SELECT ? WHERE id IN (?...)"
+
+
+def test_capture_queries_counts_repeated_statements():
+    Base.metadata.create_all(bind=engine)
+    with capture_queries() as stats, SessionLocal() as session:
+        for template_id in range(3):
+            session.get(OfferTemplate, template_id + 10_000)
+    assert stats.count == 3 and stats.total_ms >= 0
+    assert [count for _, count in stats.repeated(3)] == [3]
+
+
+def test_endpoints_report_query_counts_and_warn_over_budget(monkeypatch, caplog):
+    with TestClient(app) as client:
+        response = client.get("/api/templates/")
+        assert query_count(response) >= 1
+        assert float(response.headers["x-db-time-ms"]) >= 0
+        assert_max_queries(response, 5)
+        assert query_count(client.get("/healthz")) == 0
+
+        monkeypatch.setattr(settings, "query_budget", 0)
+        with caplog.at_level(logging.WARNING, logger="app.middleware"):
+            client.get("/api/templates/")
+    labels = {"route": "/api/templates/", "reason": "budget"}
+    assert metrics.counter_value("http_query_budget_exceeded_total", labels) >= 1
+    assert any("Orçamento de consultas excedido" in record.getMessage() for record in caplog.records)
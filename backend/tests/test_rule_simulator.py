@@ -0,0 +1,76 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.rule_simulator import CompiledRule, simulate_rules
+from app.services.rules import RuleSnapshot, matches_rule
+from loadtest.fake_store import FakeStoreConfig, create_app, product_url
+from loadtest.runner import BackgroundServer
+
+RULES = (
+    RuleSnapshot(id=1, name="amazon-prime", conditions={"store_in": ["amazon"]}, actions={"append_benefits": ["🚚 Prime"]}),
+    RuleSnapshot(
+        id=2,
+        name="fone-cupom",
+        conditions={"title_contains": ["Fone"], "requires_coupon": True},
+        actions={"set_fields": {"headline": "Só hoje"}, "append_lines": ["Corre!"]},
+    ),
+    RuleSnapshot(id=3, name="tudo", conditions={}, actions={"prepend_lines": ["#oferta"]}),
+)
+
+
+def _contexts(count):
+    for index in range(count):
+        yield index, {
+            "store": ("amazon", "mercadolivre", "generic")[index % 3],
+            "title": f"Fone Bluetooth {index}" if index % 2 else f"Air Fryer {index}",
+            "coupon": "DEZ" if index % 5 == 0 else None,
+            "benefits": [],
+        }
+
+
+def test_compiled_rules_agree_with_matches_rule():
+    for _, context in _contexts(60):
+        for rule in RULES:
+            assert CompiledRule.compile(rule).matches(context) == matches_rule(rule, context)
+
+
+def test_simulation_counts_samples_and_leaves_contexts_untouched():
+    contexts = list(_contexts(100_000))
+    started = time.perf_counter()
+    result = simulate_rules(RULES, contexts, sample_size=2)
+    assert time.perf_counter() - started < 5
+
+    by_name = {item["name"]: item for item in result["rules"]}
+    assert by_name["amazon-prime"]["matched"] == 33_334
+    assert by_name["fone-cupom"]["matched"] == 10_000
+    assert by_name["tudo"]["matched"] == result["touched"] == result["contexts"] == 100_000
+    sample = by_name["amazon-prime"]["samples"][0]
+    assert sample["changes"] == {"benefits": {"before": [], "after": ["🚚 Prime"]}}
+    assert contexts[0][1]["benefits"] == []
+
+
+def test_simulate_endpoint_with_uploaded_contexts():
+    payload = {
+        "rules": [{"name": "ml", "conditions": {"store_in": ["mercadolivre"]}, "actions": {"append_lines": ["ML"]}}],
+        "contexts": [context for _, context in _contexts(9)],
+    }
+    with TestClient(app) as client:
+        response = client.post("/api/rules/simulate", json=payload)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["source"] == "upload"
+    assert body["rules"][0]["matched"] == 3
+    assert body["rules"][0]["samples"][0]["lines_added"] == ["ML"]
+
+
+def test_simulate_endpoint_reads_recorded_history():
+    with BackgroundServer(create_app(FakeStoreConfig(latency_ms=0, jitter_ms=0, page_kb=5))) as store_server:
+        with TestClient(app) as client:
+            url = product_url(store_server.base_url, "amazon", "AM00000300")
+            assert client.post("/api/offers/preview", json={"url": url, "store": "amazon", "coupon": "SIM"}).status_code == 200
+            payload = {"rules": [{"name": "cupom", "conditions": {"requires_coupon": True}}], "store": "amazon"}
+            body = client.post("/api/rules/simulate", json=payload).json()
+    assert body["source"] == "history"
+    assert body["contexts"] >= 1 and body["rules"][0]["matched"] >= 1
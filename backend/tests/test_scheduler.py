@@ -0,0 +1,98 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.models import ScheduledPost
+from app.services import publisher
+from app.services.publisher import FakeTransport, PublishDispatcher
+from app.services.scheduler import to_utc
+from loadtest.fake_store import FakeStoreConfig, create_app, product_url
+from loadtest.runner import BackgroundServer
+
+
+def _wait_status(client, post_id, expected, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        post = client.get(f"/api/schedule/{post_id}").json()
+        if post["status"] == expected:
+            return post
+        time.sleep(0.05)
+    raise AssertionError(f"post {post_id} ficou em {post['status']}, esperado {expected}")
+
+
+def test_naive_times_are_in_default_timezone(monkeypatch):
+    monkeypatch.setattr(settings, "default_timezone", "America/Sao_Paulo")
+    assert to_utc(datetime(2026, 1, 10, 8, 0)) == datetime(2026, 1, 10, 11, 0)
+    assert to_utc(datetime(2026, 1, 10, 8, 0, tzinfo=timezone.utc)) == datetime(2026, 1, 10, 8, 0)
+
+
+def test_scheduler_prefetches_publishes_and_recovers_missed_posts(monkeypatch):
+    monkeypatch.setattr(settings, "schedule_prefetch_minutes", 1 / 60)
+    transport = FakeTransport()
+    monkeypatch.setattr(publisher, "_dispatcher", PublishDispatcher({"fake": transport}, global_rate=100, channel_rate=100))
+
+    with BackgroundServer(create_app(FakeStoreConfig(latency_ms=0, jitter_ms=0, page_kb=5))) as store_server:
+        url = product_url(store_server.base_url, "amazon", "AM00000300")
+        item = {"url": url, "store": "amazon", "coupon": "AGENDA"}
+        Base.metadata.create_all(bind=engine)
+        now = datetime.utcnow()
+        with SessionLocal() as session:
+            missed = ScheduledPost(status="pending", publish_at=now - timedelta(minutes=10), payload=item, channels=["fake:@a"])
+            stale = ScheduledPost(status="prefetched", publish_at=now - timedelta(days=2), payload=item, channels=["fake:@a"])
+            session.add_all([missed, stale])
+            session.commit()
+            missed_id, stale_id = missed.id, stale.id
+
+        with TestClient(app) as client:
+            assert _wait_status(client, missed_id, "published")["published_at"]
+            assert client.get(f"/api/schedule/{stale_id}").json()["status"] == "expired"
+
+            publish_at = datetime.now(timezone.utc) + timedelta(seconds=1.5)
+            created = client.post(
+                "/api/schedule",
+                json={"items": [item, item], "publish_at": publish_at.isoformat(), "channels": ["fake:@b"]},
+            )
+            assert created.status_code == 201
+            first, second = [post["id"] for post in created.json()]
+            assert client.delete(f"/api/schedule/{second}").status_code == 204
+
+            prefetched = _wait_status(client, first, "prefetched")
+            assert datetime.now(timezone.utc) < publish_at and prefetched["prefetched_at"]
+            _wait_status(client, first, "published")
+            assert datetime.now(timezone.utc) >= publish_at
+            assert client.delete(f"/api/schedule/{first}").status_code == 409
+            assert client.post("/api/schedule", json={**item, "items": [item], "publish_at": publish_at.isoformat(), "channels": ["x"]}).status_code == 422
+
+            deadline = time.monotonic() + 2
+            while len(transport.sent) < 2 and time.monotonic() < deadline:
+                time.sleep(0.05)
+
+    destinations = [destination for _, destination, _ in transport.sent]
+    assert destinations == ["@a", "@b"]
+    assert "AGENDA" in transport.sent[1][2].text
+
+
+def test_cancel_during_prefetch_is_not_overwritten(monkeypatch):
+    monkeypatch.setattr(settings, "schedule_prefetch_minutes", 5)
+    transport = FakeTransport()
+    monkeypatch.setattr(publisher, "_dispatcher", PublishDispatcher({"fake": transport}, global_rate=100, channel_rate=100))
+
+    with BackgroundServer(create_app(FakeStoreConfig(latency_ms=1000, jitter_ms=0, page_kb=5))) as store_server:
+        item = {"url": product_url(store_server.base_url, "amazon", "AM00000310"), "store": "amazon"}
+        with TestClient(app) as client:
+            publish_at = datetime.now(timezone.utc) + timedelta(seconds=2)
+            created = client.post("/api/schedule", json={"items": [item], "publish_at": publish_at.isoformat(), "channels": ["fake:@c"]})
+            post_id = created.json()[0]["id"]
+            _wait_status(client, post_id, "prefetching")
+            assert client.delete(f"/api/schedule/{post_id}").status_code == 204
+
+            time.sleep(max(0.0, (publish_at - datetime.now(timezone.utc)).total_seconds()) + 0.5)
+            assert client.get(f"/api/schedule/{post_id}").json()["status"] == "cancelled"
+
+    with SessionLocal() as session:
+        assert session.get(ScheduledPost, post_id).result is None
+    assert transport.sent == []
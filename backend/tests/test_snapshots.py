@@ -0,0 +1,71 @@
+import os
+
+from app.services import metadata
+from app.services.snapshots import SnapshotStore, _reprocess_path, reprocess_snapshots
+from loadtest.fake_store import render_product_page
+
+
+def test_snapshot_roundtrip_is_content_addressed(tmp_path):
+    store = SnapshotStore(tmp_path, max_bytes=10 * 1024 * 1024, codec="gzip")
+    html = render_product_page("amazon", "AM00000001", page_kb=20)
+    digest = store.save("https://www.amazon.com.br/dp/AM00000001", "amazon", html)
+    assert store.save("https://amzn.to/xyz", "amazon", html) == digest
+
+    snapshot = store.load(digest)
+    assert snapshot.html == html
+    assert snapshot.url == "https://www.amazon.com.br/dp/AM00000001"
+    assert store.disk.total_bytes() < len(html) / 5
+
+
+def test_snapshot_eviction_keeps_total_under_budget(tmp_path):
+    store = SnapshotStore(tmp_path, max_bytes=4_000, codec="gzip")
+    for index in range(20):
+        store.save(f"https://example.com/{index}", "generic", f"<html><body>{os.urandom(1000).hex()}")
+    assert store.disk.total_bytes() <= 4_000
+    assert len(list(store.iter_paths())) < 20
+
+
+def test_reprocess_runs_current_extractors(tmp_path):
+    store = SnapshotStore(tmp_path, max_bytes=10 * 1024 * 1024, codec="gzip")
+    store.save("https://a/1", "amazon", render_product_page("amazon", "AM00000001", page_kb=1))
+    store.save("https://m/1", "mercadolivre", render_product_page("mercadolivre", "ME00000001", page_kb=1))
+
+    results = list(reprocess_snapshots(store, workers=2, store_filter="amazon"))
+    assert [item["url"] for item in results] == ["https://a/1"]
+    assert results[0]["metadata"]["price"].startswith("R$ ")
+
+
+def test_reprocess_reports_corrupt_snapshot_without_aborting(tmp_path):
+    store = SnapshotStore(tmp_path, max_bytes=10 * 1024 * 1024, codec="gzip")
+    store.save("https://a/1", "amazon", render_product_page("amazon", "AM00000001", page_kb=1))
+    broken = store.disk.path_for("ab" * 32)
+    broken.parent.mkdir(parents=True, exist_ok=True)
+    broken.write_bytes(b"nao e gzip")
+
+    results = list(reprocess_snapshots(store, workers=1))
+    assert sorted("error" in item for item in results) == [False, True]
+
+
+
+def test_reprocess_reports_extractor_failure_as_error(tmp_path, monkeypatch):
+    store = SnapshotStore(tmp_path, max_bytes=10 * 1024 * 1024, codec="gzip")
+    store.save("https://a/1", "amazon", render_product_page("amazon", "AM00000001", page_kb=1))
+    store.save("https://m/1", "mercadolivre", render_product_page("mercadolivre", "ME00000001", page_kb=1))
+    original = metadata.extract_metadata
+
+    def flaky(html, store_name):
+        if store_name == "mercadolivre":
+            raise ValueError("extrator quebrado")
+        return original(html, store_name)
+
+    monkeypatch.setattr(metadata, "extract_metadata", flaky)
+    results = [_reprocess_path(str(path), None) for path in store.iter_paths()]
+    errors = [item for item in results if "error" in item]
+    assert len(results) == 2 and [item["error"] for item in errors] == ["extrator quebrado"]
+    assert errors[0]["path"] and errors[0]["digest"]
+
+def test_disk_store_counts_first_write_once(tmp_path):
+    store = SnapshotStore(tmp_path, max_bytes=10 * 1024 * 1024, codec="gzip")
+    store.save("https://a/1", "amazon", "<html>" + os.urandom(2000).hex())
+    on_disk = sum(path.stat().st_size for path in store.iter_paths())
+    assert store.disk.total_bytes() == on_disk
@@ -0,0 +1,47 @@
+from fastapi.testclient import TestClient
+
+from app.dependencies import get_current_user
+from app.main import app
+from app.models import User
+from app.static_assets import IMMUTABLE_CACHE, accepted_encodings, static_url
+
+
+def test_hashed_assets_are_immutable_and_negotiate_encoding():
+    url = static_url("css/styles.css")
+    assert url.startswith("/static/css/styles.") and url.endswith(".css") and url != "/static/css/styles.css"
+    with TestClient(app) as client:
+        compressed = client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert compressed.headers["cache-control"] == IMMUTABLE_CACHE
+        assert compressed.headers["content-encoding"] == "gzip" and compressed.headers["vary"] == "Accept-Encoding"
+        assert compressed.headers["content-type"].startswith("text/css")
+        assert "--primary" in compressed.text
+
+        identity = client.get(url, headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in identity.headers and identity.content == compressed.content
+        assert identity.headers["etag"] != compressed.headers["etag"]
+
+        revalidated = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["etag"]})
+        assert revalidated.status_code == 304
+
+        legacy = client.get("/static/css/styles.css")
+        assert legacy.headers["cache-control"] == "no-cache"
+        assert client.get("/static/css/nada.css").status_code == 404
+
+
+def test_pages_link_hashed_assets_and_dynamic_responses_are_gzipped():
+    app.dependency_overrides[get_current_user] = lambda: User(email="admin@example.com", role="admin")
+    try:
+        with TestClient(app) as client:
+            page = client.get("/offers", headers={"Accept-Encoding": "gzip"})
+            small = client.get("/healthz", headers={"Accept-Encoding": "gzip"})
+            plain = client.get("/offers", headers={"Accept-Encoding": "identity"})
+    finally:
+        app.dependency_overrides.clear()
+    assert static_url("js/htmx.min.js") in page.text and static_url("css/styles.css") in page.text
+    assert page.headers["content-encoding"] == "gzip" and "accept-encoding" in page.headers["vary"].lower()
+    assert "content-encoding" not in small.headers and "content-encoding" not in plain.headers
+    assert plain.text == page.text
+
+
+def test_accept_encoding_quality_values():
+    assert accepted_encodings("gzip;q=0.5, br;q=0, *") == {"gzip": 0.5, "br": 0.0, "*": 1.0}
@@ -0,0 +1,36 @@
+from app.services.stores import detect_store, get_adapter
+
+
+def test_detect_store_by_host_suffix():
+    assert detect_store("https://www.amazon.com.br/dp/B0C1234567") == "amazon"
+    assert detect_store("https://amzn.to/3abcd") == "amazon"
+    assert detect_store("https://produto.mercadolivre.com.br/MLB-123456") == "mercadolivre"
+    assert detect_store("https://www.awin1.com/cread.php?awinmid=1") == "awin"
+    assert detect_store("https://example.com/amazon.com.br/item") == "generic"
+    assert detect_store("https://notamazon.com/") == "generic"
+    assert detect_store("https://amazon.com.br.example.com/dp/B0C1") == "generic"
+
+
+def test_detect_store_regional_domains():
+    assert detect_store("https://www.amazon.de/dp/B0C1234567") == "amazon"
+    assert detect_store("https://www.amazon.co.uk/dp/B0C1234567") == "amazon"
+    assert detect_store("https://www.amazon.com.mx/dp/B0C1234567") == "amazon"
+    assert detect_store("https://articulo.mercadolibre.com.ar/MLA-123") == "mercadolivre"
+    assert detect_store("https://www.mercadolibre.cl/p/MLC1") == "mercadolivre"
+    assert detect_store("https://lista.mercadolivre.com.br/fone") == "mercadolivre"
+
+
+def test_detect_store_mlb_path_fallback():
+    assert detect_store("https://loja.example.com/MLB-99887766") == "mercadolivre"
+
+
+def test_adapter_affiliate_rewrite():
+    amazon = get_adapter("amazon")
+    assert amazon.apply_affiliate("https://www.amazon.com.br/dp/B0C1234567?th=1", {"tag": "grupo-20"}).endswith(
+        "th=1&tag=grupo-20"
+    )
+    awin = get_adapter("awin")
+    assert awin.apply_affiliate("https://loja.com/p?id=1", {"deeplink_prefix": "https://awin/?ued="}) == (
+        "https://awin/?ued=https%3A%2F%2Floja.com%2Fp%3Fid%3D1"
+    )
+    assert get_adapter("shopee") is get_adapter("generic")
@@ -0,0 +1,97 @@
+import asyncio
+
+from app.database import Base, SessionLocal, engine
+from app.services.pipeline import stream_offer
+from app.sse import format_sse
+from loadtest.fake_store import FakeStoreConfig, create_app, product_url
+from loadtest.runner import BackgroundServer
+
+
+def test_stream_offer_emits_stages_in_order():
+    Base.metadata.create_all(bind=engine)
+
+    async def collect(url):
+        with SessionLocal() as session:
+            return [item async for item in stream_offer(session, url, store="mercadolivre", coupon="ML5")]
+
+    with BackgroundServer(create_app(FakeStoreConfig(latency_ms=0, jitter_ms=0, page_kb=200))) as server:
+        events = asyncio.run(collect(product_url(server.base_url, "mercadolivre", "ME00000007")))
+
+    assert [stage for stage, _ in events] == ["head", "prices", "text"]
+    head, prices, final = (data for _, data in events)
+    assert head["title"].endswith("ME00000007")
+    assert prices["price"].startswith("R$ ")
+    assert "ML5" in final["text"]
+
+
+
+def test_streamed_offers_are_recorded_and_flagged_when_repeated():
+    Base.metadata.create_all(bind=engine)
+
+    async def final_preview(url):
+        with SessionLocal() as session:
+            events = [item async for item in stream_offer(session, url, store="amazon", coupon="DUP")]
+        return events[-1]
+
+    with BackgroundServer(create_app(FakeStoreConfig(latency_ms=0, jitter_ms=0, page_kb=5))) as server:
+        url = product_url(server.base_url, "amazon", "AM00000480")
+        (first_stage, first), (second_stage, second) = asyncio.run(final_preview(url)), asyncio.run(final_preview(url))
+
+    assert first_stage == second_stage == "text"
+    assert first["duplicate"] is None
+    assert second["duplicate"]["status"] == "generated" and second["duplicate"]["generated_count"] == 1
+
+def test_format_sse_prefixes_every_line():
+    assert format_sse("text", "a\nb") == "event: text\ndata: a\ndata: b\n\n"
+    assert format_sse("done", "") == "event: done\ndata: \n\n"
+
+
+def test_web_stream_always_ends_with_done(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.dependencies import get_current_user
+    from app.main import app
+    from app.models import User
+    from app.routes import web
+
+    async def broken_stream(*args, **kwargs):
+        raise RuntimeError("template quebrado")
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(web, "stream_offer", broken_stream)
+    app.dependency_overrides[get_current_user] = lambda: User(email="editor@example.com", role="editor")
+    try:
+        with TestClient(app) as client:
+            body = client.get("/offers/stream", params={"url": "https://example.com/p"}).text
+    finally:
+        app.dependency_overrides.clear()
+
+    assert "event: error" in body and "template quebrado" in body
+    assert body.endswith("event: done\ndata: \n\n")
+
+
+def test_stream_metadata_finds_head_split_across_chunks():
+    from starlette.applications import Starlette
+    from starlette.responses import StreamingResponse
+    from starlette.routing import Route
+
+    from app.services.metadata import stream_metadata
+
+    async def page(request):
+        async def body():
+            yield "<html><head><title>Caneca " + "x" * 5000 + "</title></HE"
+            await asyncio.sleep(0.05)
+            yield "AD><body>" + "R$ 10,00 " * 100
+            await asyncio.sleep(0.05)
+            yield "</body></html>"
+
+        return StreamingResponse(body(), media_type="text/html")
+
+    async def collect(url):
+        return [item async for item in stream_metadata(url)]
+
+    with BackgroundServer(Starlette(routes=[Route("/p", page)])) as server:
+        events = asyncio.run(collect(f"{server.base_url}/p"))
+
+    assert [stage for stage, _ in events] == ["head", "metadata"]
+    assert events[0][1]["title"].startswith("Caneca")
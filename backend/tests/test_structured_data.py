@@ -0,0 +1,63 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from app.services.structured_data import extract_structured_data, format_price, price_cents
+
+JSON_LD_PAGE = """
+<html><head>
+<script type="application/ld+json">
+{"@context": "https://schema.org", "@graph": [
+  {"@type": "BreadcrumbList"},
+  {"@type": "Product", "name": "Air Fryer 4L", "image": ["https://cdn.example/air.jpg"],
+   "offers": {"@type": "Offer", "price": "1299.90", "priceCurrency": "BRL",
+              "priceSpecification": [{"@type": "UnitPriceSpecification", "priceType": "https://schema.org/ListPrice", "price": 1599}]}}
+]}
+</script>
+</head><body><p>R$ 9,99 R$ 1,00</p></body></html>
+"""
+
+
+def test_format_price_handles_decimal_styles():
+    assert format_price("1299.9") == "R$ 1.299,90"
+    assert format_price("1.299,90", "brl") == "R$ 1.299,90"
+    assert format_price(49, "USD") == "USD 49,00"
+    assert format_price("abc") is None
+
+
+def test_format_price_agrees_with_price_cents():
+    assert format_price("1.299") == "R$ 1.299,00"
+    assert format_price("R$ 1.299,90") == "R$ 1.299,90"
+    for raw in ("1.299", "R$ 1.299,90", "1299.9", "49"):
+        assert price_cents(format_price(raw)) == price_cents(raw)
+
+
+def test_json_ld_product_takes_precedence():
+    data = extract_structured_data(BeautifulSoup(JSON_LD_PAGE, "lxml"))
+    assert data["source"] == "json-ld"
+    assert data["title"] == "Air Fryer 4L"
+    assert data["image"] == "https://cdn.example/air.jpg"
+    assert data["price"] == "R$ 1.299,90"
+    assert data["price_original"] == "R$ 1.599,00"
+
+
+def test_microdata_and_meta_fallbacks():
+    microdata = """<div itemscope itemtype="https://schema.org/Product"><span itemprop="name">Creatina</span>
+    <meta itemprop="price" content="89.90" /><meta itemprop="priceCurrency" content="BRL" /></div>"""
+    assert extract_structured_data(BeautifulSoup(microdata, "lxml"))["price"] == "R$ 89,90"
+
+    meta = '<meta property="product:price:amount" content="59.00" /><meta property="product:price:currency" content="BRL" />'
+    assert extract_structured_data(BeautifulSoup(meta, "lxml"))["source"] == "meta"
+    assert extract_structured_data(BeautifulSoup("<p>R$ 10,00</p>", "lxml")) == {}
+
+
+def test_structured_hit_skips_full_text_scan(monkeypatch):
+    from app.services import metadata
+
+    page = JSON_LD_PAGE.replace("<p>", "<p>" + "texto " * 5000)
+    soup = BeautifulSoup(page, "lxml")
+    assert metadata._text_excerpt(soup) == soup.get_text(" ", strip=True)[:1000]
+
+    monkeypatch.setattr(BeautifulSoup, "get_text", lambda *args, **kwargs: pytest.fail("texto completo percorrido"))
+    result = metadata.extract_metadata(page, "generic")
+    assert result["price"] == "R$ 1.299,90"
+    assert len(result["raw_text_excerpt"]) == 1000
@@ -0,0 +1,69 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.dependencies import get_current_user
+from app.main import app
+from app.models import User
+from app.services.query_budget import assert_max_queries
+from loadtest.fake_store import FakeStoreConfig, create_app, product_url
+from loadtest.runner import BackgroundServer
+
+HTMX = {"HX-Request": "true"}
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_current_user] = lambda: User(email="admin@example.com", role="admin")
+    try:
+        with TestClient(app) as test_client:
+            yield test_client
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_pages_reuse_cached_template_and_rule_data(client):
+    assert "Template padrão" in client.get("/offers").text
+    client.get("/")
+    assert_max_queries(client.get("/offers"), 1)
+    assert_max_queries(client.get("/"), 1)
+
+    rules_page = client.get("/rules").text
+    assert '\\"' not in rules_page and '<section class="grid" id="rule-list">' in rules_page
+    assert_max_queries(client.get("/rules"), 1)
+
+
+def test_template_and_rule_forms_return_fragments(client):
+    slug = f"tpl-{uuid.uuid4().hex[:8]}"
+    created = client.post("/templates", data={"name": "Relâmpago", "slug": slug, "body": "{{ title }}"}, headers=HTMX)
+    assert created.text.startswith('<article class="card" id="template-') and "<html" not in created.text
+    assert f'value="{slug}"' in client.get("/offers").text  # o select enxerga o template novo
+
+    template_id = created.text.split('id="template-', 1)[1].split('"', 1)[0]
+    removed = client.post(f"/templates/{template_id}/delete", headers=HTMX)
+    assert removed.status_code == 200 and removed.text == ""
+
+    rule = client.post("/rules", data={"name": "Frete", "actions_json": '{"append": ["Frete grátis"]}'}, headers=HTMX)
+    assert rule.text.startswith('<article class="card" id="rule-') and 'hx-swap-oob="delete"' in rule.text
+    rule_id = rule.text.split('id="rule-', 1)[1].split('"', 1)[0]
+
+    invalid = client.post(f"/rules/{rule_id}/update", data={"name": "Frete", "actions_json": "{"}, headers=HTMX)
+    assert invalid.headers["hx-retarget"] == "#rule-messages" and "notice--error" in invalid.text
+
+    updated = client.post(f"/rules/{rule_id}/update", data={"name": "Frete 2", "actions_json": "{}"}, headers=HTMX)
+    assert "Frete 2" in updated.text and "<html" not in updated.text
+    assert "Frete 2" in client.get("/rules").text
+
+    assert client.post(f"/rules/{rule_id}/delete", headers=HTMX).text == ""
+    assert client.post(f"/rules/{rule_id}/delete", follow_redirects=False).status_code == 303
+
+
+def test_offer_preview_returns_card_fragment(client):
+    with BackgroundServer(create_app(FakeStoreConfig(latency_ms=0, jitter_ms=0, page_kb=5))) as store_server:
+        form = {"url": product_url(store_server.base_url, "amazon", "AM00000461"), "store": "amazon", "coupon": "HTMX"}
+        fragment = client.post("/offers", data=form, headers=HTMX)
+        page = client.post("/offers", data=form)
+    assert fragment.text.startswith('<section class="card">') and "HTMX" in fragment.text
+    assert "<html" not in fragment.text and "<html" in page.text
+    assert "Oferta já gerada" not in fragment.text and "Oferta já gerada" in page.text